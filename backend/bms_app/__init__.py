@@ -51,10 +51,20 @@ def create_app(mode='prod'):
     register_handlers(app)
     register_blueprints(app)
 
+    from bms_app.services.operation_events import init_event_broker
+    init_event_broker(app)
+
+    from bms_app.services.import_jobs import init_import_jobs
+    init_import_jobs(app)
+
     @app.before_first_request
     def create_db_objects():
         upgrade()
 
+        from bms_app.services.import_jobs import fail_stale_jobs
+        fail_stale_jobs()
+        db.session.commit()
+
     CORS(app, origins=CORS_LOCALHOST_ORIGINS)
 
     return app
@@ -102,6 +112,9 @@ def register_blueprints(flask_app):
     from bms_app.labels import bp as labels_bp
     api_bp.register_blueprint(labels_bp, url_prefix='/labels')
 
+    from bms_app.import_job import bp as import_job_bp
+    api_bp.register_blueprint(import_job_bp, url_prefix='/import-jobs')
+
     from bms_app.webhook import bp as webhook_bp
     flask_app.register_blueprint(webhook_bp, url_prefix='/webhooks')
 
@@ -21,6 +21,8 @@ class Default:
     DEBUG = False
     SQLALCHEMY_DATABASE_URI = settings.DATABASE_URL
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    IMPORT_JOBS_WORKERS = settings.IMPORT_JOBS_WORKERS
+    ANSIBLE_CONFIG_UPLOAD_WORKERS = settings.ANSIBLE_CONFIG_UPLOAD_WORKERS
 
 
 class Development(Default):
@@ -35,6 +37,10 @@ class Production(Default):
 class Testing(Default):
     DEBUG = False
     SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    # process import jobs within the request
+    IMPORT_JOBS_WORKERS = 0
+    # upload ansible configs one by one in the generated order
+    ANSIBLE_CONFIG_UPLOAD_WORKERS = 1
 
 
 CONFIGS = {
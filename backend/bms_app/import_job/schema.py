@@ -0,0 +1,33 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from marshmallow import Schema, fields
+
+from bms_app import ma
+from bms_app.models import ImportJob
+
+
+class TargetsUploadSchema(Schema):
+    overwrite = fields.Boolean(load_default=False)
+
+
+class ImportJobSchema(ma.SQLAlchemyAutoSchema):
+    class Meta:
+        model = ImportJob
+        exclude = ('idempotency_key', )
+
+    job_type = fields.Function(lambda obj: obj.job_type.value)
+    status = fields.Function(lambda obj: obj.status.value)
+    project_id = fields.Integer()
+    is_finished = fields.Function(lambda obj: obj.is_finished)
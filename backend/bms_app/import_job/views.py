@@ -0,0 +1,65 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from flask import request
+
+from bms_app.import_job import bp
+from bms_app.import_job.schema import ImportJobSchema, TargetsUploadSchema
+from bms_app.models import ImportJob, ImportJobType
+from bms_app.schema import FileSchema
+from bms_app.services.import_jobs import create_import_job
+from bms_app.source_db.schema import MigvisorFileUploadSchema
+
+
+def _job_response(job, created):
+    """Return 202 for the new job and 200 for already existing one."""
+    return ImportJobSchema().dump(job), 202 if created else 200
+
+
+@bp.route('/migvisor', methods=['POST'])
+def import_migvisor_assessment():
+    """Start import of source dbs from migvisor file."""
+    validated_form_data = MigvisorFileUploadSchema().load(request.form)
+    validated_files = FileSchema().load(request.files)
+
+    job, created = create_import_job(
+        ImportJobType.MIGVISOR,
+        validated_files['file'].read(),
+        project_id=validated_form_data['project_id'],
+        overwrite=validated_form_data['overwrite']
+    )
+
+    return _job_response(job, created)
+
+
+@bp.route('/targets', methods=['POST'])
+def import_targets():
+    """Start import of bms servers from json file."""
+    validated_form_data = TargetsUploadSchema().load(request.form)
+    validated_files = FileSchema().load(request.files)
+
+    job, created = create_import_job(
+        ImportJobType.TARGETS,
+        validated_files['file'].read(),
+        overwrite=validated_form_data['overwrite']
+    )
+
+    return _job_response(job, created)
+
+
+@bp.route('/<int:job_id>', methods=['GET'])
+def get_import_job(job_id):
+    """Return status and progress of the job."""
+    job = ImportJob.query.get_or_404(job_id)
+    return ImportJobSchema().dump(job)
@@ -11,21 +11,58 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+from concurrent.futures import ThreadPoolExecutor
 
-from googleapiclient.discovery import build
+from bms_app import settings
+from bms_app.services.gcloud_clients import get_discovery_service
 
 
-def fetch_bms_instances(gcp_project_name):
-    """Return list of bms instances from BMS API."""
-    service = build('baremetalsolution', 'v2', static_discovery=False)
-    locations = service.projects().locations()
+# max number of instances returned by one list request
+PAGE_SIZE = 100
 
+
+def _get_instances_resource():
+    """Return instances resource of the current thread's service."""
+    service = get_discovery_service(
+        'baremetalsolution', 'v2', static_discovery=False
+    )
+    return service.projects().locations().instances()
+
+
+def iter_instances_pages(parent):
+    """Yield pages of instances following nextPageToken."""
+    instances = _get_instances_resource()
+
+    req = instances.list(parent=parent, pageSize=PAGE_SIZE)
+    while req is not None:
+        resp = req.execute()
+        yield resp.get('instances', [])
+        req = instances.list_next(req, resp)
+
+
+def get_instance(name):
+    return _get_instances_resource().get(name=name).execute()
+
+
+def fetch_bms_instances(gcp_project_name, max_workers=None):
+    """Yield details of all bms instances from BMS API.
+
+    Details of the instances are fetched by several threads
+    while the next page of the instances is being requested.
+    """
+    max_workers = max_workers or settings.BMS_DISCOVERY_WORKERS
     parent = f'projects/{gcp_project_name}/locations/global'
-    req = locations.instances().list(parent=parent)
 
-    instances = []
-    for item in req.execute()['instances']:
-        data = locations.instances().get(name=item['name']).execute()
-        instances.append(data)
+    with ThreadPoolExecutor(max_workers=max_workers,
+                            thread_name_prefix='bms-discovery') as pool:
+        pending = []
+        for page in iter_instances_pages(parent):
+            futures = [pool.submit(get_instance, x['name']) for x in page]
+
+            for future in pending:
+                yield future.result()
+
+            pending = futures
 
-    return instances
+        for future in pending:
+            yield future.result()
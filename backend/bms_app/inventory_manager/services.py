@@ -11,13 +11,14 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+from itertools import islice
 
 from bms_app.inventory_manager.schema import (
     APIBMSServerSchema, UploadBMSServerSchema
 )
 from bms_app.models import BMSServer, Mapping, SourceDB, db
-from bms_app.services.source_db import clear_bms_target_params
-from bms_app.utils import update_object
+from bms_app.services.bulk import UPSERT_BATCH_SIZE, bulk_upsert
+from bms_app.services.source_db import clear_dbs_bms_target_params
 
 
 CLIENT_NETWORK = 'CLIENT'  # Client network, a network peered to a Google Cloud VPC.
@@ -27,49 +28,103 @@ upload_bms_schema = UploadBMSServerSchema()
 api_bms_schema = APIBMSServerSchema()
 
 
-def process_bms_instance_data(instance_data, overwrite):
-    """Process input data re one bms server.
+class BMSServersSync:
+    """Insert new bms servers and update existing ones in bulk.
 
-    Save bms sever, update it or skip it.
-    Clear source db config if needed.
+    Existing bms server is overwritten only if it is not mapped
+    or all mapped dbs are deployable, target parameters
+    of configs of these dbs are cleared.
     """
-    bms_server = db.session.query(BMSServer) \
-        .filter(BMSServer.name == instance_data['name']) \
-        .first()
-
-    if bms_server:
-        if overwrite:
-            # Overwrite bms_target if it has not been deployed yet
-            # or mapped source_db is deployable.
-            mapped_source_db = db.session.query(SourceDB) \
-                .outerjoin(Mapping) \
-                .filter(Mapping.bms_id == bms_server.id) \
-                .first()
-
-            if mapped_source_db and mapped_source_db.is_deployable:
-                update_object(bms_server, instance_data)
-                # Reset some parameters in the Config because
-                # the bms_target parameters have changed.
-                config = mapped_source_db.config
-                if config:
-                    clear_bms_target_params(config)
-            elif not mapped_source_db:
-                update_object(bms_server, instance_data)
-
-    else:
-        bms_server = BMSServer(**instance_data)
-
-    db.session.add(bms_server)
+
+    def __init__(self, overwrite):
+        self.overwrite = overwrite
+        self.existing = self._get_existing_servers()
+        self.result = {'added': 0, 'updated': 0, 'skipped': 0}
+
+    @staticmethod
+    def _get_existing_servers():
+        """Return {name: (can_be_overwritten, mapped_db_ids)}."""
+        qs = db.session.query(
+            BMSServer.name,
+            SourceDB.id,
+            SourceDB.is_deployable
+        ) \
+            .outerjoin(Mapping, Mapping.bms_id == BMSServer.id) \
+            .outerjoin(SourceDB, Mapping.db_id == SourceDB.id)
+
+        existing = {}
+        for name, db_id, is_deployable in qs:
+            can_overwrite, db_ids = existing.get(name, (True, set()))
+            if db_id:
+                can_overwrite = can_overwrite and bool(is_deployable)
+                db_ids.add(db_id)
+            existing[name] = (can_overwrite, db_ids)
+
+        return existing
+
+    def sync(self, instances_data):
+        """Save one chunk of loaded bms servers data."""
+        rows = {}
+        clear_db_ids = set()
+
+        for instance_data in instances_data:
+            name = instance_data['name']
+
+            if name in rows:
+                # the same server is repeated within the chunk,
+                # count it the same way as a repeat from an earlier chunk
+                if self.overwrite:
+                    rows[name].update(instance_data)
+                    self.result['updated'] += 1
+                else:
+                    self.result['skipped'] += 1
+                continue
+
+            if name in self.existing:
+                can_overwrite, db_ids = self.existing[name]
+                if not (self.overwrite and can_overwrite):
+                    self.result['skipped'] += 1
+                    continue
+
+                clear_db_ids.update(db_ids)
+                self.result['updated'] += 1
+            else:
+                self.result['added'] += 1
+
+            rows[name] = dict(instance_data)
+
+        if rows:
+            bulk_upsert(BMSServer, rows.values(), index_elements=['name'])
+        clear_dbs_bms_target_params(clear_db_ids)
+
+        for name in rows:
+            self.existing.setdefault(name, (True, set()))
+
+
+def sync_bms_servers(instances_data, overwrite):
+    """Save bms servers data by chunks, instances_data may be a generator."""
+    servers_sync = BMSServersSync(overwrite)
+
+    instances_data = iter(instances_data)
+    while True:
+        chunk = list(islice(instances_data, UPSERT_BATCH_SIZE))
+        if not chunk:
+            break
+        servers_sync.sync(chunk)
+
+    return servers_sync.result
 
 
 def insert_uploaded_servers(uploaded_instances, overwrite=False):
     """Process data uploaded via html form."""
-    for item in uploaded_instances:
-        instance_data = upload_bms_schema.load(item)
-        process_bms_instance_data(instance_data, overwrite)
-
+    result = sync_bms_servers(
+        (upload_bms_schema.load(x) for x in uploaded_instances),
+        overwrite
+    )
     db.session.commit()
 
+    return result
+
 
 def get_client_ip(bms_server):
     """Get ip address used to reach bms from GCP."""
@@ -79,9 +134,15 @@ def get_client_ip(bms_server):
 
 
 def insert_discovered_servers(discovered_instances, overwrite):
-    """Process data from BMS API."""
-    for item in discovered_instances:
-        instance_data = api_bms_schema.load(item)
-        process_bms_instance_data(instance_data, overwrite)
+    """Process data from BMS API.
 
+    discovered_instances may be a generator,
+    instances are saved as soon as they are fetched.
+    """
+    result = sync_bms_servers(
+        (api_bms_schema.load(x) for x in discovered_instances),
+        overwrite
+    )
     db.session.commit()
+
+    return result
@@ -27,6 +27,7 @@ from bms_app.inventory_manager.services import (
 )
 from bms_app.models import BMSServer, Mapping, SourceDB, db
 from bms_app.schema import FileSchema
+from bms_app.services.change_version import bump_bms_change_version
 from bms_app.utils import update_object
 
 
@@ -74,6 +75,7 @@ def server(server_id):
 def server_delete(server_id):
     """Delete server."""
     bms_server = BMSServer.query.get_or_404(server_id)
+    bump_bms_change_version(server_id)
     db.session.delete(bms_server)
     db.session.commit()
     return {}, 204
@@ -88,6 +90,7 @@ def server_edit(server_id):
     update_object(bms_server, validated_data)
 
     db.session.add(bms_server)
+    bump_bms_change_version(server_id)
     db.session.commit()
 
     return BMSServerSchema().dump(bms_server)
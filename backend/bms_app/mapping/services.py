@@ -12,15 +12,19 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from collections import Counter, defaultdict
+
 from marshmallow import ValidationError
 
 from bms_app.models import (
-    DEPLOYED_STATUSES, BMSServer, Config, Mapping, SourceDB, SourceDBType,
-    Wave, db
+    DEPLOYED_STATUSES, BMSServer, Config, Label, Mapping, SourceDB,
+    SourceDBType, Wave, db, source_db_to_label
 )
+from bms_app.services.change_version import bump_change_version
 from bms_app.services.source_db import (
-    clear_bms_target_params, does_db_have_operation
+    clear_bms_target_params, get_db_ids_with_operation
 )
+from bms_app.services.wave_rollup import refresh_waves_rollup
 
 
 def validate_db(db_id):
@@ -56,50 +60,133 @@ def validate_wave(wave_id):
 
 
 class GetMappingsService:
+    """Provide data of db mappings.
+
+    Mappings, labels and operations of all dbs are retrieved
+    by a fixed number of queries.
+    Dbs can be filtered by project/db(s)/labels (any of them)
+    and paginated by db id: `after` is the last db id of the previous page.
+    """
+
+    def __init__(self, project_id=None, db_id=None, label_ids=None,
+                 after=None, limit=None, db_ids=None):
+        self.project_id = project_id
+        self.db_id = db_id
+        self.db_ids = db_ids
+        self.label_ids = label_ids
+        self.after = after
+        self.limit = limit
+
+        self.next_cursor = None
+
     @classmethod
     def run(cls, project_id=None, db_id=None):
         """Return list of mappings. Filter by project/db_id optionally."""
-        query = cls._generate_query(project_id, db_id)
+        return cls(project_id=project_id, db_id=db_id).get_data()
+
+    @property
+    def is_paginated(self):
+        return bool(self.after or self.limit)
+
+    def get_data(self):
+        rows = self._get_page_rows()
+        db_ids = list(dict.fromkeys(x[1].id for x in rows))
+
+        labels = self._get_labels_data(db_ids)
+        used_db_ids = get_db_ids_with_operation(db_ids)
 
         data = {}
 
-        for mapping, source_db, bms_server, config in query:
+        for mapping, source_db, bms_server, is_configured in rows:
             if mapping.db_id not in data:
-                data[mapping.db_id] = cls._add_main_data(
-                    mapping, source_db, config
+                data[mapping.db_id] = self._add_main_data(
+                    mapping,
+                    source_db,
+                    is_configured,
+                    labels=labels.get(source_db.id, []),
+                    editable=source_db.id not in used_db_ids
                 )
 
-                for label in source_db.labels:
-                    data[mapping.db_id]['labels'].append(
-                        cls._add_label_data(label)
-                    )
-
             data[mapping.db_id]['bms'].append(
-                cls._add_bms_data(bms_server)
+                self._add_bms_data(bms_server)
             )
 
         return list(data.values())
 
-    @staticmethod
-    def _generate_query(project_id, db_id):
-        query = (
-            db.session.query(Mapping, SourceDB, BMSServer, Config)
-            .join(BMSServer)
-            .join(SourceDB)
-            .outerjoin(Config)  # might not exists at some point
-            .order_by(Mapping.rac_node)
+    def _get_page_rows(self):
+        rows = self._generate_query().all()
+
+        if self.limit:
+            db_ids = list(dict.fromkeys(x[1].id for x in rows))
+            if len(db_ids) > self.limit:
+                self.next_cursor = db_ids[self.limit - 1]
+                rows = [x for x in rows if x[1].id <= self.next_cursor]
+
+        return rows
+
+    def _generate_query(self):
+        return (
+            db.session.query(Mapping, SourceDB, BMSServer, Config.is_configured)
+            .join(BMSServer, Mapping.bms_id == BMSServer.id)
+            .join(SourceDB, Mapping.db_id == SourceDB.id)
+            # might not exists at some point
+            .outerjoin(Config, Config.db_id == SourceDB.id)
+            .filter(SourceDB.id.in_(self._get_db_ids_query()))
+            .order_by(SourceDB.id, Mapping.rac_node, Mapping.id)
         )
 
-        if project_id:
-            query = query.filter(SourceDB.project_id == project_id)
+    def _get_db_ids_query(self):
+        """Return query of ids of the requested mapped dbs."""
+        query = db.session.query(Mapping.db_id)
+
+        if self.project_id:
+            query = query.join(SourceDB, Mapping.db_id == SourceDB.id) \
+                .filter(SourceDB.project_id == self.project_id)
 
-        if db_id:
-            query = query.filter(Mapping.db_id == db_id)
+        if self.db_id:
+            query = query.filter(Mapping.db_id == self.db_id)
 
-        return query.all()
+        if self.db_ids is not None:
+            query = query.filter(Mapping.db_id.in_(self.db_ids))
+
+        if self.label_ids:
+            labeled_db_ids = db.session.query(source_db_to_label.c.db_id) \
+                .filter(source_db_to_label.c.label_id.in_(self.label_ids))
+            query = query.filter(Mapping.db_id.in_(labeled_db_ids))
+
+        if self.after:
+            query = query.filter(Mapping.db_id > self.after)
+
+        query = query.distinct().order_by(Mapping.db_id)
+
+        if self.limit:
+            # one extra db shows if there is a next page
+            query = query.limit(self.limit + 1)
+
+        return query
+
+    @staticmethod
+    def _get_labels_data(db_ids):
+        """Return {db_id: [label_data, ...]} of all dbs at once."""
+        labels = defaultdict(list)
+        if not db_ids:
+            return labels
+
+        qs = db.session.query(source_db_to_label.c.db_id, Label.id, Label.name) \
+            .join(Label, Label.id == source_db_to_label.c.label_id) \
+            .filter(source_db_to_label.c.db_id.in_(db_ids)) \
+            .order_by(Label.id)
+
+        for db_id, label_id, label_name in qs:
+            labels[db_id].append({
+                'id': label_id,
+                'name': label_name
+            })
+
+        return labels
 
     @classmethod
-    def _add_main_data(cls, mapping, source_db, config):
+    def _add_main_data(cls, mapping, source_db, is_configured, labels, editable):
         return {
             'id': mapping.id,
             'db_id': mapping.db_id,
@@ -112,10 +199,10 @@ class GetMappingsService:
             'db_type': source_db.db_type.value,
             'is_rac': source_db.db_type == SourceDBType.RAC,
             'fe_rac_nodes': source_db.fe_rac_nodes,
-            'is_configured': config.is_configured if config else False,
+            'is_configured': bool(is_configured),
             'is_deployed': cls._check_if_deployed(source_db),
-            'labels': [],
-            'editable': not does_db_have_operation(source_db.id),
+            'labels': labels,
+            'editable': editable,
         }
 
     @staticmethod
@@ -130,13 +217,6 @@ class GetMappingsService:
             # 'rac_node': mapping.rac_node,
         }
 
-    @staticmethod
-    def _add_label_data(label):
-        return {
-                'id': label.id,
-                'name': label.name
-        }
-
 
 class AddMappingService:
     @classmethod
@@ -145,6 +225,7 @@ class AddMappingService:
 
         source_db = SourceDB.query.get_or_404(db_id)
 
+        prev_wave_id = source_db.wave_id
         source_db.wave_id = wave_id
         db.session.add(source_db)
 
@@ -161,6 +242,11 @@ class AddMappingService:
             ))
 
         db.session.add_all(mappings)
+        refresh_waves_rollup([prev_wave_id, wave_id])
+        bump_change_version(
+            wave_ids=[prev_wave_id, wave_id],
+            project_ids=[source_db.project_id]
+        )
         db.session.commit()
 
         return mappings
@@ -173,12 +259,126 @@ class AddMappingService:
             validate_bms(bms_id)
 
 
+class BulkAddMappingService:
+    """Map many dbs at once within one transaction.
+
+    All items are validated by a few IN-queries before anything is saved,
+    errors are returned per item index.
+    """
+
+    @classmethod
+    def run(cls, items):
+        source_dbs = cls._validate(items)
+
+        prev_wave_ids = set()
+        rows = []
+
+        for item in items:
+            source_db = source_dbs[item['db_id']]
+            prev_wave_ids.add(source_db.wave_id)
+
+            source_db.wave_id = item.get('wave_id')
+            if item.get('fe_rac_nodes') is not None:
+                source_db.fe_rac_nodes = item['fe_rac_nodes']
+
+            for index, bms_id in enumerate(item['bms_id'], 1):
+                rows.append({
+                    'db_id': source_db.id,
+                    'bms_id': bms_id,
+                    'rac_node': index if source_db.is_rac else None,
+                })
+
+        db.session.add_all(source_dbs.values())
+        db.session.bulk_insert_mappings(Mapping, rows)
+
+        wave_ids = prev_wave_ids | {x.get('wave_id') for x in items}
+        refresh_waves_rollup(wave_ids)
+        bump_change_version(
+            wave_ids=wave_ids,
+            project_ids=[x.project_id for x in source_dbs.values()]
+        )
+        db.session.commit()
+
+        return list(source_dbs)  # mapped db ids
+
+    @classmethod
+    def _validate(cls, items):
+        """Validate all items and return {db_id: source_db}."""
+        db_ids = {x['db_id'] for x in items}
+        bms_ids = {y for x in items for y in x['bms_id']}
+        wave_ids = {x['wave_id'] for x in items if x.get('wave_id')}
+
+        source_dbs = {
+            x.id: x
+            for x in db.session.query(SourceDB).filter(SourceDB.id.in_(db_ids))
+        }
+        mapped_db_ids = cls._get_existing_values(Mapping.db_id, db_ids)
+        existing_bms_ids = cls._get_existing_values(BMSServer.id, bms_ids)
+        mapped_bms_ids = cls._get_existing_values(Mapping.bms_id, bms_ids)
+        existing_wave_ids = cls._get_existing_values(Wave.id, wave_ids)
+
+        # number of items of the batch using db/bms
+        db_usage = Counter(x['db_id'] for x in items)
+        bms_usage = Counter(y for x in items for y in set(x['bms_id']))
+
+        errors = {}
+
+        for ind, item in enumerate(items):
+            item_errors = defaultdict(list)
+            db_id = item['db_id']
+            source_db = source_dbs.get(db_id)
+
+            if not source_db:
+                item_errors['db_id'].append('no such database')
+            elif db_id in mapped_db_ids:
+                item_errors['db_id'].append('database already has mapping')
+            elif len(item['bms_id']) > 1 and not source_db.is_rac:
+                item_errors['bms_id'].append(
+                    'only RAC database can be mapped to multiple bms targets'
+                )
+            if db_usage[db_id] > 1:
+                item_errors['db_id'].append('database is mapped several times')
+
+            for bms_id in item['bms_id']:
+                if bms_id not in existing_bms_ids:
+                    item_errors['bms_id'].append(f'no such bms server: {bms_id}')
+                elif bms_id in mapped_bms_ids:
+                    item_errors['bms_id'].append(f'server already has mapping: {bms_id}')
+                elif bms_usage[bms_id] > 1:
+                    item_errors['bms_id'].append(
+                        f'server is mapped to several databases: {bms_id}'
+                    )
+            if len(set(item['bms_id'])) != len(item['bms_id']):
+                item_errors['bms_id'].append('duplicated bms servers')
+
+            if item.get('wave_id') and item['wave_id'] not in existing_wave_ids:
+                item_errors['wave_id'].append('no such wave')
+
+            if item_errors:
+                errors[ind] = dict(item_errors)
+
+        if errors:
+            raise ValidationError({'mappings': errors})
+
+        return source_dbs
+
+    @staticmethod
+    def _get_existing_values(column, values):
+        """Return subset of values present in the column."""
+        if not values:
+            return set()
+
+        qs = db.session.query(column).filter(column.in_(values)).distinct()
+        return {x[0] for x in qs}
+
+
 class EditMappingService:
     @classmethod
     def run(cls, db_id, new_bms_ids, wave_id, fe_rac_nodes):
         cls._validate(wave_id, new_bms_ids, db_id)
 
         source_db = SourceDB.query.get_or_404(db_id)
+        prev_wave_id = source_db.wave_id
 
         if fe_rac_nodes is not None:
             source_db.fe_rac_nodes = fe_rac_nodes
@@ -190,6 +390,12 @@ class EditMappingService:
 
         cls._re_create_mappings(source_db, new_bms_ids)
 
+        refresh_waves_rollup([prev_wave_id, source_db.wave_id])
+        bump_change_version(
+            wave_ids=[prev_wave_id, source_db.wave_id],
+            project_ids=[source_db.project_id]
+        )
+
         db.session.commit()
 
     @classmethod
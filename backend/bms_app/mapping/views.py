@@ -13,13 +13,16 @@
 # limitations under the License.
 
 from flask import request
-from marshmallow import Schema, ValidationError, fields
+from marshmallow import EXCLUDE, Schema, ValidationError, fields, validate
 
 from bms_app.mapping import bp
 from bms_app.mapping.services import (
-    AddMappingService, EditMappingService, GetMappingsService
+    AddMappingService, BulkAddMappingService, EditMappingService,
+    GetMappingsService
 )
 from bms_app.models import Mapping, OperationDetails, SourceDB, db
+from bms_app.services.change_version import bump_source_dbs_change_version
+from bms_app.services.placement import propose_placement
 from bms_app.services.source_db import (
     clear_bms_target_params, does_db_have_operation
 )
@@ -28,6 +31,9 @@ from bms_app.services.source_db import (
 MAPPING_IS_USED = 'Mapping is already involved in some operation' \
                   ' and can not be changed'
 
+MAX_MAPPINGS_LIMIT = 500
+MAX_BULK_MAPPINGS = 1000
+
 
 class EditMappingSchema(Schema):
     db_id = fields.Int(required=True)
@@ -43,19 +49,57 @@ class CreateMappingSchema(Schema):
     fe_rac_nodes = fields.Int()
 
 
+class BulkMappingItemSchema(CreateMappingSchema):
+    bms_id = fields.List(
+        fields.Int(),
+        required=True,
+        validate=validate.Length(min=1)
+    )
+
+
+class BulkCreateMappingSchema(Schema):
+    mappings = fields.List(
+        fields.Nested(BulkMappingItemSchema),
+        required=True,
+        validate=validate.Length(min=1, max=MAX_BULK_MAPPINGS)
+    )
+
+
+class PlacementArgsSchema(Schema):
+    class Meta:
+        unknown = EXCLUDE
+
+    project_id = fields.Int(required=True)
+
+
+class ListMappingsArgsSchema(Schema):
+    class Meta:
+        unknown = EXCLUDE
+
+    project_id = fields.Int()
+    db_id = fields.Int()
+    after = fields.Int(validate=validate.Range(min=1))
+    limit = fields.Int(validate=validate.Range(min=1, max=MAX_MAPPINGS_LIMIT))
+
+
 @bp.route('', methods=['GET'])
 def list_mappings():
-    """Return all available mappings."""
-    # get all within current project
-    project_id = request.args.get('project_id', type=int)
-    # get for specific db
-    db_id = request.args.get('db_id', type=int)
+    """Return all available mappings.
 
-    response = GetMappingsService.run(
-        project_id=project_id,
-        db_id=db_id
-    )
-    return {'data': response}
+    Mappings can be filtered by project_id, db_id and labels
+    (label_id=1&label_id=2 returns dbs having any of them)
+    and paginated by db: limit=50&after=<next_cursor>
+    """
+    filters = ListMappingsArgsSchema().load(request.args)
+    label_ids = request.args.getlist('label_id', type=int)
+
+    service = GetMappingsService(label_ids=label_ids, **filters)
+    response = {'data': service.get_data()}
+
+    if service.is_paginated:
+        response['next_cursor'] = service.next_cursor
+
+    return response
 
 
 @bp.route('', methods=['POST'])
@@ -75,6 +119,36 @@ def add_mapping():
     return {'data': data}, 201
 
 
+@bp.route('/bulk', methods=['POST'])
+def bulk_add_mappings():
+    """Add mappings of many dbs in one transaction.
+
+    Nothing is saved if any of the items is invalid,
+    errors are returned by item index: {"mappings": {"0": {...}}}
+    """
+    validated_data = BulkCreateMappingSchema().load(request.json)
+    db_ids = BulkAddMappingService.run(validated_data['mappings'])
+
+    return {'data': GetMappingsService(db_ids=db_ids).get_data()}, 201
+
+
+@bp.route('/placement', methods=['GET'])
+def get_placement():
+    """Propose targets for not mapped dbs of the project.
+
+    Proposed mappings are not saved, they can be posted to /bulk.
+    """
+    validated_data = PlacementArgsSchema().load(request.args)
+    placement = propose_placement(validated_data['project_id'])
+
+    return {
+        'data': {
+            'mappings': placement.mappings,
+            'unplaced': placement.unplaced,
+        }
+    }
+
+
 # @bp.route('/<int:db_id>', methods=['GET'])
 # def get_mapping(mapping_id):
 #     """Return mapping."""
@@ -135,6 +209,8 @@ def delete_mapping():
 
         db.session.query(Mapping).filter(Mapping.db_id == db_id).delete()
 
+        bump_source_dbs_change_version([source_db])
+
         db.session.commit()
 
     return {}, 204
@@ -39,6 +39,7 @@ class Project(db.Model):
     vpc = db.Column(db.String, nullable=False)
     subnet = db.Column(db.String, nullable=False)
     description = db.Column(db.String, nullable=False)
+    change_version = db.Column(db.Integer, nullable=False, server_default='0', default=0)
 
     waves = relationship('Wave', back_populates='project')
     source_dbs = relationship('SourceDB', back_populates='project')
@@ -166,6 +167,7 @@ class Wave(db.Model):
     name = db.Column(db.String, nullable=False)
     project_id = db.Column(db.Integer, db.ForeignKey('projects.id'), nullable=False)
     is_running = db.Column(db.Boolean, default=False)
+    change_version = db.Column(db.Integer, nullable=False, server_default='0', default=0)
 
     project = relationship(Project, back_populates='waves', uselist=False)
     operations = relationship('Operation', back_populates='wave')
@@ -173,6 +175,36 @@ class Wave(db.Model):
     operation_details = relationship('OperationDetails', back_populates='wave')
 
 
+class WaveRollup(db.Model):
+    """Precalculated wave data to list waves without per-wave queries."""
+    __tablename__ = 'wave_rollups'
+
+    wave_id = db.Column(db.Integer, db.ForeignKey('waves.id'), primary_key=True)
+    undeployed_dbs = db.Column(db.Integer, nullable=False, default=0)
+    deployed_dbs = db.Column(db.Integer, nullable=False, default=0)
+    failed_dbs = db.Column(db.Integer, nullable=False, default=0)
+    curr_step = db.Column(db.Integer, nullable=False, default=0)
+    total_steps = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
+
+    wave = relationship(Wave, uselist=False)
+
+    @property
+    def status_rate(self):
+        return {
+            'undeployed': self.undeployed_dbs,
+            'deployed': self.deployed_dbs,
+            'failed': self.failed_dbs,
+        }
+
+    @property
+    def step_data(self):
+        return {
+            'curr_step': self.curr_step,
+            'total_steps': self.total_steps,
+        }
+
+
 class Mapping(db.Model):
     __tablename__ = 'mappings'
     __table_args__ = (db.UniqueConstraint('db_id', 'bms_id'), )
@@ -215,6 +247,11 @@ class Operation(db.Model):
     status = db.Column(ChoiceType(OperationStatus, impl=db.String(20)))
     started_at = db.Column(db.DateTime, default=now)
     completed_at = db.Column(db.DateTime)
+    control_node_started_at = db.Column(db.DateTime)
+    first_step_at = db.Column(db.DateTime)  # 1-st step reported by control node
+    # number of control nodes running the operation
+    shards = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    finished_shards = db.Column(db.JSON)  # indexes of terminated control nodes
 
     wave = relationship('Wave', back_populates='operations', uselist=False)
     operation_details = relationship('OperationDetails', back_populates='operation')
@@ -227,6 +264,13 @@ class Operation(db.Model):
     def is_rollback(self):
         return self.operation_type == OperationType.ROLLBACK
 
+    @property
+    def boot_duration(self):
+        """Seconds from the control node launch till its 1-st step."""
+        if self.control_node_started_at and self.first_step_at:
+            return (self.first_step_at - self.control_node_started_at).total_seconds()
+        return None
+
 
 class OperationDetails(db.Model):
     __tablename__ = 'operation_details'
@@ -256,12 +300,46 @@ class OperationDetails(db.Model):
         return self.operation_type == OperationType.ROLLBACK
 
 
+class RacNodesCounter(db.Model):
+    """Aggregated statuses of RAC nodes of the db within the operation."""
+    __tablename__ = 'rac_nodes_counters'
+    __table_args__ = (db.UniqueConstraint('operation_id', 'db_id'), )
+
+    id = db.Column(db.Integer, primary_key=True)
+    operation_id = db.Column(db.Integer, db.ForeignKey('operations.id'), nullable=False)
+    db_id = db.Column(db.Integer, db.ForeignKey('source_dbs.id'), nullable=False)
+    total_nodes = db.Column(db.Integer, nullable=False, default=0)
+    finished_nodes = db.Column(db.Integer, nullable=False, default=0)
+    complete_nodes = db.Column(db.Integer, nullable=False, default=0)
+    failed_nodes = db.Column(db.Integer, nullable=False, default=0)
+
+    @hybrid_property
+    def all_finished(self):
+        return self.finished_nodes >= self.total_nodes
+
+    @hybrid_property
+    def all_complete(self):
+        return self.complete_nodes >= self.total_nodes
+
+    def apply_status_change(self, prev_status, new_status):
+        """Move one node from prev_status to new_status."""
+        for status, delta in ((prev_status, -1), (new_status, 1)):
+            if status in FINISHED_OPERATION_STATUSES:
+                self.finished_nodes += delta
+
+            if status == OperationStatus.COMPLETE:
+                self.complete_nodes += delta
+            elif status == OperationStatus.FAILED:
+                self.failed_nodes += delta
+
+
 class OperationDetailsError(db.Model):
     __tablename__ = 'operation_details_errors'
 
     id = db.Column(db.Integer, primary_key=True)
     operation_details_id = db.Column(db.Integer, db.ForeignKey('operation_details.id'), nullable=False)
     message = db.Column(db.String(255), nullable=False)
+    details = db.Column(db.Text)  # e.g. output of the failed rman command
 
     operation_details = relationship('OperationDetails', back_populates='errors', uselist=False)
 
@@ -325,6 +403,84 @@ class Label(db.Model):
     source_dbs = relationship('SourceDB', secondary=source_db_to_label, back_populates='labels', cascade='save-update, merge')
 
 
+class ImportJobType(Enum):
+    MIGVISOR = 'MIGVISOR'
+    TARGETS = 'TARGETS'
+
+
+class ImportJobStatus(Enum):
+    PENDING = 'PENDING'
+    IN_PROGRESS = 'IN_PROGRESS'
+    COMPLETE = 'COMPLETE'
+    FAILED = 'FAILED'
+
+
+ACTIVE_IMPORT_JOB_STATUSES = (ImportJobStatus.PENDING, ImportJobStatus.IN_PROGRESS)
+
+
+class ImportJob(db.Model):
+    """Uploaded file processed in background."""
+    __tablename__ = 'import_jobs'
+    __table_args__ = (
+        # only one active job of the same file
+        db.Index(
+            'ix_import_jobs_active_idempotency_key',
+            'idempotency_key',
+            unique=True,
+            postgresql_where=db.text("status IN ('PENDING', 'IN_PROGRESS')"),
+            sqlite_where=db.text("status IN ('PENDING', 'IN_PROGRESS')")
+        ),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    job_type = db.Column(ChoiceType(ImportJobType, impl=db.String(20)), nullable=False)
+    status = db.Column(ChoiceType(ImportJobStatus, impl=db.String(20)), default=ImportJobStatus.PENDING)
+    # hash of the file content and job parameters
+    idempotency_key = db.Column(db.String(64), nullable=False, index=True)
+    project_id = db.Column(db.Integer, db.ForeignKey('projects.id'), nullable=True)
+    overwrite = db.Column(db.Boolean, default=False)
+    total = db.Column(db.Integer)
+    processed = db.Column(db.Integer, default=0)
+    result = db.Column(db.JSON)
+    error = db.Column(db.String)
+    created_at = db.Column(db.DateTime, default=now)
+    started_at = db.Column(db.DateTime)
+    completed_at = db.Column(db.DateTime)
+    # time of the last progress
+    updated_at = db.Column(db.DateTime, default=now, onupdate=now)
+
+    @hybrid_property
+    def is_finished(self):
+        return self.status in (ImportJobStatus.COMPLETE, ImportJobStatus.FAILED)
+
+
+class ControlNodeStatus(Enum):
+    PENDING = 'PENDING'  # instance is not created yet
+    BOOTING = 'BOOTING'  # waiting for the 1-st heartbeat
+    IDLE = 'IDLE'  # waiting for the next operation
+    LEASED = 'LEASED'
+
+
+class ControlNode(db.Model):
+    """Reusable control node of the warm pool."""
+    __tablename__ = 'control_nodes'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String, unique=True, nullable=False)
+    project_id = db.Column(db.Integer, db.ForeignKey('projects.id'), nullable=False)
+    subnet = db.Column(db.String, nullable=False)
+    zone = db.Column(db.String)
+    status = db.Column(ChoiceType(ControlNodeStatus, impl=db.String(20)), nullable=False)
+    operation_id = db.Column(db.Integer, db.ForeignKey('operations.id'), nullable=True)
+    lease_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=now)
+    leased_at = db.Column(db.DateTime)
+    idle_since = db.Column(db.DateTime, default=now)
+    heartbeat_at = db.Column(db.DateTime)
+
+    project = relationship(Project)
+
+
 # statuses that mean that operation is alredy finished
 FINISHED_OPERATION_STATUSES = (
     OperationStatus.COMPLETE,
@@ -12,12 +12,16 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from flask import jsonify, request
+from flask import Response, jsonify, request, stream_with_context
 from sqlalchemy import func
 from sqlalchemy.orm import joinedload
 
+from bms_app import settings
 from bms_app.models import Operation, OperationDetails, OperationType, Wave, db
 from bms_app.operation import bp
+from bms_app.services.operation_events import (
+    get_streams_limiter, stream_operation_events
+)
 from bms_app.services.operations.restore import (
     FailOverOperation, PreRestoreOperation, RestoreOperation,
     RollbackRestoreOperation
@@ -111,6 +115,38 @@ def fail_over_restore():
     return {}, 201
 
 
+@bp.route('/<int:operation_id>/events', methods=['GET'])
+def get_operation_events(operation_id):
+    """Stream operation progress as server-sent events.
+
+    Current state of the operation is sent first,
+    then every committed step/status change until it is finished
+    or the stream lifetime is over and the client has to reconnect.
+    Every stream holds a thread, so their number is limited
+    and 503 is returned when all of them are in use.
+    """
+    Operation.query.get_or_404(operation_id)
+
+    limiter = get_streams_limiter()
+    if not limiter.acquire():
+        return {'errors': 'too many open event streams'}, 503, {
+            'Retry-After': str(settings.OPERATION_EVENTS_RETRY // 1000 or 1)
+        }
+
+    response = Response(
+        stream_with_context(stream_operation_events(operation_id)),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no',
+        }
+    )
+    # released even if the stream is closed before it is started
+    response.call_on_close(limiter.release)
+
+    return response
+
+
 @bp.route('/<int:operation_id>/errors', methods=['GET'])
 def get_operation_errors(operation_id):
     """Return Pre-restore operation errors."""
@@ -127,7 +163,10 @@ def get_operation_errors(operation_id):
     rman_parser = RmanLogFileParser(operaion_details.operation_id)
 
     for err in operaion_details.errors:
-        if err.message.startswith('rman '):
+        if err.details is not None:
+            details = err.details
+        elif err.message.startswith('rman '):
+            # errors saved before outputs of commands have been stored
             details = rman_parser.get_cmd_output(err.message)
         else:
             details = ''
@@ -12,12 +12,21 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import logging
+
 from marshmallow import ValidationError
 
+from bms_app import settings
 from bms_app.models import (
-    Config, Label, Mapping, Operation, OperationDetails, OperationDetailsError,
-    Project, RestoreConfig, ScheduledTask, SourceDB, Wave, db
+    Config, ControlNode, ImportJob, Label, Mapping, Operation,
+    OperationDetails, OperationDetailsError, Project, RacNodesCounter,
+    RestoreConfig, ScheduledTask, SourceDB, Wave, WaveRollup, db,
+    source_db_to_label
 )
+from bms_app.services.control_node_pool import delete_nodes
+
+
+logger = logging.getLogger(__name__)
 
 
 def validate_name_is_unique(name, exclude_project_id=None):
@@ -31,9 +40,21 @@ def validate_name_is_unique(name, exclude_project_id=None):
 
 
 class DeleteProjectService:
-    def __init__(self, project_id, force):
+    """Delete project with all related data.
+
+    Every table is cleared by one DELETE ... WHERE ... IN (subquery)
+    in the order of dependencies, no objects are loaded to the session.
+    With PROJECT_DELETE_CHUNK_SIZE rows are deleted and committed
+    by chunks to not hold locks of big tables for long,
+    operations are chunked together with their details,
+    an interrupted delete can be repeated.
+    """
+
+    def __init__(self, project_id, force, chunk_size=None):
         self.project_id = project_id
         self.force = force
+        self.chunk_size = settings.PROJECT_DELETE_CHUNK_SIZE \
+            if chunk_size is None else chunk_size
 
     def can_be_deleted(self):
         """Return whether project can be deleted.
@@ -57,96 +78,159 @@ class DeleteProjectService:
         return True
 
     def delete(self):
-        waves = db.session.query(Wave) \
-            .filter(Wave.project_id == self.project_id) \
-            .all()
-
-        self._delete_waves_related(waves)
-        self._delete_mappings()
-        self._delete_source_dbs_related()
-        self._delete_objects(waves)
-        self._delete_labels()
-
-        self._delete_project()
+        """Delete project data and return number of deleted rows by table."""
+        wave_ids = db.session.query(Wave.id) \
+            .filter(Wave.project_id == self.project_id)
+        db_ids = db.session.query(SourceDB.id) \
+            .filter(SourceDB.project_id == self.project_id)
+        mapping_ids = db.session.query(Mapping.id) \
+            .filter(Mapping.db_id.in_(db_ids))
+        label_ids = db.session.query(Label.id) \
+            .filter(Label.project_id == self.project_id)
+
+        counts = {}
+
+        # pool nodes refer to operations, delete them first
+        counts['control_nodes'] = self._delete_control_nodes()
+
+        counts.update(self._delete_operations(wave_ids, mapping_ids))
+
+        for model, condition in (
+            (RacNodesCounter, RacNodesCounter.db_id.in_(db_ids)),
+            (WaveRollup, WaveRollup.wave_id.in_(wave_ids)),
+            (Mapping, Mapping.db_id.in_(db_ids)),
+            (Config, Config.db_id.in_(db_ids)),
+            (RestoreConfig, RestoreConfig.db_id.in_(db_ids)),
+            (ScheduledTask, ScheduledTask.db_id.in_(db_ids)),
+        ):
+            # counters of operations are counted by _delete_operations
+            counts[model.__tablename__] = \
+                counts.get(model.__tablename__, 0) + self._delete_rows(model, condition)
+
+        counts[source_db_to_label.name] = self._delete_table_rows(
+            source_db_to_label,
+            source_db_to_label.c.db_id.in_(db_ids)
+            | source_db_to_label.c.label_id.in_(label_ids)
+        )
+
+        for model, condition in (
+            (SourceDB, SourceDB.project_id == self.project_id),
+            (Wave, Wave.project_id == self.project_id),
+            (Label, Label.project_id == self.project_id),
+            (ImportJob, ImportJob.project_id == self.project_id),
+        ):
+            counts[model.__tablename__] = self._delete_rows(model, condition)
+
+        # deleted project is detached from the session like by session.delete
+        counts[Project.__tablename__] = db.session.query(Project) \
+            .filter(Project.id == self.project_id) \
+            .delete(synchronize_session='fetch')
 
         db.session.commit()
 
-    def _delete_waves_related(self, waves):
-        self._delete_operation_details(waves)
-        self._delete_operations(waves)
+        logger.info('project %s is deleted: %s', self.project_id, counts)
 
-    def _delete_source_dbs_related(self):
-        source_dbs = db.session.query(SourceDB) \
-            .filter(SourceDB.project_id == self.project_id) \
-            .all()
-        self._delete_config(source_dbs)
-        self._delete_restore_configs(source_dbs)
-        self._delete_scheduled_tasks(source_dbs)
-        self._delete_objects(source_dbs)
-
-    def _delete_operation_details(self, waves):
-        for wave in waves:
-            op_details_items = db.session.query(OperationDetails) \
-                .filter(OperationDetails.wave_id == wave.id) \
-                .all()
-            self._delete_operation_details_error(op_details_items)
-            self._delete_objects(op_details_items)
-
-    def _delete_operation_details_error(self, op_details_items):
-        for op_details_item in op_details_items:
-            op_details_errors = db.session.query(OperationDetailsError) \
-                .filter(OperationDetailsError.operation_details_id == op_details_item.id) \
-                .all()
-            self._delete_objects(op_details_errors)
-
-    def _delete_operations(self, waves):
-        for wave in waves:
-            operations = db.session.query(Operation) \
-                .filter(Operation.wave_id == wave.id) \
-                .all()
-            self._delete_objects(operations)
-
-    def _delete_config(self, source_dbs):
-        for source_db in source_dbs:
-            configs = db.session.query(Config) \
-                .filter(Config.db_id == source_db.id) \
-                .all()
-            self._delete_objects(configs)
-
-    def _delete_restore_configs(self, source_dbs):
-        for source_db in source_dbs:
-            restore_configs = db.session.query(RestoreConfig) \
-                .filter(RestoreConfig.db_id == source_db.id) \
-                .all()
-            self._delete_objects(restore_configs)
-
-    def _delete_scheduled_tasks(self, source_dbs):
-        for source_db in source_dbs:
-            scheduled_tasks = db.session.query(ScheduledTask) \
-                .filter(ScheduledTask.db_id == source_db.id) \
-                .all()
-            self._delete_objects(scheduled_tasks)
-
-    def _delete_labels(self):
-        labels = db.session.query(Label) \
-            .filter(Label.project_id == self.project_id) \
-            .all()
-        self._delete_objects(labels)
+        return counts
 
-    def _delete_mappings(self):
-        mappings = db.session.query(Mapping) \
-            .join(SourceDB) \
-            .filter(SourceDB.project_id == self.project_id) \
-            .all()
-        self._delete_objects(mappings)
+    def _delete_operations(self, wave_ids, mapping_ids):
+        """Delete operations of the project with all their rows.
 
-    def _delete_project(self):
-        project = db.session.query(Project) \
-            .filter(Project.id == self.project_id) \
+        Restore operations are not bound to the wave and are found
+        by their details only, so every operation is deleted
+        in the same transaction as its details to not leave
+        orphaned operations if the delete is interrupted.
+        """
+        counts = {
+            OperationDetailsError.__tablename__: 0,
+            OperationDetails.__tablename__: 0,
+            RacNodesCounter.__tablename__: 0,
+            Operation.__tablename__: 0,
+        }
+
+        if not self.chunk_size:
+            # operations of the waves are deleted by the subquery itself,
+            # only ids of the remaining operations (not bound to a wave)
+            # are loaded as they are lost with their details
+            self._delete_operation_rows(
+                db.session.query(Operation.id).filter(Operation.wave_id.in_(wave_ids)),
+                counts
+            )
+            operation_ids = self._get_operation_ids(wave_ids, mapping_ids)
+            if operation_ids:
+                self._delete_operation_rows(operation_ids, counts)
+            return counts
+
+        while True:
+            operation_ids = self._get_operation_ids(wave_ids, mapping_ids)
+            if not operation_ids:
+                return counts
+
+            self._delete_operation_rows(operation_ids, counts)
+            db.session.commit()
+
+    @staticmethod
+    def _delete_operation_rows(operation_ids, counts):
+        """Delete operations with their rows, operation_ids may be a subquery."""
+        op_details_ids = db.session.query(OperationDetails.id) \
+            .filter(OperationDetails.operation_id.in_(operation_ids))
+
+        for model, condition in (
+            (OperationDetailsError,
+             OperationDetailsError.operation_details_id.in_(op_details_ids)),
+            (OperationDetails, OperationDetails.id.in_(op_details_ids)),
+            (RacNodesCounter, RacNodesCounter.operation_id.in_(operation_ids)),
+            (Operation, Operation.id.in_(operation_ids)),
+        ):
+            counts[model.__tablename__] += db.session.query(model) \
+                .filter(condition) \
+                .delete(synchronize_session=False)
+
+    def _get_operation_ids(self, wave_ids, mapping_ids):
+        """Return ids of operations of the project, a chunk if it is set."""
+        qs = db.session.query(Operation.id) \
+            .filter(Operation.wave_id.in_(wave_ids)
+                    | Operation.id.in_(
+                        db.session.query(OperationDetails.operation_id)
+                        .filter(OperationDetails.mapping_id.in_(mapping_ids))
+                    )) \
+            .order_by(Operation.id)
+
+        if self.chunk_size:
+            qs = qs.limit(self.chunk_size)
+
+        return [x[0] for x in qs]
+
+    def _delete_control_nodes(self):
+        """Delete pool control nodes with their GCE instances."""
+        control_nodes = db.session.query(ControlNode) \
+            .filter(ControlNode.project_id == self.project_id) \
             .all()
-        self._delete_objects(project)
+        delete_nodes(control_nodes)
+        db.session.flush()
+        return len(control_nodes)
+
+    def _delete_rows(self, model, condition):
+        """Delete rows of the model matching condition, return their count."""
+        if not self.chunk_size:
+            return db.session.query(model) \
+                .filter(condition) \
+                .delete(synchronize_session=False)
+
+        primary_key = model.__mapper__.primary_key[0]
+        count = 0
+        while True:
+            ids = [
+                x[0] for x in
+                db.session.query(primary_key).filter(condition).limit(self.chunk_size)
+            ]
+            if not ids:
+                return count
+
+            count += db.session.query(model) \
+                .filter(primary_key.in_(ids)) \
+                .delete(synchronize_session=False)
+            db.session.commit()
 
     @staticmethod
-    def _delete_objects(items):
-        for item in items:
-            db.session.delete(item)
+    def _delete_table_rows(table, condition):
+        return db.session.execute(table.delete().where(condition)).rowcount
@@ -25,6 +25,7 @@ from bms_app.models import (
     Mapping, Operation, OperationDetails, RestoreConfig, SourceDB, db
 )
 from bms_app.pre_restore_validations import PRE_RESTORE_VALIDATIONS
+from bms_app.services.change_version import bump_source_dbs_change_version
 from bms_app.services.gcs import (
     delete_blob, upload_blob, upload_blob_from_string
 )
@@ -329,6 +330,7 @@ class CreateOrUpdateRestoreConfig:
             cls._delete_pfile(restore_config)
 
         db.session.add(restore_config)
+        bump_source_dbs_change_version([source_db])
         db.session.commit()
 
     @staticmethod
@@ -16,11 +16,17 @@ from flask import request
 
 from bms_app.restore import bp
 from bms_app.restore.services import GetSourceDBAPIService
+from bms_app.services.change_version import (
+    conditional_response, get_project_etag
+)
 
 
 @bp.route('/source-dbs', methods=['GET'])
 def list_of_restore_operation():
     """Return the dbs list prepared to restore."""
-    return {'data': GetSourceDBAPIService.run(
-        project_id=request.args.get('project_id')
-    )}, 200
+    project_id = request.args.get('project_id')
+
+    return conditional_response(
+        get_project_etag(project_id),
+        lambda: {'data': GetSourceDBAPIService.run(project_id=project_id)}
+    )
@@ -23,6 +23,9 @@ from bms_app.scheduled_tasks.schema import (
 from bms_app.scheduled_tasks.services import (
     add_record_to_db, create_google_task, validate_source_db
 )
+from bms_app.services.change_version import (
+    bump_source_db_ids_change_version, bump_source_dbs_change_version
+)
 from bms_app.services.gcloud_tasks import delete_task
 from bms_app.services.operations.restore import RestoreOperation
 from bms_app.services.scheduled_tasks import (
@@ -37,6 +40,7 @@ def run(task_id):
     if not task.completed:
         task.completed = True
         db.session.add(task)
+        bump_source_dbs_change_version([task.source_db])
         db.session.commit()
 
         RestoreOperation().run(db_id=task.source_db.id)
@@ -59,6 +63,7 @@ def add_scheduled_task():
     google_task = create_google_task(scheduled_task)
 
     scheduled_task.g_task_name = google_task.name
+    bump_source_db_ids_change_version([validated_data['db_id']])
     db.session.commit()
 
     return {}, 201
@@ -116,6 +121,7 @@ def edit_scheduled_task(task_id):
     task.g_task_name = google_task.name
 
     db.session.add(task)
+    bump_source_dbs_change_version([task.source_db])
     db.session.commit()
 
     return ScheduledTaskOutputSchema().dump(task)
@@ -29,6 +29,7 @@ class WaveSchema(ma.SQLAlchemyAutoSchema):
     class Meta:
         model = Wave
         include_fk = True
+        exclude = ('change_version', )
 
     @validates('project_id')
     def validated_project_id_exists(self, value):
@@ -48,6 +49,7 @@ class AddWaveSchema(Schema):
 class ProjectSchema(ma.SQLAlchemyAutoSchema):
     class Meta:
         model = Project
+        exclude = ('change_version', )
 
 
 class OperationSchema(ma.SQLAlchemyAutoSchema):
@@ -57,6 +59,7 @@ class OperationSchema(ma.SQLAlchemyAutoSchema):
 
     operation_type = fields.Function(lambda obj: obj.operation_type.value)
     status = fields.Function(lambda obj: obj.status.value)
+    boot_duration = fields.Float(dump_only=True)
 
 
 class FileSchema(Schema):
@@ -11,27 +11,96 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-
+import io
 import json
 import os
+import tarfile
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 import yaml
+from flask import current_app
 
 from bms_app import settings
 from bms_app.services.gcs import upload_blob_from_string
 
 
 class FileUploadMixin:
+    """Collect generated files and upload them to GCS at once.
+
+    Files are uploaded by _upload_files() either by several threads
+    or as a single tar.gz archive (ANSIBLE_CONFIG_UPLOAD_MODE=archive)
+    which is unpacked by the control node and copied back to
+    the configs directory in GCS where the toolkit reads it from.
+    """
+
     gcs_config_dir = None
+    CONFIG_ARCHIVE_FILE = 'configs.tar.gz'
+
+    # name of the uploaded archive, None if files are uploaded separately
+    config_archive = None
+
+    def __init__(self):
+        self._files = {}  # file path -> content
+
+    def _add_yaml_file(self, data, file_name):
+        """Add file in yaml format to the upload."""
+        self._files[file_name] = yaml.safe_dump(data)
+
+    def _add_json_file(self, data, dir_name, file_name):
+        """Add file in json format to the upload."""
+        file_path = os.path.join(dir_name, file_name)
+        self._files[file_path] = json.dumps(data, indent=4)
+
+    def _upload_files(self):
+        """Upload all added files to GCS."""
+        files, self._files = self._files, {}
+
+        if settings.ANSIBLE_CONFIG_UPLOAD_MODE == 'archive':
+            self._upload_archive(files)
+        else:
+            self._upload_parallel(files)
+
+    def _upload_parallel(self, files):
+        items = [
+            (os.path.join(self.gcs_config_dir, file_path), content)
+            for file_path, content in files.items()
+        ]
+        workers = min(
+            current_app.config['ANSIBLE_CONFIG_UPLOAD_WORKERS'],
+            len(items)
+        )
+
+        if workers <= 1:
+            for gcs_key, content in items:
+                upload_blob_from_string(settings.GCS_BUCKET, gcs_key, content)
+            return
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(
+                    upload_blob_from_string,
+                    settings.GCS_BUCKET, gcs_key, content
+                )
+                for gcs_key, content in items
+            ]
+            # re-raise the first upload error
+            for future in futures:
+                future.result()
+
+    def _upload_archive(self, files):
+        buffer = io.BytesIO()
+        mtime = time.time()
+
+        with tarfile.open(fileobj=buffer, mode='w:gz') as archive:
+            for file_path, content in files.items():
+                data = content.encode()
+                info = tarfile.TarInfo(name=file_path)
+                info.size = len(data)
+                info.mtime = mtime
+                archive.addfile(info, io.BytesIO(data))
+
+        gcs_key = os.path.join(self.gcs_config_dir, self.CONFIG_ARCHIVE_FILE)
+        upload_blob_from_string(settings.GCS_BUCKET, gcs_key, buffer.getvalue())
 
-    def _upload_yaml(self, data, file_name):
-        """Upload file in yaml format to GCS."""
-        file_content = yaml.safe_dump(data)
-        gcs_key = os.path.join(self.gcs_config_dir, file_name)
-        upload_blob_from_string(settings.GCS_BUCKET, gcs_key, file_content)
-
-    def _upload_json(self, data, dir_name, file_name):
-        """Upload file in json format to GCS."""
-        file_content = json.dumps(data, indent=4)
-        gcs_key = os.path.join(self.gcs_config_dir, dir_name, file_name)
-        upload_blob_from_string(settings.GCS_BUCKET, gcs_key, file_content)
+        self.config_archive = self.CONFIG_ARCHIVE_FILE
@@ -35,6 +35,7 @@ class AnsibleBaseDataTransferConfigService(FileUploadMixin):
     INVENTORY_FILE = 'inventory'
 
     def __init__(self, db_mappings_object, gcs_config_dir):
+        super().__init__()
         self.db_mappings_object = db_mappings_object
         self.gcs_config_dir = gcs_config_dir or ''
 
@@ -26,6 +26,8 @@ class AnsibleConfigService(FileUploadMixin):
     - asm_config/asm_disk_config_{hostname} - ask disk config
     - data_mounts_config/data_mounts_config_{hostname} - data mounts config
 
+    All files are packed into configs.tar.gz in the archive upload mode.
+
     """
 
     INVENTORY_FILE = 'inventory'
@@ -34,6 +36,7 @@ class AnsibleConfigService(FileUploadMixin):
     DATA_MOUNTS_CONFIG_DIR = 'data_mounts_config'
 
     def __init__(self, db_mappings_objects, gcs_config_dir):
+        super().__init__()
         self.db_mappings_objects = db_mappings_objects
         self.gcs_config_dir = gcs_config_dir or ''
 
@@ -47,12 +50,14 @@ class AnsibleConfigService(FileUploadMixin):
         self._save_asm_configs(asm_configs)
         self._save_data_mounts_configs(data_mounts_configs)
 
+        self._upload_files()
+
     def _save_inventories(self, main_inventory_data, provision_inventory_data):
-        self._upload_yaml(
+        self._add_yaml_file(
             data=main_inventory_data,
             file_name=self.INVENTORY_FILE
         )
-        self._upload_yaml(
+        self._add_yaml_file(
             data=provision_inventory_data,
             file_name=self.INVENTORY_TMP_FILE
         )
@@ -60,7 +65,7 @@ class AnsibleConfigService(FileUploadMixin):
     def _save_asm_configs(self, asm_configs):
         for host_name, config_content in asm_configs.items():
             file_name = f'asm_disk_config_{host_name}.json'
-            self._upload_json(
+            self._add_json_file(
                 data=config_content,
                 dir_name=self.ASM_CONFIG_DIR,
                 file_name=file_name
@@ -69,7 +74,7 @@ class AnsibleConfigService(FileUploadMixin):
     def _save_data_mounts_configs(self, data_mounts_configs):
         for host_name, config_content in data_mounts_configs.items():
             file_name = f'data_mounts_config_{host_name}.json'
-            self._upload_json(
+            self._add_json_file(
                 data=config_content,
                 dir_name=self.DATA_MOUNTS_CONFIG_DIR,
                 file_name=file_name
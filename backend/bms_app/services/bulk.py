@@ -0,0 +1,61 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from collections import defaultdict
+
+from sqlalchemy.dialects import postgresql, sqlite
+
+from bms_app.models import db
+
+
+# max number of rows in one INSERT statement
+UPSERT_BATCH_SIZE = 500
+
+
+def get_insert_stmt(model):
+    """Return INSERT statement supporting ON CONFLICT for the current db."""
+    if db.engine.dialect.name == 'postgresql':
+        return postgresql.insert(model)
+
+    return sqlite.insert(model)
+
+
+def bulk_upsert(model, rows, index_elements):
+    """INSERT ... ON CONFLICT DO UPDATE rows in batches.
+
+    Only columns present in the row are updated on conflict.
+    Rows are grouped by their set of columns
+    because one multi-values INSERT requires the same columns.
+    """
+    groups = defaultdict(list)
+    for row in rows:
+        groups[tuple(sorted(row))].append(row)
+
+    for columns, group_rows in groups.items():
+        update_columns = [x for x in columns if x not in index_elements]
+
+        for ind in range(0, len(group_rows), UPSERT_BATCH_SIZE):
+            stmt = get_insert_stmt(model) \
+                .values(group_rows[ind:ind + UPSERT_BATCH_SIZE])
+
+            if update_columns:
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=index_elements,
+                    set_={x: stmt.excluded[x] for x in update_columns}
+                )
+            else:
+                stmt = stmt.on_conflict_do_nothing(
+                    index_elements=index_elements
+                )
+
+            db.session.execute(stmt)
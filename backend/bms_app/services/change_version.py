@@ -0,0 +1,140 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from flask import abort, make_response, request
+from sqlalchemy import func
+
+from bms_app.models import (
+    Mapping, OperationDetails, Project, SourceDB, Wave, db
+)
+
+
+def bump_change_version(wave_ids=(), project_ids=(), with_wave_projects=True):
+    """Increment change_version of waves and projects.
+
+    Projects of the waves are bumped too unless with_wave_projects is False.
+    Must be called whenever data returned by polled endpoints is changed.
+    """
+    wave_ids = {x for x in wave_ids if x}
+    project_ids = {x for x in project_ids if x}
+
+    if wave_ids:
+        db.session.query(Wave) \
+            .filter(Wave.id.in_(wave_ids)) \
+            .update(
+                {'change_version': Wave.change_version + 1},
+                synchronize_session=False
+            )
+
+        if with_wave_projects:
+            qs = db.session.query(Wave.project_id).filter(Wave.id.in_(wave_ids))
+            project_ids.update(x[0] for x in qs)
+
+    if project_ids:
+        db.session.query(Project) \
+            .filter(Project.id.in_(project_ids)) \
+            .update(
+                {'change_version': Project.change_version + 1},
+                synchronize_session=False
+            )
+
+
+def bump_source_dbs_change_version(source_dbs):
+    """Increment change_version of waves/projects of source dbs."""
+    bump_change_version(
+        wave_ids=[x.wave_id for x in source_dbs],
+        project_ids=[x.project_id for x in source_dbs]
+    )
+
+
+def bump_source_db_ids_change_version(db_ids):
+    qs = db.session.query(SourceDB).filter(SourceDB.id.in_(db_ids))
+    bump_source_dbs_change_version(qs.all())
+
+
+def bump_bms_change_version(bms_id):
+    """Increment change_version of waves/projects of dbs mapped to bms."""
+    qs = db.session.query(SourceDB) \
+        .join(Mapping, Mapping.db_id == SourceDB.id) \
+        .filter(Mapping.bms_id == bms_id)
+    bump_source_dbs_change_version(qs.all())
+
+
+def bump_operation_change_version(operation, with_projects=True):
+    """Increment change_version of the operation wave and projects of its dbs.
+
+    Restore operations are not bound to the wave
+    but they change dbs that may belong to one.
+    Projects show statuses only, so steps bump waves
+    with with_projects=False.
+    """
+    qs = db.session.query(SourceDB.wave_id, SourceDB.project_id) \
+        .join(Mapping, Mapping.db_id == SourceDB.id) \
+        .join(OperationDetails, OperationDetails.mapping_id == Mapping.id) \
+        .filter(OperationDetails.operation_id == operation.id) \
+        .distinct() \
+        .all()
+
+    bump_change_version(
+        wave_ids=[operation.wave_id] + [x[0] for x in qs],
+        project_ids=[x[1] for x in qs] if with_projects else [],
+        with_wave_projects=with_projects
+    )
+
+
+def get_wave_etag(wave_id):
+    version = db.session.query(Wave.change_version) \
+        .filter(Wave.id == wave_id) \
+        .scalar()
+
+    if version is None:
+        abort(404)
+
+    return f'wave-{wave_id}-{version}'
+
+
+def get_project_etag(project_id=None):
+    """Return etag of the project or of all projects if it is not set."""
+    if project_id:
+        version = db.session.query(Project.change_version) \
+            .filter(Project.id == project_id) \
+            .scalar()
+
+        if version is None:
+            abort(404)
+
+        return f'project-{project_id}-{version}'
+
+    # deleted projects change count/max id
+    count, max_id, total_version = db.session.query(
+        func.count(Project.id),
+        func.max(Project.id),
+        func.sum(Project.change_version)
+    ).one()
+    return f'projects-{count}-{max_id}-{total_version}'
+
+
+def conditional_response(etag, get_data):
+    """Return 304 if the client has up-to-date data.
+
+    get_data is called only if the data has been changed.
+    """
+    if request.if_none_match.contains(etag):
+        response = make_response('', 304)
+    else:
+        response = make_response(get_data())
+
+    response.set_etag(etag)
+
+    return response
@@ -14,6 +14,8 @@
 
 from google.cloud import run_v2
 
+from bms_app.services.gcloud_clients import get_cloud_run_client
+
 
 def get_cloud_run_service_object(name):
     """Return google.cloud.run_v2.types.service.Service object data.
@@ -21,6 +23,6 @@ def get_cloud_run_service_object(name):
     Params:
     - name: full cloud run service name, e.g. projects/<project>/locations/<region>/services/<name>
     """
-    client = run_v2.ServicesClient()
+    client = get_cloud_run_client()
     request = run_v2.GetServiceRequest(name=name)
     return client.get_service(request=request)
@@ -14,11 +14,14 @@
 
 import logging
 from abc import ABC, abstractmethod
+from datetime import datetime
 
 from flask import render_template
 
 from bms_app import settings
-from bms_app.services.gce import create_instance, get_zone
+from bms_app.models import db
+from bms_app.services.control_node_pool import ControlNodePool
+from bms_app.services.gce import create_instance, delete_instance, get_zone
 
 
 logger = logging.getLogger(__name__)
@@ -32,10 +35,16 @@ class BaseCNService(ABC):
     """Base class for launching Control Node."""
 
     OPERATION_TYPE = None
+    # run operation on the node of the warm pool if it is enabled
+    USE_POOL = False
 
     @classmethod
     def run(cls, project, operation, gcs_config_dir, **context):
         """Start GCE control node."""
+        if cls.USE_POOL and settings.CONTROL_NODE_POOL_SIZE:
+            if cls._run_on_pool_node(project, operation, gcs_config_dir, context):
+                return
+
         zone = get_zone(settings.GCP_PROJECT_NAME, project.subnet)
 
         name = cls._generate_name(operation, context)
@@ -54,6 +63,8 @@ class BaseCNService(ABC):
 
         machine_type = cls._get_machine_type(context)
 
+        started_at = datetime.now()
+
         create_instance(
             project=settings.GCP_PROJECT_NAME,
             zone=zone,
@@ -65,6 +76,63 @@ class BaseCNService(ABC):
             machine_type=machine_type,
         )
 
+        # used to measure time until the 1-st step is reported
+        operation.control_node_started_at = started_at
+        db.session.add(operation)
+        db.session.commit()
+
+    @classmethod
+    def delete(cls, project, operation, **context):
+        """Delete GCE control node started by run()."""
+        zone = get_zone(settings.GCP_PROJECT_NAME, project.subnet)
+        delete_instance(
+            settings.GCP_PROJECT_NAME,
+            zone,
+            cls._generate_name(operation, context)
+        )
+
+    @classmethod
+    def _run_on_pool_node(cls, project, operation, gcs_config_dir, context):
+        """Assign operation to the idle pool node.
+
+        Return False if there is no idle node or the assignment failed,
+        the pool is replenished in any case to have nodes ready
+        for the next operations.
+        """
+        pool = ControlNodePool(project)
+        node = pool.lease(operation)
+
+        if node:
+            logger.debug(
+                'operation %s is assigned to pool node %s',
+                operation.id, node.name
+            )
+            raw_startup_script = cls._generate_startup_script(
+                operation,
+                gcs_config_dir,
+                dict(context, pooled=True)
+            )
+            try:
+                pool.assign(node, raw_startup_script)
+            except Exception:
+                logger.exception(
+                    'error assigning operation %s to pool node %s',
+                    operation.id, node.name
+                )
+                pool.unlease(node)
+                node = None
+            else:
+                operation.control_node_started_at = datetime.now()
+                db.session.add(operation)
+                db.session.commit()
+
+        try:
+            pool.replenish()
+        except Exception:
+            logger.exception('error replenishing control node pool')
+
+        return node is not None
+
     @staticmethod
     @abstractmethod
     def _generate_name(operation, context):
@@ -81,6 +149,10 @@ class BaseCNService(ABC):
             'operation_type': cls.OPERATION_TYPE,
             'gcp_project_name': settings.GCP_PROJECT_NAME,
             'pubsub_topic': settings.GCP_PUBSUB_TOPIC,
+            'config_archive': context.get('config_archive'),
+            'toolkit_artifact': settings.BMS_TOOLKIT_ARTIFACT,
+            'pooled': context.get('pooled', False),
+            'shard': context.get('shard') or 0,
         }
         extra_script_context = cls._get_extra_startup_script_context(
             operation,
@@ -115,7 +187,10 @@ class WaveBaseCNService(BaseCNService):
     @staticmethod
     def _generate_name(operation, context):
         wave = context['wave']
-        return f'bms-app-control-node-{wave.id}-{operation.id}'
+        name = f'bms-app-control-node-{wave.id}-{operation.id}'
+        if context.get('shard') is not None:
+            name = f'{name}-{context["shard"]}'
+        return name
 
     @staticmethod
     def _get_extra_startup_script_context(operation, gcs_config_dir, context):
@@ -151,6 +226,7 @@ class RollbackConrolNodeService(WaveBaseCNService):
 
 class PreRestoreControlNodeService(BaseCNService):
     OPERATION_TYPE = 'PRE_RESTORE'
+    USE_POOL = True
 
     @staticmethod
     def _generate_name(operation, context):
@@ -167,6 +243,7 @@ class PreRestoreControlNodeService(BaseCNService):
 
 class RestoreControlNodeService(BaseCNService):
     OPERATION_TYPE = 'RESTORE'
+    USE_POOL = True
 
     @staticmethod
     def _generate_name(operation, context):
@@ -183,6 +260,7 @@ class RestoreControlNodeService(BaseCNService):
 
 class RollbackRestoreControlNodeService(BaseCNService):
     OPERATION_TYPE = 'ROLLBACK_RESTORE'
+    USE_POOL = True
 
     @staticmethod
     def _generate_name(operation, context):
@@ -197,6 +275,7 @@ class RollbackRestoreControlNodeService(BaseCNService):
 
 class FailOverControlNodeService(BaseCNService):
     OPERATION_TYPE = 'DB_FAILOVER'
+    USE_POOL = True
 
     @staticmethod
     def _generate_name(operation, context):
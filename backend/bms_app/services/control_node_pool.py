@@ -0,0 +1,262 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta
+
+from flask import render_template
+from sqlalchemy import func, or_
+
+from bms_app import settings
+from bms_app.models import ControlNode, ControlNodeStatus, db
+from bms_app.services.gce import create_instance, delete_instance, get_zone
+from bms_app.services.gcs import delete_blob, upload_blob_from_string
+
+
+logger = logging.getLogger(__name__)
+
+
+ASSIGNMENT_KEY_TMPL = 'control_node_pool/{name}/assignment.sh'
+
+
+def get_assignment_key(node_name):
+    """Return GCS key of the script the pool node is waiting for."""
+    return os.path.join(
+        settings.GCS_DEPLOYMENT_CONFIG_PREFIX,
+        ASSIGNMENT_KEY_TMPL.format(name=node_name)
+    )
+
+
+class ControlNodePool:
+    """Warm pool of reusable control nodes of the project/subnet.
+
+    Idle nodes run control_node_pool.sh, send heartbeats to pub/sub
+    and poll GCS for the assignment: the startup script of the operation
+    uploaded by assign(). Nodes are reserved by replenish() and started,
+    checked and scaled down by maintain_control_node_pools()
+    which is called periodically, so the request path doesn't call GCE.
+    """
+
+    def __init__(self, project):
+        self.project = project
+
+    @property
+    def size(self):
+        return settings.CONTROL_NODE_POOL_SIZE
+
+    def _query(self):
+        return db.session.query(ControlNode) \
+            .filter(ControlNode.project_id == self.project.id,
+                    ControlNode.subnet == self.project.subnet)
+
+    def lease(self, operation):
+        """Return idle node leased to the operation or None."""
+        node = self._query() \
+            .filter(ControlNode.status == ControlNodeStatus.IDLE) \
+            .order_by(ControlNode.id) \
+            .with_for_update(skip_locked=True) \
+            .first()
+
+        if node:
+            node.status = ControlNodeStatus.LEASED
+            node.operation_id = operation.id
+            node.leased_at = datetime.now()
+            node.lease_count += 1
+            db.session.add(node)
+            db.session.commit()
+
+        return node
+
+    @staticmethod
+    def assign(node, startup_script):
+        """Hand the operation over to the node."""
+        upload_blob_from_string(
+            settings.GCS_BUCKET,
+            get_assignment_key(node.name),
+            startup_script
+        )
+
+    @staticmethod
+    def unlease(node):
+        """Return node to idle ones when the operation couldn't be assigned."""
+        node.status = ControlNodeStatus.IDLE
+        node.operation_id = None
+        node.leased_at = None
+        node.lease_count -= 1
+        db.session.add(node)
+        db.session.commit()
+
+    def replenish(self):
+        """Reserve nodes until there are `size` idle or starting nodes.
+
+        Instances of the reserved nodes are created by start_pending_nodes().
+        """
+        available_count = self._query() \
+            .filter(ControlNode.status.in_([
+                ControlNodeStatus.PENDING,
+                ControlNodeStatus.BOOTING,
+                ControlNodeStatus.IDLE,
+            ])) \
+            .count()
+        missing = self.size - available_count
+        if missing <= 0:
+            return
+
+        for _ in range(missing):
+            db.session.add(
+                ControlNode(
+                    name=f'bms-app-control-node-pool-{self.project.id}-{uuid.uuid4().hex[:8]}',
+                    project_id=self.project.id,
+                    subnet=self.project.subnet,
+                    status=ControlNodeStatus.PENDING,
+                    lease_count=0,
+                )
+            )
+        db.session.commit()
+
+    def start_pending_nodes(self):
+        """Create instances of the reserved nodes, return their number."""
+        nodes = self._query() \
+            .filter(ControlNode.status == ControlNodeStatus.PENDING) \
+            .order_by(ControlNode.id) \
+            .all()
+        if not nodes:
+            return 0
+
+        zone = get_zone(settings.GCP_PROJECT_NAME, self.project.subnet)
+
+        for node in nodes:
+            startup_script = render_template(
+                'control_node_pool.sh.j2',
+                node_name=node.name,
+                bucket_name=settings.GCS_BUCKET,
+                assignment_key=get_assignment_key(node.name),
+                poll_interval=settings.CONTROL_NODE_POOL_POLL_INTERVAL,
+                pubsub_topic=settings.GCP_PUBSUB_TOPIC,
+                gcp_project_name=settings.GCP_PROJECT_NAME,
+                heartbeat_interval=settings.CONTROL_NODE_POOL_HEARTBEAT_INTERVAL,
+            )
+            create_instance(
+                project=settings.GCP_PROJECT_NAME,
+                zone=zone,
+                vpc=self.project.vpc,
+                subnet=self.project.subnet,
+                name=node.name,
+                startup_script=startup_script,
+                service_account=settings.GCP_SERVICE_ACCOUNT,
+                machine_type=settings.CONTROL_NODE_POOL_MACHINE_TYPE,
+            )
+            # node is leased only after it has sent the 1-st heartbeat
+            node.status = ControlNodeStatus.BOOTING
+            node.zone = zone
+            node.created_at = datetime.now()
+            db.session.add(node)
+            # commit every node to not lose already created instances
+            db.session.commit()
+
+        return len(nodes)
+
+    def get_dead_nodes(self):
+        """Return nodes which have not booted, stopped sending heartbeats
+        or have been leased for too long.
+        """
+        now = datetime.now()
+        booted_before = now - timedelta(seconds=settings.CONTROL_NODE_POOL_BOOT_TIMEOUT)
+        heartbeat_before = now - timedelta(seconds=settings.CONTROL_NODE_POOL_HEARTBEAT_TIMEOUT)
+        leased_before = now - timedelta(seconds=settings.CONTROL_NODE_POOL_LEASE_TIMEOUT)
+        # nodes started before heartbeats were introduced have no heartbeat_at
+        last_seen_at = func.coalesce(ControlNode.heartbeat_at, ControlNode.created_at)
+
+        return self._query() \
+            .filter(or_(
+                (ControlNode.status == ControlNodeStatus.BOOTING)
+                & (ControlNode.created_at < booted_before),
+                ControlNode.status.in_([ControlNodeStatus.IDLE, ControlNodeStatus.LEASED])
+                & (last_seen_at < heartbeat_before),
+                (ControlNode.status == ControlNodeStatus.LEASED)
+                & (ControlNode.leased_at < leased_before),
+            )) \
+            .all()
+
+    def scale_down(self):
+        """Delete idle nodes above the pool size or idle for too long."""
+        idle_nodes = self._query() \
+            .filter(ControlNode.status == ControlNodeStatus.IDLE) \
+            .order_by(ControlNode.idle_since.desc()) \
+            .all()
+
+        expired_at = datetime.now() - timedelta(
+            seconds=settings.CONTROL_NODE_POOL_IDLE_TTL
+        )
+        extra_nodes = [
+            node for ind, node in enumerate(idle_nodes)
+            if ind >= self.size or node.idle_since < expired_at
+        ]
+
+        delete_nodes(extra_nodes)
+
+
+def delete_nodes(nodes):
+    """Delete instances and models of the nodes."""
+    for node in nodes:
+        if node.status == ControlNodeStatus.PENDING:
+            db.session.delete(node)
+            continue
+
+        try:
+            delete_instance(settings.GCP_PROJECT_NAME, node.zone, node.name)
+            delete_blob(settings.GCS_BUCKET, get_assignment_key(node.name))
+        except Exception:
+            # instance might be already deleted
+            logger.exception('error deleting control node %s', node.name)
+
+        db.session.delete(node)
+
+
+def release_control_node(operation):
+    """Return node of the finished operation to the pool."""
+    node = db.session.query(ControlNode) \
+        .filter(ControlNode.operation_id == operation.id) \
+        .first()
+    if not node:
+        return
+
+    if node.lease_count >= settings.CONTROL_NODE_POOL_MAX_LEASES:
+        # recycle the node to not accumulate leftovers of operations
+        delete_nodes([node])
+    else:
+        node.status = ControlNodeStatus.IDLE
+        node.operation_id = None
+        node.idle_since = datetime.now()
+        db.session.add(node)
+
+    ControlNodePool(node.project).scale_down()
+
+
+def heartbeat_control_node(name, timestamp):
+    """Save heartbeat of the pool node, the 1-st one means it is ready."""
+    node = db.session.query(ControlNode) \
+        .filter(ControlNode.name == name) \
+        .first()
+    if not node:
+        logger.warning('heartbeat of unknown control node %s', name)
+        return
+
+    node.heartbeat_at = datetime.fromtimestamp(timestamp)
+    if node.status == ControlNodeStatus.BOOTING:
+        node.status = ControlNodeStatus.IDLE
+        node.idle_since = datetime.now()
+
+    db.session.add(node)
@@ -2,6 +2,8 @@ import uuid
 from google.cloud import clouddms_v1
 from google.api_core import operation
 
+from bms_app.services.gcloud_clients import get_dms_client
+
 
 class DMS:
 
@@ -9,11 +11,11 @@ class DMS:
             self,
             project_id: str,
             region: str,
-            dms_client: clouddms_v1.DataMigrationServiceClient = clouddms_v1.DataMigrationServiceClient(),
+            dms_client: clouddms_v1.DataMigrationServiceClient = None,
     ):
         self.project_id = project_id
         self.region = region
-        self.client = dms_client
+        self.client = dms_client or get_dms_client()
 
     def _get_parent(self) -> str:
         return f'projects/{self.project_id}/locations/{self.region}'
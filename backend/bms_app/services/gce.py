@@ -12,7 +12,71 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from googleapiclient import discovery
+import threading
+import time
+
+from googleapiclient.errors import HttpError
+
+from bms_app import settings
+from bms_app.services.gcloud_clients import get_discovery_service
+
+
+class TTLCache:
+    """Thread-safe cache of values expiring after ttl seconds."""
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._items = {}  # key: (expires_at, value)
+
+    def get_or_set(self, key, get_value):
+        """Return cached value or call get_value() and cache its result.
+
+        None is not cached.
+        """
+        now = time.monotonic()
+        with self._lock:
+            item = self._items.get(key)
+            if item and item[0] > now:
+                return item[1]
+
+        value = get_value()
+        if value is not None:
+            with self._lock:
+                self._items[key] = (now + self.ttl, value)
+
+        return value
+
+    def invalidate(self, key=None):
+        """Drop one key or all keys if key is not set."""
+        with self._lock:
+            if key is None:
+                self._items = {}
+            else:
+                self._items.pop(key, None)
+
+
+# (project, region): zone
+zones_cache = TTLCache(settings.GCE_RESOLUTION_CACHE_TTL)
+# (project, image family): image self link
+images_cache = TTLCache(settings.GCE_RESOLUTION_CACHE_TTL)
+
+
+def invalidate_gce_cache():
+    """Drop cached zones and images, next launch resolves them again."""
+    zones_cache.invalidate()
+    images_cache.invalidate()
+
+
+def get_image_link(project, family):
+    """Return self link of the latest image of the family."""
+    def get_from_family():
+        compute = get_discovery_service('compute', 'v1')
+        image_response = compute.images().getFromFamily(
+            project=project, family=family).execute()
+        return image_response['selfLink']
+
+    return images_cache.get_or_set((project, family), get_from_family)
 
 
 # from bms_app.services.gcloud import get_gcloud_metadata
@@ -21,10 +85,11 @@ from googleapiclient import discovery
 def create_instance(project, zone, name, vpc, subnet,
                     service_account, machine_type, startup_script=None):
     # Get the latest bms-control-node image.
-    compute = discovery.build('compute', 'v1')
-    image_response = compute.images().getFromFamily(
-        project='centos-cloud', family='centos-7').execute()
-    source_disk_image = image_response['selfLink']
+    compute = get_discovery_service('compute', 'v1')
+    source_disk_image = get_image_link(
+        settings.CONTROL_NODE_IMAGE_PROJECT,
+        settings.CONTROL_NODE_IMAGE_FAMILY
+    )
 
     # Configure the machine
     full_machine_type = f'zones/{zone}/machineTypes/{machine_type}'
@@ -81,15 +146,20 @@ def create_instance(project, zone, name, vpc, subnet,
             }
         )
 
-    return compute.instances().insert(
-        project=project,
-        zone=zone,
-        body=config
-    ).execute()
+    try:
+        return compute.instances().insert(
+            project=project,
+            zone=zone,
+            body=config
+        ).execute()
+    except HttpError:
+        # cached zone or image might be no longer available
+        invalidate_gce_cache()
+        raise
 
 
 def delete_instance(project, zone, name):
-    compute = discovery.build('compute', 'v1')
+    compute = get_discovery_service('compute', 'v1')
     return compute.instances().delete(
         project=project,
         zone=zone,
@@ -113,7 +183,7 @@ def delete_instance(project, zone, name):
 # )
 
 def get_network_subnetwork(project):
-    service = discovery.build('compute', 'v1')
+    service = get_discovery_service('compute', 'v1')
     request = service.networks().list(project=project)
 
     networks = []
@@ -135,7 +205,7 @@ def get_network_subnetwork(project):
 
 def get_service_accounts(project):
 
-    service = discovery.build('iam', 'v1')
+    service = get_discovery_service('iam', 'v1')
 
     name = 'projects/' + project
 
@@ -157,14 +227,22 @@ def get_service_accounts(project):
 
 def get_zone(project, subnet):
     """Return 1-st zone for project/subnet."""
-    service = discovery.build('compute', 'v1')
+    region = subnet.split('/')[1]
+    return zones_cache.get_or_set(
+        (project, region),
+        lambda: _find_region_zone(project, region)
+    )
+
+
+def _find_region_zone(project, region):
+    service = get_discovery_service('compute', 'v1')
 
     request = service.zones().list(project=project)
     while request is not None:
         response = request.execute()
 
         for zone in response['items']:
-            if zone['region'].split('/')[-1] == subnet.split('/')[1]:
+            if zone['region'].split('/')[-1] == region:
                 return zone['name']
 
         request = service.zones().list_next(previous_request=request, previous_response=response)
@@ -0,0 +1,144 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+from collections import Counter
+
+import google.auth
+from google.auth.transport.requests import AuthorizedSession
+from google.cloud import clouddms_v1, run_v2, secretmanager, storage, tasks_v2
+from googleapiclient import discovery
+from requests.adapters import HTTPAdapter
+
+
+# max number of kept-alive connections per host,
+# should be not less than number of gunicorn threads
+HTTP_POOL_SIZE = 16
+
+STORAGE_READ_WRITE_SCOPE = 'https://www.googleapis.com/auth/devstorage.read_write'
+
+
+class ClientRegistry:
+    """Lazily created Google Cloud clients shared within the process.
+
+    Clients are created once on the first use.
+    Clients which are not thread-safe (googleapiclient/httplib2)
+    are created once per thread.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients = {}
+        self._local = threading.local()
+        self.constructions = Counter()
+
+    def get(self, name, factory, per_thread=False):
+        if per_thread:
+            return self._get_thread_client(name, factory)
+
+        client = self._clients.get(name)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(name)
+                if client is None:
+                    client = factory()
+                    self._clients[name] = client
+                    self.constructions[name] += 1
+
+        return client
+
+    def _get_thread_client(self, name, factory):
+        clients = self._local.__dict__.setdefault('clients', {})
+
+        client = clients.get(name)
+        if client is None:
+            client = factory()
+            clients[name] = client
+            with self._lock:
+                self.constructions[name] += 1
+
+        return client
+
+    def reset(self):
+        """Drop all clients, e.g. after fork or in tests."""
+        with self._lock:
+            self._clients = {}
+            self._local = threading.local()
+            self.constructions = Counter()
+
+
+registry = ClientRegistry()
+
+
+def get_clients_constructions():
+    """Return number of constructed clients by name."""
+    return dict(registry.constructions)
+
+
+def create_authorized_session(scopes):
+    """Return requests session with keep-alive connections pool."""
+    credentials, _ = google.auth.default(scopes=scopes)
+    session = AuthorizedSession(credentials)
+    session.mount('https://', HTTPAdapter(
+        pool_connections=HTTP_POOL_SIZE,
+        pool_maxsize=HTTP_POOL_SIZE
+    ))
+    return session
+
+
+def _create_storage_client():
+    session = create_authorized_session(storage.Client.SCOPE)
+    return storage.Client(credentials=session.credentials, _http=session)
+
+
+def get_storage_client():
+    return registry.get('storage', _create_storage_client)
+
+
+def get_gcs_upload_session():
+    """Return session used for resumable uploads."""
+    return registry.get(
+        'gcs_upload_session',
+        lambda: create_authorized_session((STORAGE_READ_WRITE_SCOPE, ))
+    )
+
+
+def get_discovery_service(service_name, version, **kwargs):
+    """Return googleapiclient service of the current thread."""
+    return registry.get(
+        f'{service_name}_{version}',
+        lambda: discovery.build(
+            service_name,
+            version,
+            cache_discovery=False,
+            **kwargs
+        ),
+        per_thread=True
+    )
+
+
+def get_tasks_client():
+    return registry.get('tasks', tasks_v2.CloudTasksClient)
+
+
+def get_secrets_client():
+    return registry.get('secretmanager', secretmanager.SecretManagerServiceClient)
+
+
+def get_cloud_run_client():
+    return registry.get('cloud_run', run_v2.ServicesClient)
+
+
+def get_dms_client():
+    return registry.get('dms', clouddms_v1.DataMigrationServiceClient)
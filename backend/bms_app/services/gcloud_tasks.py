@@ -15,6 +15,8 @@
 from google.cloud import tasks_v2
 from google.protobuf import timestamp_pb2
 
+from bms_app.services.gcloud_clients import get_tasks_client
+
 
 def create_task(queue_path, schedule_dt, url,
                 service_account_email=None, audience=None):
@@ -25,8 +27,7 @@ def create_task(queue_path, schedule_dt, url,
     - schedule_dt: datetime in the future when it should be executed.
     - url: url that will be requested with GET method.
     """
-    # Create a client.
-    client = tasks_v2.CloudTasksClient()
+    client = get_tasks_client()
 
     timestamp = timestamp_pb2.Timestamp()
     timestamp.FromDatetime(schedule_dt)
@@ -63,8 +64,7 @@ def delete_task(task_path):
     Params:
     - task_path - full task name, e.g. projects/<project>/locations/<location>/queues/<queue>/tasks/<task_name>
     """
-    # Create a client
-    client = tasks_v2.CloudTasksClient()
+    client = get_tasks_client()
     # Initialize request argument(s)
     request = tasks_v2.DeleteTaskRequest(
         name=task_path,
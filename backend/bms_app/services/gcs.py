@@ -12,19 +12,23 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import hashlib
 import logging
 import os
+import threading
+from collections import OrderedDict
 from datetime import datetime
 
-import google.auth
-import google.auth.transport.requests as tr_requests
+from google.api_core.exceptions import NotFound, PreconditionFailed
 from google.cloud import storage
 from google.resumable_media.requests import ResumableUpload
 
 from bms_app import settings
+from bms_app.services.gcloud_clients import (
+    get_gcs_upload_session, get_storage_client
+)
 
 
-READ_WRITE_SCOPE = 'https://www.googleapis.com/auth/devstorage.read_write'
 URL_TEMPLATE = (
     'https://www.googleapis.com/upload/storage/v1/b/{bucket}/o'
     '?&uploadType=resumable'
@@ -36,6 +40,150 @@ CONTENT_TYPE = 'application/octet-stream'
 logger = logging.getLogger(__name__)
 
 
+class GCSFileCache:
+    """Read-through LRU cache of GCS files content.
+
+    Content is stored by (bucket, key) together with the object generation.
+    Every read makes one metadata request to get the current generation
+    and downloads the file only if it has changed.
+    Files can be stored on the local disk too (disk_dir) to survive restarts.
+    Disk is used as a best effort: failed writes are logged and ignored.
+    """
+
+    DOWNLOAD_ATTEMPTS = 3
+
+    def __init__(self, max_size, disk_dir=None):
+        self.max_size = max_size
+        self.disk_dir = disk_dir
+        self._lock = threading.Lock()
+        self._items = OrderedDict()  # (bucket, key): (generation, content)
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, bucket_name, key):
+        """Return content (bytes) of the current generation of the file.
+
+        Raise NotFound if the file does not exist.
+        """
+        bucket = get_storage_client().bucket(bucket_name)
+
+        for attempt in range(self.DOWNLOAD_ATTEMPTS):
+            blob = bucket.get_blob(key)
+            if blob is None:
+                raise NotFound(f'gs://{bucket_name}/{key} does not exist')
+
+            content = self._get_cached(bucket_name, key, blob.generation)
+            if content is not None:
+                self.hits += 1
+                return content
+
+            try:
+                content = blob.download_as_bytes(
+                    if_generation_match=blob.generation
+                )
+            except PreconditionFailed:
+                # file has been replaced after the metadata request
+                if attempt == self.DOWNLOAD_ATTEMPTS - 1:
+                    raise
+                continue
+
+            self.misses += 1
+            self._put(bucket_name, key, blob.generation, content)
+            return content
+
+    def clear(self):
+        with self._lock:
+            self._items = OrderedDict()
+            self._size = 0
+
+    def _get_cached(self, bucket_name, key, generation):
+        with self._lock:
+            item = self._items.get((bucket_name, key))
+            if item and item[0] == generation:
+                self._items.move_to_end((bucket_name, key))
+                return item[1]
+
+        content = self._read_disk(bucket_name, key, generation)
+        if content is not None:
+            self._put_memory(bucket_name, key, generation, content)
+
+        return content
+
+    def _put(self, bucket_name, key, generation, content):
+        self._put_memory(bucket_name, key, generation, content)
+
+        try:
+            self._write_disk(bucket_name, key, generation, content)
+        except OSError:
+            logger.exception(
+                'failed to cache gs://%s/%s on disk', bucket_name, key
+            )
+
+    def _put_memory(self, bucket_name, key, generation, content):
+        if len(content) > self.max_size:
+            return
+
+        with self._lock:
+            old_item = self._items.pop((bucket_name, key), None)
+            if old_item:
+                self._size -= len(old_item[1])
+
+            self._items[(bucket_name, key)] = (generation, content)
+            self._size += len(content)
+
+            # evict least recently used files
+            while self._size > self.max_size:
+                _, (_, evicted) = self._items.popitem(last=False)
+                self._size -= len(evicted)
+
+    def _get_disk_prefix(self, bucket_name, key):
+        name = hashlib.sha256(f'{bucket_name}/{key}'.encode()).hexdigest()
+        return os.path.join(self.disk_dir, name)
+
+    def _read_disk(self, bucket_name, key, generation):
+        if not self.disk_dir:
+            return None
+
+        path = f'{self._get_disk_prefix(bucket_name, key)}-{generation}'
+        try:
+            with open(path, 'rb') as fp:
+                return fp.read()
+        except FileNotFoundError:
+            return None
+
+    def _write_disk(self, bucket_name, key, generation, content):
+        if not self.disk_dir:
+            return
+
+        os.makedirs(self.disk_dir, exist_ok=True)
+
+        prefix = self._get_disk_prefix(bucket_name, key)
+        file_name = os.path.basename(prefix)
+
+        # remove previous generations
+        for name in os.listdir(self.disk_dir):
+            if name.startswith(f'{file_name}-'):
+                os.remove(os.path.join(self.disk_dir, name))
+
+        # write to the temporary file to not expose partial content
+        tmp_path = f'{prefix}.tmp-{threading.get_ident()}'
+        try:
+            with open(tmp_path, 'wb') as fp:
+                fp.write(content)
+            os.replace(tmp_path, f'{prefix}-{generation}')
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+file_cache = GCSFileCache(
+    max_size=settings.GCS_CACHE_MAX_SIZE,
+    disk_dir=settings.GCS_CACHE_DIR or None
+)
+
+
 def parse_gcs_uri(gcs_full_path):
     """Extrtact bucket name and file path form the full url.
 
@@ -59,8 +207,7 @@ def parse_gcs_uri(gcs_full_path):
 
 def upload_stream_to_gcs(stream, bucket_name, key):
     """Upload stream object to GCS (bucket)."""
-    credentials, _ = google.auth.default(scopes=(READ_WRITE_SCOPE,))
-    transport = tr_requests.AuthorizedSession(credentials)
+    transport = get_gcs_upload_session()
 
     upload_url = URL_TEMPLATE.format(bucket=bucket_name)
 
@@ -86,7 +233,7 @@ def upload_blob(bucket_name, key, source_file):
     logger.debug(
         'upload blob bucket:%s key:%s' % (bucket_name, key)
     )
-    storage_client = storage.Client()
+    storage_client = get_storage_client()
     bucket = storage_client.bucket(bucket_name)
     blob = bucket.blob(key)
     blob.upload_from_file(source_file)
@@ -97,7 +244,7 @@ def upload_blob_from_string(bucket_name, key, content):
     logger.debug(
         'upload blob from string bucket:%s key:%s' % (bucket_name, key)
     )
-    storage_client = storage.Client()
+    storage_client = get_storage_client()
     bucket = storage_client.bucket(bucket_name)
     blob = bucket.blob(key)
     blob.upload_from_string(content)
@@ -110,7 +257,7 @@ def list_blobs(bucket_name, prefix=None):
     bucket_name -- name of bucket
     prefix -- name of folder/subfolder. For example "ora-binaries/". Default=None
     """
-    storage_client = storage.Client()
+    storage_client = get_storage_client()
     bucket = storage_client.get_bucket(bucket_name)
     list_blobs = bucket.list_blobs(prefix=prefix)
     date_format = "%Y-%m-%d %H:%M:%S"
@@ -134,11 +281,11 @@ def get_file_content(bucket_name, file_path):
     bucket_name -- name of bucket
     prefix -- name of folder/subfolder. For example "ora-binaries/"
     file_name -- name of the file. For example "pfile.ora"
+
+    Content is cached until the file is replaced (its generation changed).
+    Raise NotFound if the file does not exist.
     """
-    storage_client = storage.Client()
-    bucket = storage_client.get_bucket(bucket_name)
-    blob = bucket.get_blob(file_path)
-    data_string = blob.download_as_string()
+    data_string = file_cache.get(bucket_name, file_path)
 
     # convert bytes to unicode
     content = data_string.decode()
@@ -150,7 +297,7 @@ def delete_blob(bucket_name, blob_name):
     # bucket_name = "your-bucket-name"
     # blob_name = "your-object-name"
 
-    storage_client = storage.Client()
+    storage_client = get_storage_client()
 
     bucket = storage_client.bucket(bucket_name)
     blob = bucket.blob(blob_name)
@@ -165,7 +312,7 @@ def copy_blob(bucket_name,
               destination_blob_name):
     """Copies a blob from one bucket to another with a new name."""
 
-    storage_client = storage.Client()
+    storage_client = get_storage_client()
 
     source_bucket = storage_client.bucket(bucket_name)
     source_blob = source_bucket.blob(blob_name)
@@ -197,7 +344,7 @@ def create_file_link(gcs_key):
 
 def blob_exists(bucket_name, key):
     """Check the existence of a file in the bucket."""
-    storage_client = storage.Client()
+    storage_client = get_storage_client()
     bucket = storage_client.bucket(bucket_name)
     exist = storage.Blob(bucket=bucket, name=key).exists(storage_client)
     return exist
@@ -0,0 +1,290 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import hashlib
+import io
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from flask import current_app
+from marshmallow import ValidationError
+from sqlalchemy.exc import IntegrityError
+
+from bms_app import settings
+from bms_app.inventory_manager.services import insert_uploaded_servers
+from bms_app.models import (
+    ACTIVE_IMPORT_JOB_STATUSES, ImportJob, ImportJobStatus, ImportJobType, db
+)
+from bms_app.source_db.parsers import MigvisorFileError, MigvisorParser
+from bms_app.source_db.services import save_source_dbs
+
+
+logger = logging.getLogger(__name__)
+
+
+# number of items saved and committed at once
+IMPORT_CHUNK_SIZE = 500
+
+
+class ImportJobError(Exception):
+    pass
+
+
+class ImportJobExecutor:
+    """Run import jobs in the pool of background threads.
+
+    Jobs are run within the current request if there are no workers.
+    """
+
+    def __init__(self, app):
+        self._app = app
+        self._workers = app.config['IMPORT_JOBS_WORKERS']
+        self._lock = threading.Lock()
+        self._pool = None
+
+    def submit(self, job_id, data):
+        if not self._workers:
+            run_import_job(job_id, data)
+            return
+
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self._workers,
+                    thread_name_prefix='import-job'
+                )
+
+        self._pool.submit(self._run, job_id, data)
+
+    def _run(self, job_id, data):
+        with self._app.app_context():
+            run_import_job(job_id, data)
+
+
+def init_import_jobs(app):
+    app.extensions['import_jobs'] = ImportJobExecutor(app)
+
+
+def get_idempotency_key(job_type, data, **params):
+    """Return hash of the file content and job parameters."""
+    key = hashlib.sha256()
+    key.update(job_type.value.encode())
+    key.update(json.dumps(params, sort_keys=True).encode())
+    key.update(data)
+    return key.hexdigest()
+
+
+def fail_stale_jobs(*criteria):
+    """Set FAILED status of pending/running jobs without recent progress.
+
+    Jobs are run by threads of the app instance and are lost on restart.
+    """
+    stale_before = datetime.now() - timedelta(
+        seconds=settings.IMPORT_JOBS_STALE_TIMEOUT
+    )
+
+    return db.session.query(ImportJob) \
+        .filter(ImportJob.status.in_(ACTIVE_IMPORT_JOB_STATUSES),
+                ImportJob.updated_at < stale_before,
+                *criteria) \
+        .update(
+            {
+                'status': ImportJobStatus.FAILED,
+                'error': 'job was interrupted',
+                'completed_at': datetime.now(),
+            },
+            synchronize_session=False
+        )
+
+
+def get_existing_job(idempotency_key):
+    """Return not failed job of the same file created recently."""
+    created_after = datetime.now() - timedelta(
+        seconds=settings.IMPORT_JOBS_IDEMPOTENCY_TTL
+    )
+
+    return db.session.query(ImportJob) \
+        .filter(ImportJob.idempotency_key == idempotency_key,
+                ImportJob.status != ImportJobStatus.FAILED,
+                ImportJob.created_at >= created_after) \
+        .order_by(ImportJob.id.desc()) \
+        .first()
+
+
+def create_import_job(job_type, data, project_id=None, overwrite=False):
+    """Create and submit job or return existing one for the same file.
+
+    Return (job, created) tuple.
+    """
+    idempotency_key = get_idempotency_key(
+        job_type,
+        data,
+        project_id=project_id,
+        overwrite=overwrite
+    )
+
+    fail_stale_jobs(ImportJob.idempotency_key == idempotency_key)
+
+    job = get_existing_job(idempotency_key)
+    if job:
+        db.session.commit()
+        return job, False
+
+    job = ImportJob(
+        job_type=job_type,
+        idempotency_key=idempotency_key,
+        project_id=project_id,
+        overwrite=overwrite,
+        status=ImportJobStatus.PENDING,
+        processed=0
+    )
+    db.session.add(job)
+
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # the same file is submitted concurrently
+        db.session.rollback()
+        return get_existing_job(idempotency_key), False
+
+    current_app.extensions['import_jobs'].submit(job.id, data)
+
+    return job, True
+
+
+def update_running_job(job_id, **values):
+    """Save values of the running job and mark its progress.
+
+    Return False if the job is not running anymore,
+    e.g. it has been failed by fail_stale_jobs().
+    """
+    updated = db.session.query(ImportJob) \
+        .filter(ImportJob.id == job_id,
+                ImportJob.status == ImportJobStatus.IN_PROGRESS) \
+        .update(
+            dict(values, updated_at=datetime.now()),
+            synchronize_session=False
+        )
+    db.session.commit()
+
+    return bool(updated)
+
+
+def save_job_progress(job_id, **values):
+    """Mark progress of the job or stop it if it's not running anymore."""
+    if not update_running_job(job_id, **values):
+        raise ImportJobError('job was interrupted')
+
+
+def import_migvisor_file(job, data):
+    """Parse migvisor file and save dbs by chunks."""
+    save_job_progress(job.id)
+    try:
+        parsed_dbs_data = MigvisorParser(io.BytesIO(data)).parse()
+    except MigvisorFileError as exc:
+        raise ImportJobError(str(exc)) from exc
+    save_job_progress(job.id)
+
+    result = {'added': 0, 'updated': 0, 'skipped': 0}
+
+    for chunk in iter_chunks(job, parsed_dbs_data):
+        chunk_result = save_source_dbs(
+            chunk,
+            overwrite=job.overwrite,
+            project_id=job.project_id
+        )
+        for key, value in chunk_result.items():
+            result[key] += value
+
+    return result
+
+
+def import_targets_file(job, data):
+    """Save uploaded bms servers by chunks."""
+    save_job_progress(job.id)
+    try:
+        uploaded_instances = json.loads(data)
+    except ValueError as exc:
+        raise ImportJobError('incorrect json format') from exc
+    save_job_progress(job.id)
+
+    for chunk in iter_chunks(job, uploaded_instances):
+        insert_uploaded_servers(chunk, overwrite=job.overwrite)
+
+    return {'processed': len(uploaded_instances)}
+
+
+IMPORT_HANDLERS = {
+    ImportJobType.MIGVISOR: import_migvisor_file,
+    ImportJobType.TARGETS: import_targets_file,
+}
+
+
+def iter_chunks(job, items):
+    """Yield chunks of items and save job progress after each of them.
+
+    Stop if the job is not running anymore.
+    """
+    save_job_progress(job.id, total=len(items))
+
+    for ind in range(0, len(items), IMPORT_CHUNK_SIZE):
+        chunk = items[ind:ind + IMPORT_CHUNK_SIZE]
+
+        yield chunk
+
+        save_job_progress(job.id, processed=ind + len(chunk))
+
+
+def run_import_job(job_id, data):
+    """Process uploaded file and save result/error to the job."""
+    started = db.session.query(ImportJob) \
+        .filter(ImportJob.id == job_id,
+                ImportJob.status == ImportJobStatus.PENDING) \
+        .update(
+            {'status': ImportJobStatus.IN_PROGRESS, 'started_at': datetime.now()},
+            synchronize_session=False
+        )
+    db.session.commit()
+    if not started:
+        # failed by fail_stale_jobs() while waiting for the worker
+        logger.warning('import job %s was interrupted', job_id)
+        return
+
+    job = db.session.query(ImportJob).get(job_id)
+
+    try:
+        result = IMPORT_HANDLERS[job.job_type](job, data)
+
+    except Exception as exc:
+        db.session.rollback()
+
+        if isinstance(exc, ImportJobError):
+            error = str(exc)
+        elif isinstance(exc, ValidationError):
+            error = json.dumps(exc.messages)
+        else:
+            logger.exception('import job %s failed', job_id)
+            error = 'internal error'
+
+        values = {'status': ImportJobStatus.FAILED, 'error': error}
+
+    else:
+        values = {'status': ImportJobStatus.COMPLETE, 'result': result}
+
+    # job failed by fail_stale_jobs() is not resurrected
+    if not update_running_job(job_id, completed_at=datetime.now(), **values):
+        logger.warning('import job %s was interrupted', job_id)
@@ -0,0 +1,322 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import logging
+import queue
+import select
+import threading
+import time
+from collections import defaultdict
+
+from flask import current_app
+from sqlalchemy import text
+
+from bms_app import settings
+from bms_app.models import Operation, OperationDetails, OperationStatus, db
+
+
+logger = logging.getLogger(__name__)
+
+
+PG_CHANNEL = 'operation_events'
+# postgres limits NOTIFY payload to 8000 bytes
+PG_MAX_PAYLOAD = 7900
+# seconds between attempts to reconnect the listener, doubled up to the max
+LISTEN_RETRY_DELAY = 1
+LISTEN_MAX_RETRY_DELAY = 60
+
+# ends streams which might have missed events, clients reconnect
+STREAM_END = {'type': 'stream_end'}
+
+
+class LocalEventBroker:
+    """Deliver operation events to subscribers of the current process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    def subscribe(self, operation_id):
+        """Return queue to receive events of the operation."""
+        events_queue = queue.Queue()
+        with self._lock:
+            self._subscribers[operation_id].add(events_queue)
+        return events_queue
+
+    def unsubscribe(self, operation_id, events_queue):
+        with self._lock:
+            subscribers = self._subscribers.get(operation_id)
+            if subscribers:
+                subscribers.discard(events_queue)
+                if not subscribers:
+                    del self._subscribers[operation_id]
+
+    def publish(self, operation_id, events):
+        """Publish events after they have been committed."""
+        self.dispatch(operation_id, events)
+
+    def dispatch(self, operation_id, events):
+        with self._lock:
+            subscribers = list(self._subscribers.get(operation_id, ()))
+
+        for events_queue in subscribers:
+            for event in events:
+                events_queue.put(event)
+
+    def end_streams(self):
+        """Ask streams of all subscribers to be closed."""
+        with self._lock:
+            subscribers = [x for queues in self._subscribers.values() for x in queues]
+
+        for events_queue in subscribers:
+            events_queue.put(STREAM_END)
+
+
+class PostgresEventBroker(LocalEventBroker):
+    """Deliver operation events to subscribers of all processes.
+
+    Events are sent by NOTIFY and every process runs one thread
+    that LISTENs the channel and dispatches events to its subscribers.
+    """
+
+    def __init__(self, app):
+        super().__init__()
+        self._app = app
+        self._listener = None
+
+    def subscribe(self, operation_id):
+        self._start_listener()
+        return super().subscribe(operation_id)
+
+    def publish(self, operation_id, events):
+        # separate connection, a failed NOTIFY doesn't abort the session transaction
+        with db.engine.begin() as conn:
+            for chunk in self._split_payload(operation_id, events):
+                conn.execute(
+                    text('SELECT pg_notify(:channel, :payload)'),
+                    {'channel': PG_CHANNEL, 'payload': chunk}
+                )
+
+    @staticmethod
+    def _split_payload(operation_id, events):
+        chunk = []
+        for event in events:
+            payload = json.dumps({'operation_id': operation_id, 'events': chunk + [event]})
+            if chunk and len(payload) > PG_MAX_PAYLOAD:
+                yield json.dumps({'operation_id': operation_id, 'events': chunk})
+                chunk = []
+            chunk.append(event)
+
+        if chunk:
+            yield json.dumps({'operation_id': operation_id, 'events': chunk})
+
+    def _start_listener(self):
+        with self._lock:
+            if self._listener and self._listener.is_alive():
+                return
+
+            self._listener = threading.Thread(
+                target=self._listen,
+                name='operation-events-listener',
+                daemon=True
+            )
+            self._listener.start()
+
+    def _listen(self):
+        """Listen the channel, reconnect with backoff if it fails.
+
+        Events sent while reconnecting are lost, so open streams are ended
+        and the clients reconnect to get the current state.
+        """
+        delay = LISTEN_RETRY_DELAY
+
+        while True:
+            started_at = time.monotonic()
+            try:
+                self._listen_channel()
+            except Exception:
+                logger.exception('operation events listener failed')
+
+            self.end_streams()
+
+            # connection has been working for a while, the failure is not persistent
+            if time.monotonic() - started_at > LISTEN_MAX_RETRY_DELAY:
+                delay = LISTEN_RETRY_DELAY
+
+            time.sleep(delay)
+            delay = min(delay * 2, LISTEN_MAX_RETRY_DELAY)
+
+    def _listen_channel(self):
+        with self._app.app_context():
+            raw_conn = db.engine.raw_connection()
+
+        # dedicated connection, it is not returned to the pool
+        raw_conn.detach()
+        conn = raw_conn.connection
+        conn.set_isolation_level(0)  # autocommit
+
+        with conn.cursor() as cursor:
+            cursor.execute(f'LISTEN {PG_CHANNEL}')
+
+        while True:
+            if select.select([conn], [], [], 60) == ([], [], []):
+                continue
+
+            conn.poll()
+            while conn.notifies:
+                notify = conn.notifies.pop(0)
+                try:
+                    data = json.loads(notify.payload)
+                    self.dispatch(data['operation_id'], data['events'])
+                except (ValueError, KeyError):
+                    logger.exception('wrong operation event %s', notify.payload)
+
+
+class StreamsLimiter:
+    """Limit number of concurrently open streams of the process."""
+
+    def __init__(self, max_streams):
+        self._semaphore = threading.BoundedSemaphore(max_streams)
+
+    def acquire(self):
+        """Return whether a new stream can be opened."""
+        return self._semaphore.acquire(blocking=False)
+
+    def release(self):
+        self._semaphore.release()
+
+
+def init_event_broker(app):
+    """Create the broker according to OPERATION_EVENTS_BACKEND setting."""
+    backend = settings.OPERATION_EVENTS_BACKEND
+
+    if backend == 'postgres':
+        app.extensions['operation_events'] = PostgresEventBroker(app)
+    elif backend == 'local':
+        app.extensions['operation_events'] = LocalEventBroker()
+    else:
+        raise ValueError(f'unknown OPERATION_EVENTS_BACKEND: {backend}')
+
+    app.extensions['operation_events_streams'] = StreamsLimiter(
+        settings.OPERATION_EVENTS_MAX_STREAMS
+    )
+
+
+def get_event_broker():
+    return current_app.extensions['operation_events']
+
+
+def get_streams_limiter():
+    return current_app.extensions['operation_events_streams']
+
+
+def _status_value(status):
+    # status might be set as string and not yet converted by ChoiceType
+    return OperationStatus(status).value if status else None
+
+
+def get_operation_event(operation):
+    return {
+        'type': 'operation',
+        'id': operation.id,
+        'status': _status_value(operation.status),
+        'is_finished': operation.completed_at is not None,
+    }
+
+
+def get_operation_details_event(op_detail):
+    return {
+        'type': 'operation_details',
+        'id': op_detail.id,
+        'mapping_id': op_detail.mapping_id,
+        'step': op_detail.step,
+        'status': _status_value(op_detail.status),
+    }
+
+
+def publish_operation_events(operation_id, events):
+    """Fan out committed changes of the operation to the subscribers."""
+    if not events:
+        return
+
+    try:
+        get_event_broker().publish(operation_id, events)
+    except Exception:
+        # status is already saved, subscribers can reload it
+        logger.exception('error publishing operation %s events', operation_id)
+
+
+def format_sse(event):
+    """Return event in the text/event-stream format."""
+    return f'event: {event["type"]}\ndata: {json.dumps(event)}\n\n'
+
+
+def get_snapshot_events(operation_id):
+    """Return events describing the current state of the operation."""
+    operation = db.session.query(Operation).get(operation_id)
+
+    op_details = db.session.query(OperationDetails) \
+        .filter(OperationDetails.operation_id == operation_id) \
+        .order_by(OperationDetails.id) \
+        .all()
+
+    events = [get_operation_details_event(x) for x in op_details]
+    events.append(get_operation_event(operation))
+
+    return events
+
+
+def stream_operation_events(operation_id):
+    """Yield operation events until the operation is finished.
+
+    The subscription is made before reading the current state
+    so no change committed in between is lost.
+    The stream is closed after OPERATION_EVENTS_MAX_LIFETIME,
+    the client reconnects and gets the current state again.
+    """
+    broker = get_event_broker()
+    heartbeat = settings.OPERATION_EVENTS_HEARTBEAT
+    deadline = time.monotonic() + settings.OPERATION_EVENTS_MAX_LIFETIME
+
+    events_queue = broker.subscribe(operation_id)
+    try:
+        snapshot = get_snapshot_events(operation_id)
+        # don't keep db connection while the stream is open
+        db.session.remove()
+
+        yield f'retry: {settings.OPERATION_EVENTS_RETRY}\n\n'
+
+        for event in snapshot:
+            yield format_sse(event)
+
+        is_finished = snapshot[-1]['is_finished']
+        while not is_finished:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+
+            try:
+                event = events_queue.get(timeout=min(heartbeat, remaining))
+            except queue.Empty:
+                yield ': keep-alive\n\n'
+                continue
+
+            if event is STREAM_END:
+                break
+
+            yield format_sse(event)
+            is_finished = event['type'] == 'operation' and event['is_finished']
+    finally:
+        broker.unsubscribe(operation_id, events_queue)
@@ -19,7 +19,11 @@ from datetime import datetime
 from marshmallow import ValidationError
 
 from bms_app import settings
-from bms_app.models import Operation, OperationDetails, OperationStatus, db
+from bms_app.models import (
+    Operation, OperationDetails, OperationStatus, RacNodesCounter, db
+)
+from bms_app.services.change_version import bump_operation_change_version
+from bms_app.services.wave_rollup import refresh_operation_waves_rollup
 
 
 logger = logging.getLogger(__name__)
@@ -66,10 +70,31 @@ class BaseOperation:
                 )
 
         db.session.add_all(operation_details_models)
+        db.session.add_all(
+            self._create_rac_nodes_counters(operation, db_mappings_objects)
+        )
+        refresh_operation_waves_rollup(operation)
+        bump_operation_change_version(operation)
         db.session.commit()
 
         return operation_details_models
 
+    @staticmethod
+    def _create_rac_nodes_counters(operation, db_mappings_objects):
+        """Return RacNodesCounter for every RAC db of the operation."""
+        return [
+            RacNodesCounter(
+                operation_id=operation.id,
+                db_id=obj.db.id,
+                total_nodes=len([m for m in obj.mappings if m]),
+                finished_nodes=0,
+                complete_nodes=0,
+                failed_nodes=0,
+            )
+            for obj in db_mappings_objects
+            if obj.db.is_rac and any(obj.mappings)
+        ]
+
     def _validate_db_mappings_objects(self, db_mappings_objects):
         if not db_mappings_objects \
                 or not self._count_total_targets(db_mappings_objects):
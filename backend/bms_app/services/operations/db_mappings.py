@@ -65,7 +65,7 @@ def generate_db_mappings_objects(qs):
             DbMapping(
                 db=obj['db'],
                 mappings=obj['mappings'],
-                is_dms=obj['is_dms'],
+                is_dms=obj.get('is_dms', False),
             )
         )
 
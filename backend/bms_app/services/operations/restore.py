@@ -26,6 +26,7 @@ from bms_app.services.ansible.restore import (
     AnsibleFailOverConfigService, AnsiblePreRestoreConfigService,
     AnsibleRestoreConfigService, AnsibleRollbackRestoreConfigService
 )
+from bms_app.services.change_version import bump_source_dbs_change_version
 from bms_app.services.control_node import (
     FailOverControlNodeService, PreRestoreControlNodeService,
     RestoreControlNodeService, RollbackRestoreControlNodeService
@@ -41,6 +42,7 @@ from bms_app.services.status_handlers.operation import (
 from bms_app.services.status_handlers.operation_detail import (
     PreRestoreOperationDetailStatusHandler
 )
+from bms_app.services.wave_rollup import apply_wave_status_change
 
 from .base import BaseOperation
 from .db_mappings import get_restore_db_mappings_objects
@@ -173,8 +175,12 @@ class BaseRestoreOperation(BaseOperation):
 
     @classmethod
     def _set_source_db_status(cls, source_db):
+        apply_wave_status_change(
+            source_db.wave_id, source_db.status, cls.IN_PROGRESS_STATUS
+        )
         source_db.status = cls.IN_PROGRESS_STATUS
         db.session.add(source_db)
+        bump_source_dbs_change_version([source_db])
         db.session.commit()
 
     def get_control_node_context(self, source_db,
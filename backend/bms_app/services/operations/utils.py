@@ -12,6 +12,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from collections import OrderedDict
+
 from bms_app.models import (
     PRE_RESTORE_ALLOWED_STATUSES, RESTORE_ALLOWED_STATUSES, SourceDBStatus
 )
@@ -45,3 +47,33 @@ def is_pre_restore_allowed(source_db):
         and source_db.restore_config.is_configured \
         and source_db.restore_config.run_pre_restore \
         and source_db.status in PRE_RESTORE_ALLOWED_STATUSES
+
+
+def split_into_shards(db_mappings_objects, max_targets):
+    """Split db mappings into shards having up to max_targets targets.
+
+    Mappings of the same db (e.g. all RAC nodes) are kept in one shard
+    even if they exceed max_targets. Biggest dbs are placed first,
+    each to the least loaded shard where it fits.
+    """
+    groups = OrderedDict()
+    for obj in db_mappings_objects:
+        groups.setdefault(obj.db.id, []).append(obj)
+
+    def count_targets(objs):
+        return sum(len(x.mappings) for x in objs)
+
+    shards = []  # [[targets, db_mappings_objects], ...]
+    for objs in sorted(groups.values(), key=count_targets, reverse=True):
+        targets = count_targets(objs)
+        fitting = [x for x in shards if x[0] + targets <= max_targets]
+        if fitting:
+            shard = min(fitting, key=lambda x: x[0])
+        else:
+            shard = [0, []]
+            shards.append(shard)
+
+        shard[0] += targets
+        shard[1].extend(objs)
+
+    return [x[1] for x in shards]
@@ -13,6 +13,7 @@
 # limitations under the License.
 
 import logging
+import os
 from datetime import datetime
 
 from marshmallow import ValidationError
@@ -20,6 +21,7 @@ from marshmallow import ValidationError
 from bms_app.models import SourceDB, Config, OperationType, Wave, db
 from bms_app.schema import DMSConfigSchema
 from bms_app.services.ansible import AnsibleConfigService
+from bms_app.services.change_version import bump_source_dbs_change_version
 from bms_app.services.control_node import (
     DeployControlNodeService, RollbackConrolNodeService
 )
@@ -27,15 +29,16 @@ from bms_app.services.status_handlers.operation import (
     DeploymentOperationStatusHandler
 )
 from bms_app.services.dms import DMS
+from bms_app.services.gcloud_clients import get_secrets_client
 from bms_app import settings
 from google.cloud import secretmanager
 
 from .base import BaseOperation
 from .db_mappings import get_wave_db_mappings_objects
+from .utils import split_into_shards
 
 
 logger = logging.getLogger(__name__)
-secrets_client = secretmanager.SecretManagerServiceClient()
 
 
 class BaseWaveOperation(BaseOperation):
@@ -101,6 +104,7 @@ class BaseWaveOperation(BaseOperation):
         schema = DMSConfigSchema()
         dms_config: DMSConfigSchema = schema.load(config.dms_config_values)
         if dms_config['password_secret_id']:
+            secrets_client = get_secrets_client()
             req = secretmanager.AccessSecretVersionRequest(
                 name=secrets_client.secret_version_path(settings.GCP_PROJECT_NAME, dms_config['password_secret_id'], "latest")
             )
@@ -168,20 +172,74 @@ class BaseWaveOperation(BaseOperation):
             operation_id=operation.id
         )
 
-        # generate and upload ansible config files
-        AnsibleConfigService(
-            bms_mappings,
-            gcs_config_dir
-        ).run()
-
-        # run control node
-        self.CONTROL_NODE_CLS.run(
-            project=wave.project,
-            operation=operation,
-            gcs_config_dir=gcs_config_dir,
-            wave=wave,
-            total_targets=self._count_total_targets(bms_mappings),
-        )
+        shards = self._get_shards(bms_mappings)
+        if len(shards) > 1:
+            operation.shards = len(shards)
+            db.session.add(operation)
+            db.session.commit()
+
+        # generate and upload ansible config files of all shards
+        # before any control node is started
+        shard_contexts = []
+        for shard_ind, shard_mappings in enumerate(shards):
+            if len(shards) > 1:
+                shard_config_dir = os.path.join(
+                    gcs_config_dir, f'shard_{shard_ind}'
+                )
+            else:
+                shard_config_dir = gcs_config_dir
+
+            ansible_config_service = AnsibleConfigService(
+                shard_mappings,
+                shard_config_dir
+            )
+            ansible_config_service.run()
+
+            shard_contexts.append({
+                'gcs_config_dir': shard_config_dir,
+                'wave': wave,
+                'total_targets': self._count_total_targets(shard_mappings),
+                'config_archive': ansible_config_service.config_archive,
+                'shard': shard_ind if len(shards) > 1 else None,
+            })
+
+        # run control nodes
+        started_contexts = []
+        try:
+            for context in shard_contexts:
+                self.CONTROL_NODE_CLS.run(
+                    project=wave.project,
+                    operation=operation,
+                    **context
+                )
+                started_contexts.append(context)
+        except Exception:
+            # operation is failed, so control nodes of started shards
+            # must not run it
+            self._delete_control_nodes(wave, operation, started_contexts)
+            raise
+
+    def _delete_control_nodes(self, wave, operation, contexts):
+        for context in contexts:
+            try:
+                self.CONTROL_NODE_CLS.delete(
+                    project=wave.project,
+                    operation=operation,
+                    **context
+                )
+            except Exception:
+                logger.exception(
+                    'error deleting control node of shard %s', context['shard']
+                )
+
+    @staticmethod
+    def _get_shards(db_mappings_objects):
+        """Return db mappings run by separate control nodes."""
+        max_targets = settings.WAVE_SHARD_MAX_TARGETS
+        if not max_targets:
+            return [db_mappings_objects]
+
+        return split_into_shards(db_mappings_objects, max_targets)
 
     @staticmethod
     def _validate_wave_status(wave):
@@ -229,3 +287,5 @@ class RollbackService(BaseWaveOperation):
         for obj in db_mappings_objects:
             if obj.db.restore_config:
                 db.session.delete(obj.db.restore_config)
+
+        bump_source_dbs_change_version([obj.db for obj in db_mappings_objects])
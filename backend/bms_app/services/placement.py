@@ -0,0 +1,251 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import bisect
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from sqlalchemy import not_
+
+from bms_app.models import (
+    BMSServer, Mapping, SourceDB, SourceDBEngine, SourceDBType, db
+)
+
+
+# "192GB", "1.5TB" -> (1.5, 'TB')
+RAM_RE = re.compile(r'([\d.]+)\s*([GT])B?', re.IGNORECASE)
+
+NO_TARGET = 'no target with enough cpu, ram and disk space'
+NO_RAC_TARGETS = 'not enough targets in one location for all rac nodes'
+
+
+@dataclass
+class PlacementDb:
+    """Resources required by every node of the source db."""
+    id: int
+    cores: int = 0
+    ram: float = 0  # GB
+    db_size: float = 0  # GB
+    nodes: int = 1
+
+
+@dataclass
+class PlacementTarget:
+    """Resources of the free bms server."""
+    id: int
+    cpu: int = 0
+    ram: float = 0  # GB
+    disk: float = 0  # total size of luns, GB
+    location: str = ''
+
+
+@dataclass
+class Placement:
+    mappings: list = field(default_factory=list)  # [{'db_id', 'bms_id': []}]
+    unplaced: list = field(default_factory=list)  # [{'db_id', 'reason'}]
+
+
+def parse_ram(value):
+    """Return ram in GB: '192GB' -> 192, '1.5TB' -> 1536."""
+    match = RAM_RE.match(str(value or '').strip())
+    if not match:
+        return 0
+
+    size, unit = match.groups()
+    return float(size) * (1024 if unit.upper() == 'T' else 1)
+
+
+def get_luns_capacity(luns):
+    """Return total size of luns like DiskSpaceValidator does."""
+    return sum(int(x['size_gb']) for x in luns or [] if x.get('size_gb'))
+
+
+def get_rac_nodes(db_type, rac_nodes, fe_rac_nodes):
+    if db_type != SourceDBType.RAC:
+        return 1
+    return max(fe_rac_nodes or rac_nodes or 0, 1)
+
+
+class PlacementSolver:
+    """Propose bms targets for source dbs.
+
+    Every target hosts one db node. Dbs are placed in decreasing
+    order of required resources (RAC dbs first), each node
+    to the smallest free target having enough cpu, ram and luns capacity:
+    best-fit decreasing keeps the biggest targets for the biggest dbs.
+    All nodes of the RAC db are placed to targets of one location.
+
+    Targets are grouped by location and (cpu, ram) - machine type,
+    every group keeps targets sorted by luns capacity,
+    so a suitable target is found by binary search.
+    """
+
+    def __init__(self, dbs, targets):
+        self.dbs = dbs
+        # {location: [[(cpu, ram), capacities, targets], ...]} sorted by (cpu, ram)
+        self._groups = self._group_targets(targets)
+
+    @staticmethod
+    def _group_targets(targets):
+        groups = defaultdict(lambda: defaultdict(list))
+        for target in targets:
+            groups[target.location][(target.cpu, target.ram)].append(target)
+
+        result = {}
+        for location, machine_groups in groups.items():
+            result[location] = []
+            for machine, machine_targets in sorted(machine_groups.items()):
+                machine_targets.sort(key=lambda x: (x.disk, x.id))
+                result[location].append([
+                    machine,
+                    [x.disk for x in machine_targets],
+                    machine_targets
+                ])
+
+        return result
+
+    def solve(self):
+        placement = Placement()
+
+        dbs = sorted(
+            self.dbs,
+            key=lambda x: (x.nodes, x.cores, x.ram, x.db_size),
+            reverse=True
+        )
+
+        for source_db in dbs:
+            targets = self._place(source_db)
+
+            if targets:
+                placement.mappings.append({
+                    'db_id': source_db.id,
+                    'bms_id': [x.id for x in targets],
+                })
+            else:
+                placement.unplaced.append({
+                    'db_id': source_db.id,
+                    'reason': NO_RAC_TARGETS if source_db.nodes > 1 else NO_TARGET,
+                })
+
+        placement.mappings.sort(key=lambda x: x['db_id'])
+        placement.unplaced.sort(key=lambda x: x['db_id'])
+
+        return placement
+
+    def _place(self, source_db):
+        """Take and return targets for all nodes of the db or None."""
+        best = None  # (cost, location, [(group, index), ...])
+
+        for location, groups in self._groups.items():
+            candidates = self._find_candidates(groups, source_db)
+            if len(candidates) < source_db.nodes:
+                continue
+
+            cost = [group[0] for group, _ in candidates]
+            if best is None or cost < best[0]:
+                best = (cost, location, candidates)
+
+        if best is None:
+            return None
+
+        return self._take(best[2])
+
+    @staticmethod
+    def _find_candidates(groups, source_db):
+        """Return (group, index) of the smallest suitable targets of location."""
+        candidates = []
+
+        for group in groups:
+            (cpu, ram), capacities, _ = group
+            if cpu < source_db.cores or ram < source_db.ram:
+                continue
+
+            index = bisect.bisect_left(capacities, source_db.db_size)
+            while index < len(capacities) and len(candidates) < source_db.nodes:
+                candidates.append((group, index))
+                index += 1
+
+            if len(candidates) == source_db.nodes:
+                break
+
+        return candidates
+
+    @staticmethod
+    def _take(candidates):
+        """Remove targets from their groups, biggest index first."""
+        targets = []
+        for group, index in sorted(candidates, key=lambda x: -x[1]):
+            group[1].pop(index)
+            targets.append(group[2].pop(index))
+
+        return sorted(targets, key=lambda x: x.id)
+
+
+def get_placement_dbs(project_id):
+    """Return not mapped oracle dbs of the project."""
+    mapped_db_ids = db.session.query(Mapping.db_id)
+
+    qs = db.session.query(
+        SourceDB.id, SourceDB.db_type, SourceDB.rac_nodes,
+        SourceDB.fe_rac_nodes, SourceDB.cores, SourceDB.ram, SourceDB.db_size
+    ) \
+        .filter(SourceDB.project_id == project_id,
+                SourceDB.db_engine == SourceDBEngine.ORACLE,
+                not_(SourceDB.id.in_(mapped_db_ids)))
+
+    return [
+        PlacementDb(
+            id=row.id,
+            cores=row.cores or 0,
+            ram=row.ram or 0,
+            db_size=float(row.db_size or 0),
+            nodes=get_rac_nodes(row.db_type, row.rac_nodes, row.fe_rac_nodes)
+        )
+        for row in qs
+    ]
+
+
+def get_placement_targets():
+    """Return not deleted bms servers without mappings."""
+    mapped_bms_ids = db.session.query(Mapping.bms_id)
+
+    qs = db.session.query(
+        BMSServer.id, BMSServer.cpu, BMSServer.ram, BMSServer.luns,
+        BMSServer.location
+    ) \
+        .filter(BMSServer.deleted.isnot(True),
+                not_(BMSServer.id.in_(mapped_bms_ids)))
+
+    return [
+        PlacementTarget(
+            id=row.id,
+            cpu=int(row.cpu) if (row.cpu or '').isdigit() else 0,
+            ram=parse_ram(row.ram),
+            disk=get_luns_capacity(row.luns),
+            location=row.location or ''
+        )
+        for row in qs
+    ]
+
+
+def propose_placement(project_id):
+    """Return proposed mappings of not mapped dbs of the project.
+
+    Mappings can be saved by the bulk mappings api as is.
+    """
+    return PlacementSolver(
+        get_placement_dbs(project_id),
+        get_placement_targets()
+    ).solve()
@@ -12,13 +12,17 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import re
+
 from bms_app import settings
 from bms_app.services.gcs import blob_exists, get_file_content
 
 
 class RmanLogFileError(Exception):
-    def __init__(self, errors):
+    def __init__(self, errors, outputs=None):
         self.errors = errors
+        # {error: output of the failed command}
+        self.outputs = outputs or {}
         super().__init__()
 
 
@@ -37,6 +41,8 @@ class RmanCommandLogParser:
     """
 
     ERROR_WORDS = ['EXPIRED', 'RMAN-', 'ORA-', 'ERROR']
+    # all error words are searched by one scan of the text
+    ERROR_WORDS_RE = re.compile('|'.join(re.escape(x) for x in ERROR_WORDS))
     # list of commands with specific error output
     CMD_WITH_TABLE_STYLE_ERRORS = (
         'report need backup',
@@ -58,7 +64,7 @@ class RmanCommandLogParser:
 
     def _has_error_word(self):
         """Check if contains any of words that means error."""
-        return any(word in self.text for word in self.ERROR_WORDS)
+        return bool(self.ERROR_WORDS_RE.search(self.text))
 
     def _has_table_style_err(self):
         """Check "table" style error.
@@ -86,6 +92,12 @@ class RmanCommandLogParser:
 
 
 class RmanLogFileParser:
+    """Parser of the pre-restore rman log file.
+
+    The file is downloaded and split into commands only once,
+    outputs of the commands are found by the index {cmd: (start, end)}.
+    """
+
     RMAN_FILE_LOCATION = 'control_node_logs/bms_logs_{operation_id}/rman_pre_restore.log'
     COMMANDS_TO_SKIP = ('delete noprompt expired backup')
     RMAN_CMD_PREFIX = 'RMAN>'
@@ -93,21 +105,28 @@ class RmanLogFileParser:
     def __init__(self, operation_id):
         self.operation_id = operation_id
         self._rman_file_content = None
+        self._chunks = None
+        self._index = None
 
     def validate(self):
-        failed_commands = []
+        outputs = self.get_failed_commands()
+        if outputs:
+            raise RmanLogFileError(list(outputs), outputs)
 
-        for chunk in self._split_file():
+    def get_failed_commands(self):
+        """Return {error: command output} of all failed commands."""
+        failed_commands = {}
+
+        for start, end in self._get_chunks():
+            chunk = self.rman_file_content[start:end]
             cmd_parser = RmanCommandLogParser(chunk)
             # skip logs not related to specific rman command
             if cmd_parser.cmd and cmd_parser.cmd not in self.COMMANDS_TO_SKIP:
                 if cmd_parser.has_error():
-                    failed_commands.append(
-                        f'{self.RMAN_CMD_PREFIX} {cmd_parser.cmd}'
-                    )
+                    error = f'{self.RMAN_CMD_PREFIX} {cmd_parser.cmd}'
+                    failed_commands.setdefault(error, cmd_parser.text)
 
-        if failed_commands:
-            raise RmanLogFileError(failed_commands)
+        return failed_commands
 
     @property
     def rman_file_content(self):
@@ -126,15 +145,47 @@ class RmanLogFileParser:
         if cmd.startswith(self.RMAN_CMD_PREFIX):
             cmd = cmd[5:].strip()  # to remove spaces around
 
-        for chunk in self._split_file():
-            cmd_parser = RmanCommandLogParser(chunk)
-            if cmd_parser.cmd == cmd:
-                return chunk
-
-    def _split_file(self):
-        splitted = [x.strip() for x in self.rman_file_content.split(self.RMAN_CMD_PREFIX)]
-        # skip 1-st section that contains some general information
-        return splitted[1:]
+        if self._index is None:
+            self._index = {}
+            for start, end in self._get_chunks():
+                chunk_cmd = self._get_chunk_cmd(start, end)
+                self._index.setdefault(chunk_cmd, (start, end))
+
+        if cmd in self._index:
+            start, end = self._index[cmd]
+            return self.rman_file_content[start:end]
+
+    def _get_chunk_cmd(self, start, end):
+        line_end = self.rman_file_content.find('\n', start, end)
+        if line_end == -1:
+            line_end = end
+        return self.rman_file_content[start:line_end].strip(' ;')
+
+    def _get_chunks(self):
+        """Return (start, end) offsets of the stripped commands outputs."""
+        if self._chunks is None:
+            content = self.rman_file_content
+            offsets = [
+                x.end() for x in re.finditer(re.escape(self.RMAN_CMD_PREFIX), content)
+            ]
+            ends = [x - len(self.RMAN_CMD_PREFIX) for x in offsets[1:]]
+            ends.append(len(content))
+
+            # 1-st section before any command contains some general information
+            self._chunks = [
+                self._strip_offsets(start, end)
+                for start, end in zip(offsets, ends)
+            ]
+
+        return self._chunks
+
+    def _strip_offsets(self, start, end):
+        content = self.rman_file_content
+        while start < end and content[start].isspace():
+            start += 1
+        while end > start and content[end - 1].isspace():
+            end -= 1
+        return start, end
 
     def log_file_exists(self):
         gcs_key = self.RMAN_FILE_LOCATION.format(
@@ -15,6 +15,7 @@
 from marshmallow import ValidationError
 
 from bms_app.models import ScheduledTask, db
+from bms_app.services.change_version import bump_source_db_ids_change_version
 from bms_app.services.gcloud_tasks import delete_task
 
 
@@ -37,4 +38,5 @@ def delete_planned_task(scheduled_task):
     delete_task(scheduled_task.g_task_name)
 
     db.session.delete(scheduled_task)
+    bump_source_db_ids_change_version([scheduled_task.db_id])
     db.session.commit()
@@ -12,9 +12,17 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import json
+
+from sqlalchemy import JSON, cast, func, literal
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm.attributes import flag_modified
 
-from bms_app.models import Mapping, OperationDetails, db
+from bms_app.models import Config, Mapping, OperationDetails, db
+
+
+# misc_config_values keys related to bms target
+MISC_TARGET_PARAMS = ('swap_blk_device', 'oracle_root')
 
 
 def clear_bms_target_params(config):
@@ -25,13 +33,47 @@ def clear_bms_target_params(config):
         config.data_mounts_values = None
         config.asm_config_values = None
         config.rac_config_values = None
-        config.misc_config_values['swap_blk_device'] = None
-        config.misc_config_values['oracle_root'] = None
+        for key in MISC_TARGET_PARAMS:
+            config.misc_config_values[key] = None
         flag_modified(config, "misc_config_values")
 
         db.session.add(config)
 
 
+def _get_cleared_misc_config_values():
+    """Return sql expression setting bms target keys of misc_config_values to null."""
+    if db.engine.dialect.name == 'postgresql':
+        cleared = json.dumps({key: None for key in MISC_TARGET_PARAMS})
+        return cast(
+            cast(Config.misc_config_values, JSONB).op('||')(cast(literal(cleared), JSONB)),
+            JSON
+        )
+
+    args = []
+    for key in MISC_TARGET_PARAMS:
+        args.extend([f'$.{key}', func.json('null')])
+    return func.json_set(Config.misc_config_values, *args)
+
+
+def clear_dbs_bms_target_params(db_ids):
+    """Clear bms target parameters of configs of all dbs by one UPDATE."""
+    if not db_ids:
+        return
+
+    db.session.query(Config) \
+        .filter(Config.db_id.in_(list(db_ids))) \
+        .update(
+            {
+                'is_configured': False,
+                'data_mounts_values': None,
+                'asm_config_values': None,
+                'rac_config_values': None,
+                'misc_config_values': _get_cleared_misc_config_values(),
+            },
+            synchronize_session=False
+        )
+
+
 def does_db_have_operation(db_id):
     """Return is source_db has any operation."""
     operation_exists = db.session.query(Mapping, OperationDetails) \
@@ -39,3 +81,15 @@ def does_db_have_operation(db_id):
         .filter(OperationDetails.mapping_id == Mapping.id) \
         .count()
     return bool(operation_exists)
+
+
+def get_db_ids_with_operation(db_ids):
+    """Return set of ids of source_dbs having any operation."""
+    if not db_ids:
+        return set()
+
+    qs = db.session.query(Mapping.db_id) \
+        .join(OperationDetails, OperationDetails.mapping_id == Mapping.id) \
+        .filter(Mapping.db_id.in_(db_ids)) \
+        .distinct()
+    return {x[0] for x in qs}
@@ -15,6 +15,8 @@
 from bms_app.models import (
     FINISHED_OPERATION_STATUSES, OperationDetails, OperationStatus, Wave, db
 )
+from bms_app.services.change_version import bump_operation_change_version
+from bms_app.services.control_node_pool import release_control_node
 
 from .operation_detail import (
     DeploymentOperationDetailStatusHandler,
@@ -46,6 +48,22 @@ class BaseOperationStatusHandler:
             self._fail_all_operation_details()
             self.finish()
 
+    def terminate_shard(self, shard):
+        """Handle TERMINATED msg of one control node of the sharded operation.
+
+        Operation is finished once control nodes of all shards have
+        terminated, hosts which have not reported the result are failed.
+        """
+        finished_shards = set(self.operation.finished_shards or [])
+        finished_shards.add(shard)
+        self.operation.finished_shards = sorted(finished_shards)
+        db.session.add(self.operation)
+
+        if len(finished_shards) >= self.operation.shards \
+                and self.operation.status not in FINISHED_OPERATION_STATUSES:
+            self._fail_unfinished_operation_details()
+            self.finish()
+
     def finish(self):
         """Make all necessary actions to finish operation."""
         agg_status = self._calc_aggregated_operation_status()
@@ -57,6 +75,10 @@ class BaseOperationStatusHandler:
 
         db.session.add(self.operation)
 
+        release_control_node(self.operation)
+
+        bump_operation_change_version(self.operation)
+
     def _post_finish(self):
         pass
 
@@ -73,6 +95,19 @@ class BaseOperationStatusHandler:
                 self.completed_at
             ).set_fail()
 
+    def _fail_unfinished_operation_details(self):
+        """Set status of OperationDetails without result to FAILED."""
+        qs = db.session.query(OperationDetails) \
+            .filter(OperationDetails.operation_id == self.operation.id,
+                    OperationDetails.status.notin_(FINISHED_OPERATION_STATUSES)) \
+            .all()
+
+        for op_detail in qs:
+            self.OP_DETAILS_STATUS_HANDLER(
+                op_detail,
+                self.completed_at
+            ).set_fail()
+
     def _calc_aggregated_operation_status(self):
         """Return aggregated operation status: 'COMPLETE/FAILED'
 
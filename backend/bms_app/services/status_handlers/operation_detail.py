@@ -15,10 +15,11 @@
 from datetime import datetime
 
 from bms_app.models import (
-    FINISHED_OPERATION_STATUSES, Mapping, OperationDetails,
-    OperationDetailsError, OperationStatus, SourceDB, SourceDBStatus, db
+    Mapping, OperationDetails, OperationDetailsError, OperationStatus,
+    RacNodesCounter, SourceDB, SourceDBStatus, db
 )
 from bms_app.services.rman import RmanLogFileError, RmanLogFileParser
+from bms_app.services.wave_rollup import apply_wave_status_change
 
 
 BMS_TOOLKIT_ERROR = 'bms toolkit error'
@@ -29,6 +30,7 @@ class BaseOperationDetailStatusHandler:
     FAILED_STATUS = None
     COMPLETE_STATUS = None
     PARTIALLY_COMPLETE_STATUS = None
+    TRACK_RAC_NODES = True
 
     def __init__(self, op_detail, completed_at):
         self.op_detail = op_detail
@@ -49,7 +51,7 @@ class BaseOperationDetailStatusHandler:
         if source_db.is_rac:
             self._handle_rac_node_failure(source_db)
         else:
-            source_db.status = self.FAILED_STATUS
+            self._set_source_db_status(source_db, self.FAILED_STATUS)
 
         db.session.add(source_db)
 
@@ -59,6 +61,15 @@ class BaseOperationDetailStatusHandler:
 
     def set_status(self, status, set_completed_at=False):
         """Set status only."""
+        source_db = self.op_detail.mapping.source_db
+        if self.TRACK_RAC_NODES and source_db.is_rac:
+            # counters are loaded before the status is changed
+            # so lazily created ones reflect the previous state
+            self._get_rac_nodes_counter(source_db).apply_status_change(
+                self._as_status(self.op_detail.status),
+                self._as_status(status)
+            )
+
         self.op_detail.status = status
         if set_completed_at:
             self.op_detail.completed_at = self.completed_at
@@ -79,9 +90,8 @@ class BaseOperationDetailStatusHandler:
 
     def _handle_rac_node_failure(self, source_db):
         """Set the status only when all rac nodes have already finished."""
-        all_nodes_statuses = self._get_all_rac_nodes_statuses(source_db)
-        if self._all_rac_nodes_have_finished(all_nodes_statuses):
-            source_db.status = self.FAILED_STATUS
+        if self._get_rac_nodes_counter(source_db).all_finished:
+            self._set_source_db_status(source_db, self.FAILED_STATUS)
 
     def _update_source_db_status_value(self, source_db):
         """Update SourceDb.status.
@@ -92,17 +102,51 @@ class BaseOperationDetailStatusHandler:
         set it to SourceDBStatus.FAILED in other case.
         """
         if source_db.is_rac:
-            all_nodes_statuses = self._get_all_rac_nodes_statuses(source_db)
-            if self._all_rac_nodes_have_finished(all_nodes_statuses):
-                if self._all_rac_nodes_complete(all_nodes_statuses):
-                    source_db.status = self.COMPLETE_STATUS
+            counter = self._get_rac_nodes_counter(source_db)
+            if counter.all_finished:
+                if counter.all_complete:
+                    self._set_source_db_status(source_db, self.COMPLETE_STATUS)
                 else:
-                    source_db.status = self.FAILED_STATUS
+                    self._set_source_db_status(source_db, self.FAILED_STATUS)
         else:
-            source_db.status = self.COMPLETE_STATUS
+            self._set_source_db_status(source_db, self.COMPLETE_STATUS)
 
         db.session.add(source_db)
 
+    @staticmethod
+    def _set_source_db_status(source_db, status):
+        """Set SourceDB.status and move it between wave rollup counters."""
+        apply_wave_status_change(source_db.wave_id, source_db.status, status)
+        source_db.status = status
+
+    def _get_rac_nodes_counter(self, source_db):
+        """Return RacNodesCounter of the db within the operation.
+
+        Operations started before the counters were introduced
+        don't have it, so it is created from the current nodes statuses.
+        """
+        counter = db.session.query(RacNodesCounter) \
+            .filter(RacNodesCounter.operation_id == self.op_detail.operation_id,
+                    RacNodesCounter.db_id == source_db.id) \
+            .first()
+
+        if not counter:
+            counter = RacNodesCounter(
+                operation_id=self.op_detail.operation_id,
+                db_id=source_db.id,
+                total_nodes=0,
+                finished_nodes=0,
+                complete_nodes=0,
+                failed_nodes=0
+            )
+            for status in self._get_all_rac_nodes_statuses(source_db):
+                counter.total_nodes += 1
+                counter.apply_status_change(None, status)
+
+            db.session.add(counter)
+
+        return counter
+
     def _get_all_rac_nodes_statuses(self, source_db):
         oph_statuses = db.session.query(OperationDetails.status) \
             .outerjoin(Mapping) \
@@ -113,16 +157,10 @@ class BaseOperationDetailStatusHandler:
         return [x[0] for x in oph_statuses]
 
     @staticmethod
-    def _all_rac_nodes_have_finished(all_nodes_statuses):
-        """Return True/False if all rac nodes finished their operations."""
-        return all(
-            (x in FINISHED_OPERATION_STATUSES for x in all_nodes_statuses)
-        )
-
-    @staticmethod
-    def _all_rac_nodes_complete(all_nodes_statuses):
-        """Return True/False if all rac nodes finished successfully."""
-        return all(x == OperationStatus.COMPLETE for x in all_nodes_statuses)
+    def _as_status(status):
+        if status is None or isinstance(status, OperationStatus):
+            return status
+        return OperationStatus(status)
 
 
 class DeploymentOperationDetailStatusHandler(BaseOperationDetailStatusHandler):
@@ -142,18 +180,24 @@ class PreRestoreOperationDetailStatusHandler(BaseOperationDetailStatusHandler):
 
         if rmp.log_file_exists():
             try:
-                RmanLogFileParser(self.op_detail.operation_id).validate()
+                rmp.validate()
             except RmanLogFileError as exc:
-                self._save_validation_errors(exc.errors)
+                self._save_validation_errors(exc.errors, exc.outputs)
+
+    def _save_validation_errors(self, errors, outputs=None):
+        """Save errors with outputs of failed commands.
 
-    def _save_validation_errors(self, errors):
+        Outputs are saved to not download and parse rman log file again.
+        """
+        outputs = outputs or {}
         models = []
 
         for err in errors:
             models.append(
                 OperationDetailsError(
                     operation_details_id=self.op_detail.id,
-                    message=err
+                    message=err,
+                    details=outputs.get(err)
                 )
             )
 
@@ -201,22 +245,20 @@ class RestoreOperationDetailStatusHandler(BaseOperationDetailStatusHandler):
 
     def _update_source_db_status_value(self, source_db):
         if source_db.is_rac:
-            all_nodes_statuses = self._get_all_rac_nodes_statuses(source_db)
-            if self._all_rac_nodes_have_finished(all_nodes_statuses):
-                if self._all_rac_nodes_complete(all_nodes_statuses):
-                    source_db.status = self.COMPLETE_STATUS
+            counter = self._get_rac_nodes_counter(source_db)
+            if counter.all_finished:
+                if counter.all_complete:
+                    self._set_source_db_status(source_db, self.COMPLETE_STATUS)
                 else:
                     self._set_restore_db_status(source_db)
         else:
-            source_db.status = self.COMPLETE_STATUS
+            self._set_source_db_status(source_db, self.COMPLETE_STATUS)
 
         db.session.add(source_db)
 
     def _handle_rac_node_failure(self, source_db):
         """Set the status only when all rac nodes have already finished."""
-
-        all_nodes_statuses = self._get_all_rac_nodes_statuses(source_db)
-        if self._all_rac_nodes_have_finished(all_nodes_statuses):
+        if self._get_rac_nodes_counter(source_db).all_finished:
             self._set_restore_db_status(source_db)
 
     def _set_restore_db_status(self, source_db):
@@ -226,9 +268,9 @@ class RestoreOperationDetailStatusHandler(BaseOperationDetailStatusHandler):
             .filter(SourceDB.id == self.op_detail.mapping.source_db.id) \
             .filter(Mapping.rac_node == 0).first()
         if first_node.status == OperationStatus.FAILED:
-            source_db.status = self.FAILED_STATUS
+            self._set_source_db_status(source_db, self.FAILED_STATUS)
         else:
-            source_db.status = self.PARTIALLY_COMPLETE_STATUS
+            self._set_source_db_status(source_db, self.PARTIALLY_COMPLETE_STATUS)
 
 
 class RollbackOperationDetailStatusHandler(BaseOperationDetailStatusHandler):
@@ -241,6 +283,7 @@ class RollbackRestoreOperationDetailStatusHandler(BaseOperationDetailStatusHandl
     """Handler to process Rollback Restore OperationDetails status/step changes."""
     FAILED_STATUS = SourceDBStatus.DT_FAILED
     COMPLETE_STATUS = SourceDBStatus.DEPLOYED
+    TRACK_RAC_NODES = False
 
     def _handle_rac_node_failure(self, source_db):
         raise NotImplementedError
@@ -253,6 +296,7 @@ class FailOverOperationDetailStatusHandler(BaseOperationDetailStatusHandler):
     """Handler to process Failover OperationDetails status/step changes."""
     FAILED_STATUS = SourceDBStatus.FAILOVER_FAILED
     COMPLETE_STATUS = SourceDBStatus.FAILOVER_COMPLETE
+    TRACK_RAC_NODES = False
 
     def _handle_rac_node_failure(self, source_db):
         raise NotImplementedError
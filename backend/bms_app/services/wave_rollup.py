@@ -0,0 +1,220 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from sqlalchemy import case, func
+
+from bms_app.models import (
+    DEPLOYED_STATUSES, Mapping, Operation, OperationDetails, SourceDB,
+    SourceDBStatus, WaveRollup, db
+)
+from bms_app.wave_steps import DEPLOYMENT_STEPS, ROLLBACK_STEPS
+
+
+def get_wave_steps(operation):
+    if operation.is_deployment:
+        return DEPLOYMENT_STEPS
+
+    if operation.is_rollback:
+        return ROLLBACK_STEPS
+
+    return []
+
+
+def wave_rate_info(wave_id):
+    """Calculate of undeployed, deployed and failed db for each wave."""
+    undeployed_db = 0
+    deployed_db = 0
+    failed_db = 0
+
+    rate_info = db.session.query(SourceDB.status, func.count()) \
+        .filter(SourceDB.wave_id == wave_id) \
+        .group_by(SourceDB.status) \
+        .all()
+
+    if rate_info:
+        undeployed_db = sum((x[1] for x in rate_info if x[0] in SourceDB.DEPLOYABLE_STATUSES), 0)
+        deployed_db = sum((x[1] for x in rate_info if x[0] in DEPLOYED_STATUSES), 0)
+        failed_db = next((x[1] for x in rate_info if x[0] == SourceDBStatus.FAILED), 0)
+
+    return {
+        'undeployed': undeployed_db,
+        'deployed': deployed_db,
+        'failed': failed_db
+    }
+
+
+def get_step_data(operation):
+    """Return current/total step number of the operation."""
+    all_steps = db.session.query(OperationDetails.step). \
+        filter(OperationDetails.operation_id == operation.id). \
+        distinct(). \
+        all()
+    all_steps = [x[0] for x in all_steps]
+    wave_steps = get_wave_steps(operation)
+
+    last_step_index = 0
+    # find the latest step within all_steps
+    for ind, item in enumerate(wave_steps, 1):
+        if item['id'] in all_steps:
+            last_step_index = ind
+
+    return {
+        'curr_step': last_step_index,
+        'total_steps': len(wave_steps)
+    }
+
+
+def refresh_wave_rollup(wave_id):
+    """Recalculate WaveRollup of the wave.
+
+    Must be called whenever SourceDB.wave_id is changed
+    or an operation of the wave is started, status/step messages
+    update the rollup by deltas.
+    """
+    rollup = db.session.query(WaveRollup).get(wave_id)
+    if not rollup:
+        rollup = WaveRollup(wave_id=wave_id)
+
+    status_rate = wave_rate_info(wave_id)
+    rollup.undeployed_dbs = status_rate['undeployed']
+    rollup.deployed_dbs = status_rate['deployed']
+    rollup.failed_dbs = status_rate['failed']
+
+    last_op = db.session.query(Operation) \
+        .filter(Operation.wave_id == wave_id) \
+        .order_by(Operation.id.desc()) \
+        .first()
+    step_data = get_step_data(last_op) if last_op else {}
+    rollup.curr_step = step_data.get('curr_step', 0)
+    rollup.total_steps = step_data.get('total_steps', 0)
+
+    db.session.add(rollup)
+
+    return rollup
+
+
+def refresh_waves_rollup(wave_ids):
+    """Recalculate WaveRollup of every wave, empty ids are skipped."""
+    for wave_id in sorted({x for x in wave_ids if x}):
+        refresh_wave_rollup(wave_id)
+
+
+def refresh_operation_waves_rollup(operation):
+    """Recalculate WaveRollup of waves affected by the operation.
+
+    Restore operations are not bound to the wave
+    but they change status of dbs that may belong to one.
+    """
+    qs = db.session.query(SourceDB.wave_id) \
+        .join(Mapping, Mapping.db_id == SourceDB.id) \
+        .join(OperationDetails, OperationDetails.mapping_id == Mapping.id) \
+        .filter(OperationDetails.operation_id == operation.id) \
+        .distinct()
+
+    refresh_waves_rollup([operation.wave_id] + [x[0] for x in qs])
+
+
+def create_wave_rollup(wave):
+    """Add empty WaveRollup of the newly created wave."""
+    rollup = WaveRollup(
+        wave=wave,
+        undeployed_dbs=0,
+        deployed_dbs=0,
+        failed_dbs=0,
+        curr_step=0,
+        total_steps=0
+    )
+    db.session.add(rollup)
+
+    return rollup
+
+
+def get_status_rate_column(status):
+    """Return WaveRollup column counting dbs with the status."""
+    if status is None:
+        return None
+
+    status = SourceDBStatus(getattr(status, 'value', status))
+
+    if status in SourceDB.DEPLOYABLE_STATUSES:
+        return WaveRollup.undeployed_dbs
+    if status in DEPLOYED_STATUSES:
+        return WaveRollup.deployed_dbs
+    if status == SourceDBStatus.FAILED:
+        return WaveRollup.failed_dbs
+
+    return None
+
+
+def apply_wave_status_change(wave_id, old_status, new_status):
+    """Move the db between WaveRollup counters by one UPDATE.
+
+    Counters are changed in the db, so concurrent messages
+    of the same wave don't overwrite each other.
+    """
+    old_column = get_status_rate_column(old_status)
+    new_column = get_status_rate_column(new_status)
+
+    if not wave_id or old_column is new_column:
+        return
+
+    values = {}
+    if old_column is not None:
+        values[old_column.key] = old_column - 1
+    if new_column is not None:
+        values[new_column.key] = new_column + 1
+
+    db.session.query(WaveRollup) \
+        .filter(WaveRollup.wave_id == wave_id) \
+        .update(values, synchronize_session=False)
+
+
+def apply_wave_step(operation, step):
+    """Move WaveRollup.curr_step forward to the step of the operation.
+
+    Only the latest operation of the wave is shown,
+    steps of the previous ones are ignored.
+    """
+    wave_steps = get_wave_steps(operation)
+    step_index = next(
+        (ind for ind, item in enumerate(wave_steps, 1) if item['id'] == step),
+        0
+    )
+
+    if not operation.wave_id or not step_index:
+        return
+
+    newer_operation = db.session.query(Operation.id) \
+        .filter(Operation.wave_id == operation.wave_id,
+                Operation.id > operation.id) \
+        .exists()
+
+    db.session.query(WaveRollup) \
+        .filter(WaveRollup.wave_id == operation.wave_id, ~newer_operation) \
+        .update(
+            {
+                'curr_step': case(
+                    (WaveRollup.curr_step < step_index, step_index),
+                    else_=WaveRollup.curr_step
+                ),
+                'total_steps': len(wave_steps),
+            },
+            synchronize_session=False
+        )
+
+
+def delete_waves_rollup(wave_ids):
+    db.session.query(WaveRollup) \
+        .filter(WaveRollup.wave_id.in_(wave_ids)) \
+        .delete(synchronize_session=False)
@@ -62,5 +62,75 @@ GCS_ORACLE_BINARY_PREFIX = get_config_value('GCS_ORACLE_BINARY_PREFIX', default=
 GCP_OAUTH_CLIENT_ID = get_config_value('GCP_OAUTH_CLIENT_ID')
 GCP_LB_URL = get_config_value('GCP_LB_URL')
 
+# "postgres" uses LISTEN/NOTIFY to deliver operation events (SSE)
+# across all workers/instances, "local" delivers them only within
+# the process and must be used only with a single process (tests, dev)
+OPERATION_EVENTS_BACKEND = get_config_value('OPERATION_EVENTS_BACKEND', default='postgres')
+# seconds between keep-alive comments of the operation events stream
+OPERATION_EVENTS_HEARTBEAT = int(get_config_value('OPERATION_EVENTS_HEARTBEAT', default=15))
+# seconds after which the stream is closed and the client reconnects
+OPERATION_EVENTS_MAX_LIFETIME = int(get_config_value('OPERATION_EVENTS_MAX_LIFETIME', default=300))
+# max number of open streams per process, every stream holds
+# one gunicorn thread so it must be less than the number of threads
+OPERATION_EVENTS_MAX_STREAMS = int(get_config_value('OPERATION_EVENTS_MAX_STREAMS', default=4))
+# milliseconds the client waits before reconnecting to the closed stream
+OPERATION_EVENTS_RETRY = int(get_config_value('OPERATION_EVENTS_RETRY', default=3000))
+
+# number of threads processing uploaded files (import jobs)
+IMPORT_JOBS_WORKERS = int(get_config_value('IMPORT_JOBS_WORKERS', default=2))
+# seconds during which the same uploaded file returns the existing job
+IMPORT_JOBS_IDEMPOTENCY_TTL = int(get_config_value('IMPORT_JOBS_IDEMPOTENCY_TTL', default=3600))
+# seconds without progress after which pending/running job is treated as lost
+IMPORT_JOBS_STALE_TIMEOUT = int(get_config_value('IMPORT_JOBS_STALE_TIMEOUT', default=900))
+
+# "parallel" uploads ansible config files by several threads,
+# "archive" uploads all of them as one tar.gz unpacked by the control node
+ANSIBLE_CONFIG_UPLOAD_MODE = get_config_value('ANSIBLE_CONFIG_UPLOAD_MODE', default='parallel')
+# max number of ansible config files uploaded at once
+ANSIBLE_CONFIG_UPLOAD_WORKERS = int(get_config_value('ANSIBLE_CONFIG_UPLOAD_WORKERS', default=8))
+
+# max number of BMS instances details requested at once during discovery
+BMS_DISCOVERY_WORKERS = int(get_config_value('BMS_DISCOVERY_WORKERS', default=8))
+
+# max size (bytes) of GCS files (pfile, rman logs) cached in memory
+GCS_CACHE_MAX_SIZE = int(get_config_value('GCS_CACHE_MAX_SIZE', default=64 * 1024 * 1024))
+# local directory to cache GCS files, disabled if empty
+GCS_CACHE_DIR = get_config_value('GCS_CACHE_DIR', default='')
+
+# GCS key (within GCS_BUCKET) of the pinned bms-toolkit tar.gz,
+# control nodes clone the toolkit from github if it is not set
+BMS_TOOLKIT_ARTIFACT = get_config_value('BMS_TOOLKIT_ARTIFACT', default='')
+# image of control nodes, might be pre-baked image with toolkit dependencies
+CONTROL_NODE_IMAGE_PROJECT = get_config_value('CONTROL_NODE_IMAGE_PROJECT', default='centos-cloud')
+CONTROL_NODE_IMAGE_FAMILY = get_config_value('CONTROL_NODE_IMAGE_FAMILY', default='centos-7')
+# number of idle control nodes kept per project for restore/failover
+# operations, 0 disables the pool and every operation starts a new node
+CONTROL_NODE_POOL_SIZE = int(get_config_value('CONTROL_NODE_POOL_SIZE', default=0))
+CONTROL_NODE_POOL_MACHINE_TYPE = get_config_value('CONTROL_NODE_POOL_MACHINE_TYPE', default='e2-medium')
+# seconds after which idle pool node is deleted
+CONTROL_NODE_POOL_IDLE_TTL = int(get_config_value('CONTROL_NODE_POOL_IDLE_TTL', default=3600))
+# number of operations after which pool node is replaced with a new one
+CONTROL_NODE_POOL_MAX_LEASES = int(get_config_value('CONTROL_NODE_POOL_MAX_LEASES', default=20))
+# seconds between checks for the assigned operation by pool node
+CONTROL_NODE_POOL_POLL_INTERVAL = int(get_config_value('CONTROL_NODE_POOL_POLL_INTERVAL', default=5))
+# seconds between heartbeats sent by pool node
+CONTROL_NODE_POOL_HEARTBEAT_INTERVAL = int(get_config_value('CONTROL_NODE_POOL_HEARTBEAT_INTERVAL', default=60))
+# seconds without heartbeat after which pool node is treated as dead
+CONTROL_NODE_POOL_HEARTBEAT_TIMEOUT = int(get_config_value('CONTROL_NODE_POOL_HEARTBEAT_TIMEOUT', default=300))
+# seconds given to the new pool node to send the 1-st heartbeat
+CONTROL_NODE_POOL_BOOT_TIMEOUT = int(get_config_value('CONTROL_NODE_POOL_BOOT_TIMEOUT', default=900))
+# seconds after which the operation of pool node is failed
+CONTROL_NODE_POOL_LEASE_TIMEOUT = int(get_config_value('CONTROL_NODE_POOL_LEASE_TIMEOUT', default=21600))
+# max number of targets of one control node, waves having more targets
+# are split into shards run by separate control nodes, 0 disables sharding
+WAVE_SHARD_MAX_TARGETS = int(get_config_value('WAVE_SHARD_MAX_TARGETS', default=0))
+# number of rows deleted and committed at once by project delete,
+# 0 deletes all data of the project in one transaction
+PROJECT_DELETE_CHUNK_SIZE = int(get_config_value('PROJECT_DELETE_CHUNK_SIZE', default=0))
+# seconds of db deployment assumed by wave planner if there is no history
+WAVE_PLANNER_DEFAULT_DURATION = int(get_config_value('WAVE_PLANNER_DEFAULT_DURATION', default=7200))
+# seconds during which zone of the region and control node image are cached
+GCE_RESOLUTION_CACHE_TTL = int(get_config_value('GCE_RESOLUTION_CACHE_TTL', default=3600))
+
 # log to gcloud logging
 USE_GCLOUD_LOGGING = get_config_value('USE_GCLOUD_LOGGING', default=False)
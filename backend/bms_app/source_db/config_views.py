@@ -16,6 +16,7 @@ from flask import request
 
 from bms_app.models import Config, db
 from bms_app.schema import ConfigSchema
+from bms_app.services.change_version import bump_source_db_ids_change_version
 from bms_app.source_db import bp
 from bms_app.source_db.services import SaveSourceDBConfigService
 
@@ -38,6 +39,7 @@ def config_delete(db_id):
 
     if config:
         db.session.delete(config)
+        bump_source_db_ids_change_version([db_id])
         db.session.commit()
 
     return {}, 204
@@ -15,8 +15,7 @@
 import math
 import re
 
-import numpy as np
-import pandas as pd
+import openpyxl
 
 
 class MigvisorFileError(Exception):
@@ -67,111 +66,226 @@ class MigvisorParser:
         '11.2': '11.2.0.4.0'
     }
 
+    DB_FEATURES = (RAC_FEATURE, DB_FULL_VERSION, PSU_INSTALLED, ASM_DISKGROUPS)
+    ASM_COLUMNS = {
+        'ALLOC_SIZE': 'au_size',
+        'DG_NAME': 'diskgroup',
+        'REDUNDANCY': 'redundancy',
+    }
+    ASM_MISC_COLUMNS = {
+        'COMPAT': 'compatible_asm',
+        'DB_COMPAT': 'compatible_rdbms',
+    }
+    REDUNDANCY_NAMES = {
+        'EXTEND': 'EXTENDED',
+        'EXTERN': 'EXTERNAL'
+    }
+
     def __init__(self, file_path):
         self.file_path = file_path
 
     def parse(self):
         """Return list of parsed databases."""
         wb = self._read_workbook()
-        db_data = self._parse_databases_sheet(wb)
-        self._validate_data(db_data)
-        self._extend_db_data(wb, db_data)
+        try:
+            db_data = self._parse_databases_sheet(wb)
+            self._validate_data(db_data)
+            self._extend_db_data(wb, db_data)
+        finally:
+            wb.close()
         return db_data
 
     def _read_workbook(self):
-        """Read excel file."""
+        """Open excel file in read-only mode.
+
+        Rows are read lazily so memory doesn't grow with the file size.
+        """
         try:
-            return pd.ExcelFile(self.file_path)
+            return openpyxl.load_workbook(
+                self.file_path,
+                read_only=True,
+                data_only=True
+            )
         except Exception as exc:
             raise MigvisorFileFormatError('Incorrect file format') from exc
 
     def _parse_databases_sheet(self, wb):
         """Parse data from "Database Servers" tab."""
-        df = self._read_database_sheet_to_df(wb)
-        return self._convert_db_df_to_data(df)
+        if self.DATABASE_SERVERS_SHEET not in wb.sheetnames:
+            raise MigvisorFileDataError(
+                f'No {self.DATABASE_SERVERS_SHEET} sheet found'
+            )
+
+        rows = wb[self.DATABASE_SERVERS_SHEET].iter_rows(values_only=True)
+
+        # rows before headers are consumed by the search
+        columns = self._find_header_columns(rows)
+
+        if columns is None:
+            raise MigvisorFileDataError('Headers row not found')
+
+        db_data = [
+            self._convert_db_row(columns, row)
+            for row in rows
+            # skip completely empty rows
+            if any(self._cell_value(x) is not None for x in row)
+        ]
+
+        if not db_data:
+            raise MigvisorFileDataError('No database found')
+
+        return db_data
+
+    def _find_header_columns(self, rows):
+        """Find the row with headers and return {column index: field}.
+
+        It might be in different row depending on migvizor version.
+        Look for the row that contains 'server' and 'database name' values.
+        """
+        for row in rows:
+            values = [x.lower() if isinstance(x, str) else None for x in row]
+
+            if all((x in values for x in ('server', 'database name'))):
+                columns = {}
+                for ind, value in enumerate(values):
+                    field = self.COLUMNS_MAP.get(value, value)
+                    if field in self.COLUMNS_TO_PARSE and field not in columns.values():
+                        columns[ind] = field
+                return columns
+
+        return None
+
+    def _convert_db_row(self, columns, row):
+        """Convert "Database Servers" row to dict data."""
+        item = dict.fromkeys(self.COLUMNS_TO_PARSE)
+
+        for ind, field in columns.items():
+            if ind < len(row):
+                item[field] = self._cell_value(row[ind])
+
+        # make sure 'oracle_version' is string
+        if item['oracle_version'] is not None:
+            item['oracle_version'] = str(item['oracle_version'])
+
+        if item['db_engine'] is not None:
+            item['db_engine'] = str(item['db_engine']).upper()
+
+        return item
+
+    @staticmethod
+    def _cell_value(value):
+        """Return cell value converted the same way pandas does."""
+        if value == '':
+            return None
+
+        # excel stores all numbers as float
+        if isinstance(value, float) and value.is_integer():
+            return int(value)
+
+        return value
 
     def _extend_db_data(self, wb, db_data):
         """Add db specific parameters.
 
         Db parameters are defined in sheets which names start with "#" symbol.
         #-sheets order corresponds to db order in the Databases sheet.
-        Read each #sheet and extract necessary data.
+        Read each #sheet once and extract necessary data.
         """
-        wb_sheet_names = [n for n in wb.sheet_names if n.startswith('#')]
+        wb_sheet_names = [n for n in wb.sheetnames if n.startswith('#')]
+
+        for db_item, sheet_name in zip(db_data, wb_sheet_names):
+            features = self._read_db_features(wb[sheet_name])
+
+            db_item.update({
+                'rac_nodes': features[self.RAC_FEATURE],
+                'oracle_version': self._full_db_version(
+                    features[self.DB_FULL_VERSION],
+                    db_item
+                ),
+                'oracle_release': self._oracle_release(
+                    features[self.PSU_INSTALLED]
+                ),
+            })
 
-        for ind, sheet_name in enumerate(wb_sheet_names):
-            df = wb.parse(sheet_name)
+            db_item.update(
+                self._parse_asm_diskgroup_data(features[self.ASM_DISKGROUPS])
+            )
 
-            rac_nodes = self._get_rac_nodes(df)
-            db_full_version = self._full_db_version(df, db_data[ind])
-            oracle_release = self._add_oracle_release(df)
-            asm_dg_data = self._parse_asm_diskgroup_data(df)
+    def _read_db_features(self, ws):
+        """Collect all necessary features of #sheet in one pass.
 
-            db_data[ind].update({
-                'rac_nodes': rac_nodes,
-                'oracle_version': db_full_version,
-                'oracle_release': oracle_release,
-            })
+        Return number of RAC nodes, first values of db version/PSU
+        and all ASM diskgroups values.
+        """
+        features = {
+            self.RAC_FEATURE: 0,
+            self.DB_FULL_VERSION: None,
+            self.PSU_INSTALLED: None,
+            self.ASM_DISKGROUPS: [],
+        }
 
-            db_data[ind].update(asm_dg_data)
+        rows = ws.iter_rows(values_only=True)
+        headers = next(rows, None) or ()
 
-    def _parse_asm_diskgroup_data(self, df):
-        """Parse oracle asm diskgroup data."""
-        asm_columns = {
-            'ALLOC_SIZE': 'au_size',
-            'DG_NAME': 'diskgroup',
-            'REDUNDANCY': 'redundancy',
-        }
-        misc_columns = {
-            'COMPAT': 'compatible_asm',
-            'DB_COMPAT': 'compatible_rdbms',
-        }
-        redundancy_names = {
-            'EXTEND': 'EXTENDED',
-            'EXTERN': 'EXTERNAL'
-        }
+        if 'Feature' not in headers or 'Value' not in headers:
+            return features
+
+        feature_ind = headers.index('Feature')
+        value_ind = headers.index('Value')
+
+        for row in rows:
+            feature = row[feature_ind] if feature_ind < len(row) else None
+
+            if feature not in self.DB_FEATURES:
+                continue
+
+            value = self._cell_value(row[value_ind]) if value_ind < len(row) else None
+
+            if feature == self.RAC_FEATURE:
+                features[feature] += 1
+
+            elif feature == self.ASM_DISKGROUPS:
+                if value is not None:
+                    features[feature].append(str(value))
+
+            elif features[feature] is None and value is not None:
+                features[feature] = str(value)
+
+        return features
 
+    def _parse_asm_diskgroup_data(self, asm_values):
+        """Parse oracle asm diskgroup data."""
         data = {
             'asm': []
         }
 
-        asm_dg_df = df[df['Feature'] == self.ASM_DISKGROUPS]
-
-        if not asm_dg_df.empty:
-            for row in list(asm_dg_df.Value):
-                asm_item = {}
-                for key_value in row.split():
-                    key, value = key_value.split(':')
-                    key = key.strip()
-                    value = value.strip()
+        for row in asm_values:
+            asm_item = {}
+            for key_value in row.split():
+                key, value = key_value.split(':')
+                key = key.strip()
+                value = value.strip()
 
-                    if key in asm_columns:
-                        if key == 'ALLOC_SIZE':
-                            value = convert_to_mb(value)
-                        elif key == 'REDUNDANCY':
-                            value = redundancy_names.get(value, value)
+                if key in self.ASM_COLUMNS:
+                    if key == 'ALLOC_SIZE':
+                        value = convert_to_mb(value)
+                    elif key == 'REDUNDANCY':
+                        value = self.REDUNDANCY_NAMES.get(value, value)
 
-                        asm_item[asm_columns[key]] = value
+                    asm_item[self.ASM_COLUMNS[key]] = value
 
-                    if key in misc_columns:
-                        # later this data will go to asm too
-                        data[misc_columns[key]] = value
+                if key in self.ASM_MISC_COLUMNS:
+                    # later this data will go to asm too
+                    data[self.ASM_MISC_COLUMNS[key]] = value
 
-                if asm_item:
-                    data['asm'].append(asm_item)
+            if asm_item:
+                data['asm'].append(asm_item)
 
         return data
 
-    def _get_rac_nodes(self, df):
-        """Add number of nodes in the RAC cluster."""
-        return len(df[df['Feature'] == self.RAC_FEATURE])
-
-    def _full_db_version(self, df, db_data_row):
-        """Add full oracle version if exists."""
-        db_full_version = df[df['Feature'] == self.DB_FULL_VERSION]
-        if not db_full_version.empty:
-            db_full_version = list(db_full_version.Value)[0]
-        else:
+    def _full_db_version(self, db_full_version, db_data_row):
+        """Return full oracle version if exists."""
+        if db_full_version is None:
             db_full_version = db_data_row['oracle_version']
 
         # convert to "base" version if it is not in full format.
@@ -190,8 +304,9 @@ class MigvisorParser:
 
         return db_version
 
-    def _add_oracle_release(self, df):
-        """Add oracle release if exists.
+    @staticmethod
+    def _oracle_release(oracle_release):
+        """Return oracle release if exists.
         Examples:
         1. the original value RDBMS_12.2.0.1.0_LINUX.X64_170125 should become 12.2.0.1.170125
         2. the original value RDBMS_19.11.0.0.0DBRU_LINUX.X64_210412 should become 19.11.0.0.210412
@@ -200,81 +315,13 @@ class MigvisorParser:
         Trim the first 6 characters
         Take version number X.X.X.X. + last 6 digits
         """
-        oracle_release = df[df['Feature'] == self.PSU_INSTALLED]
-        if not oracle_release.empty:
-            oracle_release = list(oracle_release.Value)[0]
-            oracle_release = '{}.{}'.format(
-                '.'.join(oracle_release[6:].split('.')[0:4]),
-                oracle_release[-6:]
-            )
-        else:
-            oracle_release = 'base'
-
-        return oracle_release
-
-    def _convert_db_df_to_data(self, df):
-        """Convert dabatase df to dict data: rename/remove columns"""
-        lower_columns = [x.lower() for x in df.columns]
-        new_columns = {x: self.COLUMNS_MAP.get(y, y) for x, y in zip(df.columns, lower_columns)}
-        df.rename(columns=new_columns, inplace=True)
-        df = df.replace({np.nan: None})
-        df = df[self.COLUMNS_TO_PARSE]
-        # make sure 'oracle_version' is string
-        df['oracle_version'] = df['oracle_version'].apply(
-            lambda x: None if x is None else str(x)
-        )
-        df['db_engine'] = df['db_engine'].apply(
-            lambda engine: str.upper(engine)
-        )
-
-        return df.to_dict(orient='records')
-
-    @classmethod
-    def _read_database_sheet_to_df(cls, wb):
-        """Read and validate 'Database Servers' sheet."""
-        if cls.DATABASE_SERVERS_SHEET not in wb.sheet_names:
-            raise MigvisorFileDataError(
-                f'No {cls.DATABASE_SERVERS_SHEET} sheet found'
-            )
-
-        df = wb.parse(cls.DATABASE_SERVERS_SHEET, header=None)
-
-        header_row_index = cls._find_header_row_index(df)
-
-        if header_row_index is None:  # might be 0 which is OK
-            raise MigvisorFileDataError('Headers row not found')
-
-        # set correct headers
-        df.columns = df.iloc[header_row_index]
-        df.columns.name = None
-        # drop empty rows before headers
-        df = df[header_row_index + 1:]
-
-        # drop completely empty rows if present
-        df.dropna(how='all', inplace=True)
-
-        if df.empty:
-            raise MigvisorFileDataError('No database found')
-
-        return df
-
-    @staticmethod
-    def _find_header_row_index(df):
-        """Find index of the row with headers.
-
-        It might be in different row depending on migvizor version.
-        Look for the row that contains 'server' and 'database name' values.
-        """
-        header_row_index = None
-
-        for index, row in df.iterrows():
-            values = [x.lower() for x in row.values if isinstance(x, str)]
+        if oracle_release is None:
+            return 'base'
 
-            if all((x in values for x in ('server', 'database name'))):
-                header_row_index = index
-                break
-
-        return header_row_index
+        return '{}.{}'.format(
+            '.'.join(oracle_release[6:].split('.')[0:4]),
+            oracle_release[-6:]
+        )
 
     def _validate_data(self, db_data):
         """Validate required fields and db name"""
@@ -23,6 +23,10 @@ from bms_app.schema import (
     ASMConfigSchema, DataMountSchema, DbParamsSchema, InstallConfigSchema,
     MiscConfigSchema, RACConfigSchema, DMSConfigSchema
 )
+from bms_app.services.bulk import bulk_upsert
+from bms_app.services.change_version import (
+    bump_change_version, bump_source_db_ids_change_version
+)
 from bms_app.services.utils import generate_target_gcp_logs_link
 
 
@@ -40,7 +44,6 @@ class InSourceDBSchema(ma.SQLAlchemyAutoSchema):
         else:
             data['db_type'] = SourceDBType.SI
 
-        print(data)
         return data
 
 
@@ -75,81 +78,107 @@ in_db_schema = InSourceDBSchema(
 )
 
 
-def update_db_config(source_db, raw_db_data):
-    """Update Config."""
-    asm_data = InASMConfig().load(raw_db_data)
-    misc_data = InMiscConfig().load(raw_db_data)
+def get_existing_source_dbs(project_id):
+    """Return {(server, db_name): (id, wave_id, is_deployed)} of the project."""
+    deployed_db_ids = db.session.query(Mapping.db_id) \
+        .join(OperationDetails, Mapping.id == OperationDetails.mapping_id) \
+        .join(SourceDB, Mapping.db_id == SourceDB.id) \
+        .filter(SourceDB.project_id == project_id) \
+        .distinct()
+    deployed_db_ids = {x[0] for x in deployed_db_ids}
 
-    upd_data = {
-        'db_id': source_db.id,
-        'asm_config_values': asm_data['asm'] if 'asm' in asm_data else None,
-        'misc_config_values': misc_data
+    qs = db.session.query(
+        SourceDB.id,
+        SourceDB.server,
+        SourceDB.db_name,
+        SourceDB.wave_id
+    ).filter(SourceDB.project_id == project_id)
 
+    return {
+        (x.server, x.db_name): (x.id, x.wave_id, x.id in deployed_db_ids)
+        for x in qs
     }
-    if source_db.config:
-        db.session.query(Config) \
-            .filter(Config.db_id == source_db.id) \
-            .update(upd_data)
-    else:
-        config = Config(**upd_data)
-        db.session.add(config)
 
-    db.session.commit()
 
+def get_config_data(raw_db_data):
+    asm_data = InASMConfig().load(raw_db_data)
+    misc_data = InMiscConfig().load(raw_db_data)
 
-def update_db(source_db, raw_db_data):
-    """Update SourceDB."""
-    source_db_data = in_db_schema.load(raw_db_data)
-
-    db.session.query(SourceDB) \
-        .filter(SourceDB.id == source_db.id) \
-        .update(source_db_data)
-    db.session.commit()
+    return {
+        'asm_config_values': asm_data['asm'] if 'asm' in asm_data else None,
+        'misc_config_values': misc_data
+    }
 
-    update_db_config(source_db, raw_db_data)
 
+def save_source_dbs(parsed_dbs_data, overwrite, project_id):
+    """Add new and overwrite not deployed dbs of the project.
 
-def add_db(raw_db_data, project_id):
-    """Add SourceDB using parsed data"""
-    source_db_data = in_db_schema.load(raw_db_data)
-    source_db_data['project_id'] = project_id
+    Existing dbs and deployment flags are loaded at once,
+    SourceDB and Config rows are upserted in batches within one transaction.
+    """
+    added = updated = skipped = 0
 
-    source_db = SourceDB(**source_db_data)
-    db.session.add(source_db)
-    db.session.commit()
+    existing_dbs = get_existing_source_dbs(project_id)
+    # the latest data of the same db in the file wins
+    dbs_to_save = {}
+    changed_wave_ids = set()
 
-    update_db_config(source_db, raw_db_data)
+    for raw_db_data in parsed_dbs_data:
+        key = (raw_db_data['server'], raw_db_data['db_name'])
 
+        if key in existing_dbs:
+            _, wave_id, is_deployed = existing_dbs[key]
 
-def save_source_dbs(parsed_dbs_data, overwrite, project_id):
-    added = updated = skipped = 0
+            if overwrite and not is_deployed:
+                dbs_to_save[key] = raw_db_data
+                changed_wave_ids.add(wave_id)
+                updated += 1
+            else:
+                skipped += 1
 
-    for raw_db_data in parsed_dbs_data:
-        source_db = db.session.query(SourceDB) \
-            .filter(
-                SourceDB.server == raw_db_data['server'],
-                SourceDB.db_name == raw_db_data['db_name'],
-                SourceDB.project_id == project_id)\
-            .first()
-
-        if source_db:
+        elif key in dbs_to_save:
+            # duplicate of the db added from the same file
             if overwrite:
-                deployment_exists = db.session.query(OperationDetails) \
-                    .filter(Mapping.db_id == source_db.id) \
-                    .filter(Mapping.id == OperationDetails.mapping_id) \
-                    .count()
-
-                if not deployment_exists:
-                    update_db(source_db, raw_db_data)
-                    updated += 1
-                else:
-                    skipped += 1
+                dbs_to_save[key] = raw_db_data
+                updated += 1
             else:
                 skipped += 1
+
         else:
-            add_db(raw_db_data, project_id)
+            dbs_to_save[key] = raw_db_data
             added += 1
 
+    if dbs_to_save:
+        source_dbs_rows = []
+        for raw_db_data in dbs_to_save.values():
+            source_db_data = in_db_schema.load(raw_db_data)
+            source_db_data['project_id'] = project_id
+            source_dbs_rows.append(source_db_data)
+
+        bulk_upsert(
+            SourceDB,
+            source_dbs_rows,
+            index_elements=['server', 'db_name', 'project_id']
+        )
+
+        # ids of inserted dbs
+        qs = db.session.query(SourceDB.server, SourceDB.db_name, SourceDB.id) \
+            .filter(SourceDB.project_id == project_id)
+        db_ids = {(x.server, x.db_name): x.id for x in qs}
+        config_rows = [
+            dict(get_config_data(raw_db_data), db_id=db_ids[key])
+            for key, raw_db_data in dbs_to_save.items()
+        ]
+
+        bulk_upsert(Config, config_rows, index_elements=['db_id'])
+
+        bump_change_version(
+            wave_ids=changed_wave_ids,
+            project_ids=[project_id]
+        )
+
+    db.session.commit()
+
     return {
         'added': added,
         'updated': updated,
@@ -186,6 +215,7 @@ class SaveSourceDBConfigService:
         cls._update_config_values(config, data)
 
         db.session.add(config)
+        bump_source_db_ids_change_version([db_id])
         db.session.commit()
 
         return config
@@ -17,6 +17,8 @@ from marshmallow import ValidationError
 
 from bms_app.models import SourceDB, db
 from bms_app.schema import FileSchema, LabelSchema
+from bms_app.services.change_version import bump_source_dbs_change_version
+from bms_app.services.wave_rollup import refresh_waves_rollup
 from bms_app.source_db import bp
 from bms_app.source_db.parsers import MigvisorFileError, MigvisorParser
 from bms_app.source_db.schema import MigvisorFileUploadSchema, SourceDBSchema
@@ -50,6 +52,8 @@ def delete_source_db(source_db_id):
     """Delete source_db."""
     source_db = SourceDB.query.get_or_404(source_db_id)
     db.session.delete(source_db)
+    refresh_waves_rollup([source_db.wave_id])
+    bump_source_dbs_change_version([source_db])
     db.session.commit()
     return {}, 204
 
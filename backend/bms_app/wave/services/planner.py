@@ -0,0 +1,288 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from marshmallow import ValidationError
+from sqlalchemy import case, func
+
+from bms_app import settings
+from bms_app.models import (
+    Mapping, OperationDetails, OperationStatus, OperationType, SourceDB,
+    SourceDBEngine, SourceDBStatus, Wave, db, source_db_to_label
+)
+from bms_app.services.change_version import bump_change_version
+from bms_app.services.wave_rollup import refresh_waves_rollup
+
+
+# wave targets served by one control node (e2-standard-8)
+MAX_WAVE_TARGETS = 75
+
+
+@dataclass
+class PlanGroup:
+    """Dbs which must be placed to one wave."""
+    db_ids: list
+    targets: int
+    duration: float
+
+
+@dataclass
+class PlannedWave:
+    id: int = None  # set once the plan is applied
+    name: str = None
+    db_ids: list = field(default_factory=list)
+    targets: int = 0
+    duration: float = 0  # estimated, the longest db of the wave
+
+    def add(self, group):
+        self.db_ids.extend(group.db_ids)
+        self.targets += group.targets
+        self.duration = max(self.duration, group.duration)
+
+
+def split_into_waves(groups, max_targets):
+    """Return waves minimizing the sum of their durations.
+
+    Waves are run one after another and every wave lasts as long as
+    its longest db. Groups are taken from the longest one, each to the
+    first wave having free targets (first-fit decreasing by duration),
+    so long dbs share waves instead of extending many of them.
+    """
+    waves = []
+
+    for group in sorted(groups, key=lambda x: (-x.duration, -x.targets)):
+        wave = next(
+            (x for x in waves if x.targets + group.targets <= max_targets),
+            None
+        )
+        if wave is None:
+            wave = PlannedWave()
+            waves.append(wave)
+
+        wave.add(group)
+
+    return waves
+
+
+class WavePlanner:
+    """Split mapped dbs of the project into waves.
+
+    Dbs having any of together_label_ids of the same label
+    are kept in one wave. Duration of db deployment is estimated by
+    completed deployments of the db, dbs of the same type or all dbs.
+    """
+
+    def __init__(self, project_id, max_targets=MAX_WAVE_TARGETS,
+                 together_label_ids=None, include_assigned=False):
+        self.project_id = project_id
+        self.max_targets = max_targets
+        self.together_label_ids = together_label_ids or []
+        self.include_assigned = include_assigned
+
+    def plan(self):
+        dbs = self._get_dbs()
+        durations = self._get_durations(dbs)
+        groups = self._get_groups(dbs, durations)
+
+        waves = split_into_waves(groups, self.max_targets)
+        for wave in waves:
+            wave.db_ids.sort()
+
+        return waves
+
+    def _get_dbs(self):
+        """Return {db_id: (db_type, targets)} of the dbs to plan."""
+        running_wave_ids = db.session.query(Wave.id) \
+            .filter(Wave.project_id == self.project_id,
+                    Wave.is_running.is_(True))
+
+        qs = db.session.query(SourceDB.id, SourceDB.db_type, func.count(Mapping.id)) \
+            .join(Mapping, Mapping.db_id == SourceDB.id) \
+            .filter(SourceDB.project_id == self.project_id,
+                    SourceDB.db_engine == SourceDBEngine.ORACLE,
+                    SourceDB.status == SourceDBStatus.EMPTY) \
+            .group_by(SourceDB.id, SourceDB.db_type)
+
+        if self.include_assigned:
+            qs = qs.filter(
+                SourceDB.wave_id.is_(None)
+                | SourceDB.wave_id.notin_(running_wave_ids)
+            )
+        else:
+            qs = qs.filter(SourceDB.wave_id.is_(None))
+
+        return {db_id: (db_type, targets) for db_id, db_type, targets in qs}
+
+    @staticmethod
+    def _get_durations_query(*columns):
+        """Return query of completed deployments grouped by columns.
+
+        Average duration in seconds is calculated by the db.
+        """
+        if db.engine.dialect.name == 'sqlite':
+            seconds = (
+                func.julianday(OperationDetails.completed_at)
+                - func.julianday(OperationDetails.started_at)
+            ) * 86400
+        else:
+            seconds = func.extract(
+                'epoch',
+                OperationDetails.completed_at - OperationDetails.started_at
+            )
+
+        return db.session.query(*columns, func.avg(seconds)) \
+            .select_from(OperationDetails) \
+            .join(Mapping, OperationDetails.mapping_id == Mapping.id) \
+            .join(SourceDB, Mapping.db_id == SourceDB.id) \
+            .filter(OperationDetails.operation_type == OperationType.DEPLOYMENT,
+                    OperationDetails.status == OperationStatus.COMPLETE,
+                    OperationDetails.started_at.isnot(None),
+                    OperationDetails.completed_at.isnot(None)) \
+            .group_by(*columns)
+
+    def _get_durations(self, dbs):
+        """Return {db_id: seconds} estimated by completed deployments."""
+        by_db = dict(
+            self._get_durations_query(SourceDB.id)
+            .filter(SourceDB.id.in_(list(dbs)))
+        )
+
+        db_types = {db_type for db_id, (db_type, _) in dbs.items() if db_id not in by_db}
+        by_type = dict(
+            self._get_durations_query(SourceDB.db_type)
+            .filter(SourceDB.db_type.in_(db_types))
+        ) if db_types else {}
+
+        default = None
+        durations = {}
+        for db_id, (db_type, _) in dbs.items():
+            duration = by_db.get(db_id) or by_type.get(db_type)
+
+            if duration is None:
+                if default is None:
+                    default = self._get_durations_query().scalar() \
+                        or settings.WAVE_PLANNER_DEFAULT_DURATION
+                duration = default
+
+            durations[db_id] = round(float(duration))
+
+        return durations
+
+    def _get_groups(self, dbs, durations):
+        """Return groups of dbs joined by together_label_ids."""
+        parents = {x: x for x in dbs}
+
+        def find(db_id):
+            while parents[db_id] != db_id:
+                parents[db_id] = parents[parents[db_id]]
+                db_id = parents[db_id]
+            return db_id
+
+        for db_ids in self._get_labeled_db_ids(dbs).values():
+            root = find(db_ids[0])
+            for db_id in db_ids[1:]:
+                parents[find(db_id)] = root
+
+        members = defaultdict(list)
+        for db_id in dbs:
+            members[find(db_id)].append(db_id)
+
+        groups = []
+        for db_ids in members.values():
+            group = PlanGroup(
+                db_ids=db_ids,
+                targets=sum(dbs[x][1] for x in db_ids),
+                duration=max(durations[x] for x in db_ids)
+            )
+            if group.targets > self.max_targets:
+                raise ValidationError({'together_label_ids': [
+                    f'dbs {sorted(db_ids)} have {group.targets} targets, '
+                    f'more than {self.max_targets}'
+                ]})
+            groups.append(group)
+
+        return groups
+
+    def _get_labeled_db_ids(self, dbs):
+        """Return {label_id: [db_id, ...]} of planned dbs."""
+        labeled = defaultdict(list)
+        if not self.together_label_ids:
+            return labeled
+
+        qs = db.session.query(source_db_to_label.c.label_id, source_db_to_label.c.db_id) \
+            .filter(source_db_to_label.c.label_id.in_(self.together_label_ids))
+
+        for label_id, db_id in qs:
+            if db_id in dbs:
+                labeled[label_id].append(db_id)
+
+        return labeled
+
+
+def generate_wave_names(project_id, prefix, count):
+    """Return count of names not used by waves of the project."""
+    used_names = {
+        x[0] for x in
+        db.session.query(Wave.name).filter(Wave.project_id == project_id)
+    }
+
+    names = []
+    ind = 1
+    while len(names) < count:
+        name = f'{prefix}-{ind}'
+        if name not in used_names:
+            names.append(name)
+        ind += 1
+
+    return names
+
+
+def apply_wave_plan(project_id, waves, prefix='wave'):
+    """Create planned waves and assign their dbs by one update."""
+    if not waves:
+        return waves
+
+    names = generate_wave_names(project_id, prefix, len(waves))
+    new_waves = [Wave(name=name, project_id=project_id) for name in names]
+    db.session.add_all(new_waves)
+    db.session.flush()
+
+    wave_by_db_id = {}
+    for planned_wave, wave in zip(waves, new_waves):
+        planned_wave.name = wave.name
+        planned_wave.id = wave.id
+        wave_by_db_id.update({x: wave.id for x in planned_wave.db_ids})
+
+    prev_wave_ids = {
+        x[0] for x in
+        db.session.query(SourceDB.wave_id)
+        .filter(SourceDB.id.in_(wave_by_db_id))
+        .distinct()
+    }
+
+    db.session.query(SourceDB) \
+        .filter(SourceDB.id.in_(wave_by_db_id)) \
+        .update(
+            {'wave_id': case(wave_by_db_id, value=SourceDB.id)},
+            synchronize_session=False
+        )
+
+    wave_ids = prev_wave_ids | {x.id for x in new_waves}
+    refresh_waves_rollup(wave_ids)
+    bump_change_version(wave_ids=wave_ids, project_ids=[project_id])
+    db.session.commit()
+
+    return waves
@@ -13,16 +13,20 @@
 # limitations under the License.
 
 from marshmallow import ValidationError
-from sqlalchemy import func
+from sqlalchemy import and_, case, func, or_
+from sqlalchemy.orm import aliased
 
 from bms_app.models import (
-    DEPLOYED_STATUSES, OPERATION_STATUSES_ORDER, BMSServer, Config, Mapping,
-    Operation, OperationDetails, OperationType, SourceDB, SourceDBStatus, Wave,
-    SourceDBEngine, db
+    OPERATION_STATUSES_ORDER, BMSServer, Config, Mapping, Operation,
+    OperationDetails, OperationType, SourceDB, SourceDBStatus, Wave,
+    SourceDBEngine, WaveRollup, db
 )
 from bms_app.schema import WaveSchema
+from bms_app.services.change_version import bump_change_version
 from bms_app.services.utils import generate_target_gcp_logs_link
-from bms_app.wave_steps import DEPLOYMENT_STEPS, ROLLBACK_STEPS
+from bms_app.services.wave_rollup import (
+    get_step_data, refresh_waves_rollup, wave_rate_info
+)
 
 
 def validate_wave_name_is_unique(name, project_id, exclude_wave_id=None):
@@ -39,61 +43,43 @@ def validate_wave_name_is_unique(name, project_id, exclude_wave_id=None):
         raise ValidationError({'name': ['This name already exists']})
 
 
-def get_wave_steps(operation):
-    if operation.is_deployment:
-        return DEPLOYMENT_STEPS
-
-    if operation.is_rollback:
-        return ROLLBACK_STEPS
-
-    return []
-
-
-def wave_rate_info(wave_id):
-    """Calculate of undeployed, deployed and failed db for each wave."""
-    undeployed_db = 0
-    deployed_db = 0
-    failed_db = 0
-
-    rate_info = db.session.query(SourceDB.status, func.count()) \
-        .filter(SourceDB.wave_id == wave_id) \
-        .group_by(SourceDB.status) \
-        .all()
-
-    if rate_info:
-        undeployed_db = sum((x[1] for x in rate_info if x[0] in SourceDB.DEPLOYABLE_STATUSES), 0)
-        deployed_db = sum((x[1] for x in rate_info if x[0] in DEPLOYED_STATUSES), 0)
-        failed_db = next((x[1] for x in rate_info if x[0] == SourceDBStatus.FAILED), 0)
-
-    return {
-        'undeployed': undeployed_db,
-        'deployed': deployed_db,
-        'failed': failed_db
-    }
-
-
 def list_waves_service(project_id):
-    """Return list of waves."""
-    qs = db.session.query(Wave)
+    """Return list of waves.
+
+    Status rate and step data are taken from WaveRollup,
+    so all waves are retrieved by one query.
+    """
+    qs = db.session.query(Wave, WaveRollup) \
+        .outerjoin(WaveRollup, WaveRollup.wave_id == Wave.id) \
+        .order_by(Wave.id)
 
     if project_id:
         qs = qs.filter(Wave.project_id == project_id)
 
-    waves_data = WaveSchema(many=True).dump(qs)
+    waves_data = []
 
-    for wave in waves_data:
-        wave['status_rate'] = wave_rate_info(wave['id'])
+    for wave, rollup in qs:
+        # rollups are created along with waves
+        if not rollup:
+            rollup = WaveRollup(
+                wave_id=wave.id,
+                undeployed_dbs=0,
+                deployed_dbs=0,
+                failed_dbs=0,
+                curr_step=0,
+                total_steps=0
+            )
 
-        # add step data if wave is running
-        if wave['is_running']:
-            wave['step'] = RunningWaveDetails(wave['id']).get_step_data()
+        wave_data = WaveSchema().dump(wave)
+        wave_data['status_rate'] = rollup.status_rate
 
-    return waves_data
+        # add step data if wave is running
+        if wave.is_running:
+            wave_data['step'] = rollup.step_data
 
+        waves_data.append(wave_data)
 
-def add_secret_name_status(mappings_data, secret_names):
-    for db_id in mappings_data:
-        mappings_data[db_id]['has_secret_name'] = all(secret_names[db_id])
+    return waves_data
 
 
 def add_aggregated_db_status(wave_mappings_data):
@@ -118,26 +104,114 @@ def add_aggregated_db_status(wave_mappings_data):
         wave_mappings_data[db_id]['operation_status'] = status
 
 
-class LastOpWaveDetails:
-    """Provide info about wave last operation."""
+class BaseWaveDetails:
+    """Provide wave details and data of its db mappings.
+
+    Mappings are retrieved by one query.
+    Dbs can be filtered by status/step of their targets
+    and paginated by db id: `after` is the last db id of the previous page.
+    """
 
-    def __init__(self, wave_id):
+    def __init__(self, wave_id, status=None, step=None, after=None, limit=None):
         self.wave_id = wave_id
+        self.status = status
+        self.step = step
+        self.after = after
+        self.limit = limit
+
+        self.next_cursor = None
+
+    @property
+    def is_paginated(self):
+        return bool(self.status or self.step or self.after or self.limit)
+
+    def _get_base_query(self):
+        """Return query joining SourceDB, Mapping, BMSServer, OperationDetails."""
+        raise NotImplementedError
+
+    def _get_mappings_query(self):
+        """Return query of all rows of the requested dbs."""
+        has_secret_name = func.min(
+            case((func.coalesce(BMSServer.secret_name, '') == '', 0), else_=1)
+        ).over(partition_by=SourceDB.id)
+
+        qs = self._get_base_query() \
+            .outerjoin(Config, Config.db_id == SourceDB.id) \
+            .with_entities(
+                SourceDB, BMSServer, Config.is_configured, OperationDetails,
+                has_secret_name.label('has_secret_name')
+            ) \
+            .order_by(SourceDB.id, Mapping.id)
+
+        if self.is_paginated:
+            qs = qs.filter(SourceDB.id.in_(self._get_page_db_ids_query()))
+
+        return qs
+
+    def _get_page_db_ids_query(self):
+        """Return query of db ids of the requested page."""
+        qs = self._get_base_query().with_entities(SourceDB.id)
+
+        if self.status:
+            qs = qs.filter(OperationDetails.status == self.status)
+
+        if self.step:
+            qs = qs.filter(OperationDetails.step == self.step)
+
+        if self.after:
+            qs = qs.filter(SourceDB.id > self.after)
+
+        qs = qs.distinct().order_by(SourceDB.id)
+
+        if self.limit:
+            # one extra db shows if there is a next page
+            qs = qs.limit(self.limit + 1)
+
+        return qs
+
+    def _get_page_rows(self):
+        rows = self._get_mappings_query().all()
+
+        if self.limit:
+            db_ids = list(dict.fromkeys(row.SourceDB.id for row in rows))
+            if len(db_ids) > self.limit:
+                self.next_cursor = db_ids[self.limit - 1]
+                rows = [x for x in rows if x.SourceDB.id <= self.next_cursor]
+
+        return rows
+
+    def _add_pagination_data(self, data):
+        if self.is_paginated:
+            data['next_cursor'] = self.next_cursor
+        return data
+
+
+class LastOpWaveDetails(BaseWaveDetails):
+    """Provide info about wave last operation."""
+
+    NOT_LOADED = object()
+
+    def __init__(self, wave_id, last_deploy=NOT_LOADED, **kwargs):
+        """last_deploy -- last deployment of the wave if it's already loaded"""
+        super().__init__(wave_id, **kwargs)
+        self._last_deploy = last_deploy
 
     def get_extra_data(self):
         """Return details re last deployment and all db mappings."""
-        return {
+        return self._add_pagination_data({
             'last_deployment': self._get_last_deployment_data(),
             'mappings': self._get_mappings_data(),
-        }
+        })
 
     def _get_last_deployment_data(self):
         """Retun last deploymnet data."""
-        last_deploy = db.session.query(Operation) \
-            .filter(Operation.wave_id == self.wave_id,
-                    Operation.operation_type == OperationType.DEPLOYMENT) \
-            .order_by(Operation.id.desc()) \
-            .first()
+        last_deploy = self._last_deploy
+        if last_deploy is self.NOT_LOADED:
+            last_deploy = db.session.query(Operation) \
+                .filter(Operation.wave_id == self.wave_id,
+                        Operation.operation_type == OperationType.DEPLOYMENT) \
+                .order_by(Operation.id.desc()) \
+                .first()
 
         if last_deploy:
             return {
@@ -146,62 +220,49 @@ class LastOpWaveDetails:
                 'completed_at': last_deploy.completed_at,
                 'operation_type': last_deploy.operation_type.value,
             }
-    
-    def _get_dms_auto_mappings(self):
-        query = db.session.query(SourceDB)\
-            .outerjoin(Config) \
-            .with_entities(SourceDB, Config.is_configured) \
-            .filter(SourceDB.wave_id == self.wave_id) \
-            .filter(SourceDB.db_engine == SourceDBEngine.POSTGRES)
-
-        mappings = [] 
-        for source_db, is_configured in query:
-            mapping = {
-                'server': source_db.server,
-                'db_id': source_db.id,
-                'db_name': source_db.db_name,
-                'is_deployable': source_db.is_deployable,
-                'is_dms_auto_mapping': True,
-                'db_engine': source_db.db_engine.value,
-                'operation_type': None, # TODO: get last operation type
-                'operation_status': '',
-                'operation_id': None, # TODO: get last operation id
-                'is_configured': is_configured if is_configured is not None else False,
-            }
-            mappings.append(mapping)
-        
-        return mappings
+
+    def _get_base_query(self):
+        # latest operation details/history per mapping/bms_target
+        ranked_op_details = db.session.query(
+            OperationDetails.id,
+            func.row_number().over(
+                partition_by=OperationDetails.mapping_id,
+                order_by=OperationDetails.id.desc()
+            ).label('row_number')
+        ) \
+            .filter(OperationDetails.wave_id == self.wave_id) \
+            .subquery()
+        last_op_details_ids = db.session.query(ranked_op_details.c.id) \
+            .filter(ranked_op_details.c.row_number == 1)
+
+        # postgres dbs are migrated by dms and don't have mappings
+        return db.session.query(SourceDB) \
+            .outerjoin(Mapping, Mapping.db_id == SourceDB.id) \
+            .outerjoin(BMSServer, Mapping.bms_id == BMSServer.id) \
+            .outerjoin(
+                OperationDetails,
+                and_(OperationDetails.mapping_id == Mapping.id,
+                     OperationDetails.id.in_(last_op_details_ids))
+            ) \
+            .filter(SourceDB.wave_id == self.wave_id,
+                    or_(Mapping.id.isnot(None),
+                        SourceDB.db_engine == SourceDBEngine.POSTGRES))
 
     def _get_mappings_data(self):
         """Return info and last operation for each db mapping."""
         mappings_data = {}
-        secret_names = {}
 
-        # get latest operation id per mapping/bms_target
-        subq = db.session.query(OperationDetails) \
-            .with_entities(func.max(OperationDetails.id)) \
-            .filter(OperationDetails.wave_id == self.wave_id) \
-            .group_by(OperationDetails.mapping_id)
-        # get latest operation details/history for these mappings
-        joinq = db.session.query(OperationDetails) \
-            .filter(OperationDetails.id.in_(subq)) \
-            .subquery()
-
-        query = db.session.query(Mapping, SourceDB, BMSServer, joinq) \
-            .outerjoin(SourceDB) \
-            .outerjoin(BMSServer) \
-            .outerjoin(Config) \
-            .with_entities(SourceDB, BMSServer, Config.is_configured,
-                           joinq.c.operation_type, joinq.c.status,
-                           joinq.c.operation_id, joinq.c.step) \
-            .outerjoin(joinq, Mapping.id == joinq.c.mapping_id) \
-            .filter(SourceDB.wave_id == self.wave_id)
-
-        for row in query:
-            source_db, bms_server, is_configured, last_op_type, \
-                last_op_status, last_op_id, last_op_step = row
+        for row in self._get_page_rows():
+            source_db, bms_server, is_configured, last_op = row[:4]
             db_id = source_db.id
 
+            if source_db.db_engine == SourceDBEngine.POSTGRES:
+                mappings_data[db_id] = self._get_dms_auto_mapping(
+                    source_db,
+                    is_configured
+                )
+                continue
+
             if db_id not in mappings_data:
                 mappings_data[db_id] = {
                     'server': source_db.server,
@@ -209,37 +270,51 @@ class LastOpWaveDetails:
                     'db_name': source_db.db_name,
                     'db_type': source_db.db_type.value,
                     'is_deployable': source_db.is_deployable,
-                    'operation_type': last_op_type.value if last_op_type else None,
+                    'operation_type': last_op.operation_type.value if last_op else None,
                     'operation_status': '',
-                    'operation_id': last_op_id,
+                    'operation_id': last_op.operation_id if last_op else None,
                     'bms': [],
                     'is_configured': is_configured if is_configured is not None else False,
+                    'has_secret_name': bool(row.has_secret_name),
                 }
 
-                secret_names[db_id] = [bool(bms_server.secret_name)]
-
             mappings_data[db_id]['bms'].append({
                 'bms_id': bms_server.id,
                 'bms_name': bms_server.name,
-                'operation_status': last_op_status.value if last_op_status else None,
-                'operation_step': last_op_step,
+                'operation_status': last_op.status.value if last_op else None,
+                'operation_step': last_op.step if last_op else None,
 
             })
-        add_secret_name_status(mappings_data, secret_names)
 
-        add_aggregated_db_status(mappings_data)
+        add_aggregated_db_status(
+            {k: v for k, v in mappings_data.items() if 'bms' in v}
+        )
 
-        dms_auto_mappings = self._get_dms_auto_mappings()
+        return list(mappings_data.values())
 
-        return list(mappings_data.values()) + dms_auto_mappings
+    @staticmethod
+    def _get_dms_auto_mapping(source_db, is_configured):
+        return {
+            'server': source_db.server,
+            'db_id': source_db.id,
+            'db_name': source_db.db_name,
+            'is_deployable': source_db.is_deployable,
+            'is_dms_auto_mapping': True,
+            'db_engine': source_db.db_engine.value,
+            'operation_type': None, # TODO: get last operation type
+            'operation_status': '',
+            'operation_id': None, # TODO: get last operation id
+            'is_configured': is_configured if is_configured is not None else False,
+        }
 
 
-class RunningWaveDetails:
+class RunningWaveDetails(BaseWaveDetails):
     """Running wave data."""
 
-    def __init__(self, wave_id):
-        self.wave_id = wave_id
-        self._curr_op = None
+    def __init__(self, wave_id, curr_op=None, **kwargs):
+        """curr_op -- latest operation of the wave if it's already loaded"""
+        super().__init__(wave_id, **kwargs)
+        self._curr_op = curr_op
 
     @property
     def curr_op(self):
@@ -252,29 +327,14 @@ class RunningWaveDetails:
 
     def get_extra_data(self):
         """Return details re current running operation and its db mappings."""
-        return {
+        return self._add_pagination_data({
             'curr_operation': self._get_running_op_data(),
             'mappings': self._get_running_mappings_data(),
-        }
+        })
 
     def get_step_data(self):
         """Return current/total step number."""
-        all_steps = db.session.query(OperationDetails.step). \
-            filter(OperationDetails.operation_id == self.curr_op.id). \
-            all()
-        all_steps = [x[0] for x in all_steps]
-        wave_steps = get_wave_steps(self.curr_op)
-
-        last_step_index = 0
-        # find the latest step within all_steps
-        for ind, item in enumerate(wave_steps, 1):
-            if item['id'] in all_steps:
-                last_step_index = ind
-
-        return {
-            'curr_step': last_step_index,
-            'total_steps': len(wave_steps)
-        }
+        return get_step_data(self.curr_op)
 
     def _get_running_op_data(self):
         return {
@@ -284,17 +344,20 @@ class RunningWaveDetails:
             'id': self.curr_op.id,
         }
 
+    def _get_base_query(self):
+        return db.session.query(SourceDB) \
+            .select_from(OperationDetails) \
+            .join(Mapping, OperationDetails.mapping_id == Mapping.id) \
+            .join(SourceDB, Mapping.db_id == SourceDB.id) \
+            .join(BMSServer, Mapping.bms_id == BMSServer.id) \
+            .filter(OperationDetails.operation_id == self.curr_op.id)
+
     def _get_running_mappings_data(self):
         """Return running mappings data."""
-        query = db.session.query(OperationDetails, SourceDB, BMSServer, Config) \
-            .filter(OperationDetails.operation_id == self.curr_op.id) \
-            .outerjoin(Mapping, OperationDetails.mapping_id == Mapping.id) \
-            .outerjoin(SourceDB, Mapping.db_id == SourceDB.id) \
-            .outerjoin(BMSServer, Mapping.bms_id == BMSServer.id) \
-            .outerjoin(Config)
         mappings = {}
-        secret_names = {}
-        for op_details, source_db, bms_server, config in query:
+
+        for row in self._get_page_rows():
+            source_db, bms_server, is_configured, op_details = row[:4]
             db_id = source_db.id
             if db_id not in mappings:
                 mappings[db_id] = {
@@ -306,7 +369,8 @@ class RunningWaveDetails:
                     'operation_type': op_details.operation_type.value,
                     'operation_id': op_details.operation_id,
                     'bms': [],
-                    'is_configured': config.is_configured if config else False,
+                    'is_configured': is_configured if is_configured is not None else False,
+                    'has_secret_name': bool(row.has_secret_name),
                 }
 
             logs_url = generate_target_gcp_logs_link(op_details, bms_server)
@@ -318,10 +382,6 @@ class RunningWaveDetails:
                 'logs_url': logs_url
             })
 
-            secret_names[db_id] = [bool(bms_server.secret_name)]
-
-        add_secret_name_status(mappings, secret_names)
-
         add_aggregated_db_status(mappings)
 
         return list(mappings.values())
@@ -329,38 +389,78 @@ class RunningWaveDetails:
 
 class GetWaveService:
     @classmethod
-    def run(cls, wave_id, return_details=False):
-        """Return wave data."""
-        wave = Wave.query.get_or_404(wave_id)
-        data = WaveSchema().dump(wave)
-
-        data['status_rate'] = wave_rate_info(wave_id)
-
-        if wave.is_running:
-            wave_details_cls = RunningWaveDetails(wave_id=wave_id)
-            data['step'] = wave_details_cls.get_step_data()
+    def run(cls, wave_id, return_details=False, **filters):
+        """Return wave data.
+
+        The wave and the data shown along with it are retrieved by one query,
+        mappings are retrieved by one more query if details are requested.
+
+        filters: status/step/after/limit, see BaseWaveDetails
+        """
+        row = cls._get_wave_row(wave_id, return_details)
+        data = WaveSchema().dump(row.Wave)
+
+        # status rate and step are updated by status messages
+        rollup = row.WaveRollup
+        data['status_rate'] = rollup.status_rate if rollup else wave_rate_info(wave_id)
+
+        if row.Wave.is_running:
+            wave_details_cls = RunningWaveDetails(
+                wave_id=wave_id,
+                curr_op=row.last_op,
+                **filters
+            )
+            data['step'] = rollup.step_data if rollup else wave_details_cls.get_step_data()
         else:
-            wave_details_cls = LastOpWaveDetails(wave_id=wave_id)
+            wave_details_cls = LastOpWaveDetails(
+                wave_id=wave_id,
+                last_deploy=row.last_deploy,
+                **filters
+            )
 
         if return_details:
-            data['mappings_count'] = cls._get_mappings_count(wave_id)
             extra_data = wave_details_cls.get_extra_data()
             data.update(extra_data)
+            data['mappings_count'] = row.mappings_count
 
         return data
 
     @staticmethod
-    def _get_mappings_count(wave_id):
-        """Count total number of mappings of the specific wave."""
-        return db.session.query(Mapping) \
-            .join(SourceDB) \
-            .filter(SourceDB.wave_id == wave_id) \
-            .count()
+    def _get_wave_row(wave_id, return_details):
+        """Return wave along with its rollup, latest operation (last_op)
+        latest deployment (last_deploy) and number of mappings.
+        """
+        last_op = aliased(Operation, name='last_op')
+        last_deploy = aliased(Operation, name='last_deploy')
+
+        last_op_id = db.session.query(func.max(Operation.id)) \
+            .filter(Operation.wave_id == wave_id) \
+            .scalar_subquery()
+        last_deploy_id = db.session.query(func.max(Operation.id)) \
+            .filter(Operation.wave_id == wave_id,
+                    Operation.operation_type == OperationType.DEPLOYMENT) \
+            .scalar_subquery()
+
+        qs = db.session.query(Wave, WaveRollup, last_op, last_deploy) \
+            .outerjoin(WaveRollup, WaveRollup.wave_id == Wave.id) \
+            .outerjoin(last_op, last_op.id == last_op_id) \
+            .outerjoin(last_deploy, last_deploy.id == last_deploy_id) \
+            .filter(Wave.id == wave_id)
+
+        if return_details:
+            mappings_count = db.session.query(func.count(Mapping.id)) \
+                .join(SourceDB, Mapping.db_id == SourceDB.id) \
+                .filter(SourceDB.wave_id == wave_id) \
+                .scalar_subquery()
+            qs = qs.add_columns(mappings_count.label('mappings_count'))
+
+        return qs.first_or_404()
 
 
 def assign_source_db_wave(wave, db_ids):
     """Assign wave to databases, and count assigned, skipped and unmapped"""
     assigned = skipped = unmapped = 0
+    affected_wave_ids = {wave.id}
 
     # join Mapping in order to know if db is mapped to any target
     query = db.session.query(SourceDB, func.count(Mapping.id))\
@@ -377,11 +477,15 @@ def assign_source_db_wave(wave, db_ids):
         # assign only db without any operation
         elif source_db.status == SourceDBStatus.EMPTY and \
                 (not source_db.wave or not source_db.wave.is_running):
+            affected_wave_ids.add(source_db.wave_id)
             source_db.wave_id = wave.id
             assigned += 1
         else:
             skipped += 1
 
+    refresh_waves_rollup(affected_wave_ids)
+    bump_change_version(wave_ids=affected_wave_ids)
+
     db.session.commit()
 
     return {
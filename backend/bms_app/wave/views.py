@@ -13,21 +13,33 @@
 # limitations under the License.
 
 from flask import request
-from marshmallow import ValidationError
+from marshmallow import EXCLUDE, Schema, ValidationError, fields, validate
 
 from bms_app.models import (
-    BMSServer, Mapping, Operation, OperationDetails, SourceDB, SourceDBType,
-    Wave, db
+    BMSServer, Mapping, Operation, OperationDetails, OperationStatus, SourceDB,
+    SourceDBType, Wave, db
 )
 from bms_app.schema import AddWaveSchema, WaveSchema
+from bms_app.services.change_version import (
+    bump_change_version, conditional_response, get_wave_etag
+)
 from bms_app.services.utils import generate_target_gcp_logs_link
+from bms_app.services.wave_rollup import (
+    create_wave_rollup, delete_waves_rollup
+)
 from bms_app.wave import bp
 from bms_app.wave.services import (
     GetWaveService, list_waves_service, validate_wave_name_is_unique
 )
+from bms_app.wave.services.planner import (
+    MAX_WAVE_TARGETS, WavePlanner, apply_wave_plan
+)
 from bms_app.wave.services.waves import assign_source_db_wave
 
 
+MAX_DETAILS_LIMIT = 500
+
+
 @bp.route('', methods=['GET'])
 def list_waves():
     """Return all available waves."""
@@ -40,18 +52,101 @@ def list_waves():
     }
 
 
+class WaveDetailsArgsSchema(Schema):
+    class Meta:
+        unknown = EXCLUDE
+
+    status = fields.Str(
+        validate=validate.OneOf([x.value for x in OperationStatus])
+    )
+    step = fields.Str()
+    after = fields.Int(validate=validate.Range(min=1))
+    limit = fields.Int(validate=validate.Range(min=1, max=MAX_DETAILS_LIMIT))
+
+
+class WavePlanSchema(Schema):
+    project_id = fields.Int(required=True)
+    max_targets = fields.Int(
+        load_default=MAX_WAVE_TARGETS,
+        validate=validate.Range(min=1)
+    )
+    together_label_ids = fields.List(fields.Int(), load_default=list)
+    include_assigned = fields.Bool(load_default=False)
+    apply = fields.Bool(load_default=False)
+    name_prefix = fields.Str(load_default='wave', validate=validate.Length(min=1))
+
+
+@bp.route('/plan', methods=['POST'])
+def plan_waves():
+    """Split mapped dbs of the project into waves.
+
+    Waves are only proposed unless "apply" is set,
+    then they are created and dbs are assigned to them.
+    """
+    validated_data = WavePlanSchema().load(request.json)
+    project_id = validated_data['project_id']
+
+    waves = WavePlanner(
+        project_id,
+        max_targets=validated_data['max_targets'],
+        together_label_ids=validated_data['together_label_ids'],
+        include_assigned=validated_data['include_assigned'],
+    ).plan()
+
+    if validated_data['apply']:
+        apply_wave_plan(project_id, waves, prefix=validated_data['name_prefix'])
+
+    return {
+        'data': [
+            {
+                'id': x.id,
+                'name': x.name,
+                'db_ids': x.db_ids,
+                'targets': x.targets,
+                'estimated_duration': x.duration,
+            }
+            for x in waves
+        ],
+        # waves are run one after another
+        'estimated_makespan': sum(x.duration for x in waves),
+    }, 201 if validated_data['apply'] else 200
+
+
 @bp.route('/<int:wave_id>', methods=['GET'])
 def get_wave(wave_id):
-    """Return wave."""
-    return GetWaveService.run(
-        wave_id=wave_id,
-        return_details=request.args.get('details')
+    """Return wave.
+
+    Mappings returned with details=1 can be filtered by targets
+    status/step and paginated by db: limit=50&after=<next_cursor>
+    """
+    filters = WaveDetailsArgsSchema().load(request.args)
+
+    return conditional_response(
+        get_wave_etag(wave_id),
+        lambda: GetWaveService.run(
+            wave_id=wave_id,
+            return_details=request.args.get('details'),
+            **filters
+        )
     )
 
 
 @bp.route('/<int:wave_id>/operations/<int:operation_id>/details', methods=['GET'])
 def get_operation_details(wave_id, operation_id):
     """Return details/histories of the particular operation."""
+    # etag is of the wave, so the operation must belong to it
+    db.session.query(Operation.id) \
+        .filter(Operation.id == operation_id,
+                Operation.wave_id == wave_id) \
+        .first_or_404()
+
+    return conditional_response(
+        get_wave_etag(wave_id),
+        lambda: _get_operation_details_data(operation_id)
+    )
+
+
+def _get_operation_details_data(operation_id):
     query = db.session.query(OperationDetails, SourceDB, BMSServer) \
         .join(Mapping, OperationDetails.mapping_id == Mapping.id) \
         .join(SourceDB, Mapping.db_id == SourceDB.id) \
@@ -101,8 +196,10 @@ def delete_wave(wave_id):
         raise ValidationError({'wave_id': ['wave is not empty']})
 
     SourceDB.query.filter(SourceDB.wave_id == wave_id).update({'wave_id': None})
+    delete_waves_rollup([wave_id])
 
     wave = Wave.query.get_or_404(wave_id)
+    bump_change_version(project_ids=[wave.project_id])
     db.session.delete(wave)
     db.session.commit()
 
@@ -124,6 +221,7 @@ def edit_wave(wave_id):
     wave.name = validated_data['name']
 
     db.session.add(wave)
+    bump_change_version(wave_ids=[wave_id])
     db.session.commit()
 
     return WaveSchema().dump(wave)
@@ -146,6 +244,7 @@ def add_wave():
         )
 
         db.session.add(wave)
+        create_wave_rollup(wave)
         db.session.commit()
 
     response = {}
@@ -0,0 +1,77 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+from datetime import datetime
+
+from bms_app.models import (
+    ControlNode, ControlNodeStatus, Operation, Project, db
+)
+from bms_app.services.control_node_pool import ControlNodePool, delete_nodes
+from bms_app.webhook.services.pubsub import operation_handler_mapper
+
+
+logger = logging.getLogger(__name__)
+
+
+def maintain_control_node_pools():
+    """Apply warm pool policies of all projects.
+
+    Called periodically by Cloud Scheduler
+    (control-nodes-maintain job in deploy/gcp-foundation):
+    - dead nodes are deleted and their operations are failed
+    - idle nodes above the pool size or idle for too long are deleted
+    - instances of the reserved nodes are created
+    """
+    result = {'deleted': 0, 'failed_operations': [], 'started': 0}
+
+    projects = db.session.query(Project) \
+        .join(ControlNode, ControlNode.project_id == Project.id) \
+        .distinct() \
+        .all()
+
+    for project in projects:
+        pool = ControlNodePool(project)
+
+        dead_nodes = pool.get_dead_nodes()
+        operation_ids = [
+            x.operation_id for x in dead_nodes
+            if x.status == ControlNodeStatus.LEASED and x.operation_id
+        ]
+        for node in dead_nodes:
+            logger.warning('control node %s is dead', node.name)
+        delete_nodes(dead_nodes)
+        db.session.flush()
+
+        for operation_id in operation_ids:
+            fail_operation(operation_id)
+        db.session.commit()
+
+        result['deleted'] += len(dead_nodes)
+        result['failed_operations'].extend(operation_ids)
+
+        pool.scale_down()
+        db.session.commit()
+
+        result['started'] += pool.start_pending_nodes()
+
+    return result
+
+
+def fail_operation(operation_id):
+    """Fail the operation whose control node is dead."""
+    operation = db.session.query(Operation).get(operation_id)
+
+    cls_handler = operation_handler_mapper.get(operation.operation_type.value)
+    cls_handler(operation, datetime.now()).terminate()
@@ -14,9 +14,20 @@
 
 import base64
 import json
+import logging
+from collections import defaultdict
 from datetime import datetime
 
-from bms_app.models import BMSServer, Mapping, Operation, OperationDetails, db
+from sqlalchemy.orm import contains_eager
+
+from bms_app.models import (
+    BMSServer, Mapping, Operation, OperationDetails, SourceDB, db
+)
+from bms_app.services.change_version import bump_operation_change_version
+from bms_app.services.control_node_pool import heartbeat_control_node
+from bms_app.services.operation_events import (
+    get_operation_details_event, get_operation_event, publish_operation_events
+)
 from bms_app.services.status_handlers.operation import (
     DeploymentOperationStatusHandler, FailOverOperationStatusHandler,
     PreRestoreOperationStatusHandler, RestoreOperationStatusHandler,
@@ -29,6 +40,10 @@ from bms_app.services.status_handlers.operation_detail import (
     RestoreOperationDetailStatusHandler, RollbackOperationDetailStatusHandler,
     RollbackRestoreOperationDetailStatusHandler
 )
+from bms_app.services.wave_rollup import apply_wave_step
+
+
+logger = logging.getLogger(__name__)
 
 
 operation_details_handler_mapper = {
@@ -51,27 +66,72 @@ operation_handler_mapper = {
 }
 
 
-def process_host_related_data(msg, completed_at):
-    """Update host related data: source_db, mapping, operation details."""
-    for hostname in msg['hostnames']:
-        op_detail = (
-            db.session.query(OperationDetails)
-            .join(Mapping)
-            .join(BMSServer, Mapping.bms_id == BMSServer.id)
-            .filter(OperationDetails.operation_id == msg['operation_id'],
-                    BMSServer.name == hostname)
-            .first()
+def get_hosts_operation_details(operation_id, hostnames):
+    """Return OperationDetails of the operation for all hostnames at once.
+
+    Mapping and SourceDB are loaded within the same query
+    so status handlers don't need to lazy load them per host.
+    """
+    return (
+        db.session.query(OperationDetails)
+        .join(Mapping, OperationDetails.mapping_id == Mapping.id)
+        .join(BMSServer, Mapping.bms_id == BMSServer.id)
+        .join(SourceDB, Mapping.db_id == SourceDB.id)
+        .options(
+            contains_eager(OperationDetails.mapping)
+            .contains_eager(Mapping.source_db)
+        )
+        .filter(OperationDetails.operation_id == operation_id,
+                BMSServer.name.in_(hostnames))
+        .order_by(OperationDetails.id)
+        .all()
+    )
+
+
+def set_hosts_step(op_details, step, timestamp):
+    """Update step of all OperationDetails with one UPDATE statement."""
+    if not op_details:
+        return
+
+    db.session.query(OperationDetails) \
+        .filter(OperationDetails.id.in_([x.id for x in op_details])) \
+        .update(
+            {
+                'step': step,
+                'step_upd_at': datetime.fromtimestamp(timestamp),
+            },
+            synchronize_session='evaluate'
         )
 
-        cls_handler = operation_details_handler_mapper.get(
-            op_detail.operation_type.value
+
+def process_host_related_data(msg, completed_at):
+    """Update host related data: source_db, mapping, operation details.
+
+    All hosts are resolved by one query, steps are written by one UPDATE
+    and status changes are applied in memory and written by a single flush.
+    Return updated OperationDetails.
+    """
+    op_details = get_hosts_operation_details(
+        msg['operation_id'],
+        msg['hostnames']
+    )
+
+    if len(op_details) != len(set(msg['hostnames'])):
+        logger.warning(
+            'operation %s: found %s of %s hosts',
+            msg['operation_id'], len(op_details), len(msg['hostnames'])
         )
-        status_handler = cls_handler(op_detail, completed_at)
 
-        if 'step' in msg:
-            status_handler.set_step(msg['step'], msg['timestamp'])
+    if 'step' in msg:
+        set_hosts_step(op_details, msg['step'], msg['timestamp'])
+
+    if 'host_status' in msg:
+        for op_detail in op_details:
+            cls_handler = operation_details_handler_mapper.get(
+                op_detail.operation_type.value
+            )
+            status_handler = cls_handler(op_detail, completed_at)
 
-        if 'host_status' in msg:
             if msg['host_status'] == 'FAILED':
                 status_handler.fail()
 
@@ -81,7 +141,9 @@ def process_host_related_data(msg, completed_at):
             else:
                 status_handler.set_status(msg['host_status'])
 
-        db.session.flush()
+    db.session.flush()
+
+    return op_details
 
 
 def process_operation_data(msg, completed_at):
@@ -91,7 +153,13 @@ def process_operation_data(msg, completed_at):
     cls_handler = operation_handler_mapper.get(operation.operation_type.value)
     status_handler = cls_handler(operation, completed_at)
 
-    if msg['status'] == 'TERMINATED':
+    if operation.shards > 1 and msg['status'] in ('FINISHED', 'TERMINATED'):
+        # FINISHED is sent by every shard, the operation is finished
+        # once control nodes of all shards have terminated
+        if msg['status'] == 'TERMINATED':
+            status_handler.terminate_shard(msg.get('shard'))
+
+    elif msg['status'] == 'TERMINATED':
         status_handler.terminate()
 
     elif msg['status'] == 'FINISHED':
@@ -101,6 +169,58 @@ def process_operation_data(msg, completed_at):
         status_handler.set_status(msg['status'])
 
 
+def decode_msg(envelope):
+    """Return decoded data of the pub/sub envelope."""
+    raw_msg = base64.b64decode(envelope['message']['data'])
+    return json.loads(raw_msg)
+
+
+def get_first_step_timestamp(msgs):
+    """Return timestamp of the earliest step message or None."""
+    return min((x['timestamp'] for x in msgs if 'step' in x), default=None)
+
+
+def apply_operation_msgs(operation_id, msgs, first_step_timestamp=None):
+    """Apply messages of one operation within the current transaction.
+
+    first_step_timestamp is passed if msgs are coalesced
+    and earlier steps are dropped.
+    Return events to be published once the transaction is committed.
+    """
+    completed_at = datetime.now()
+
+    # lock in order to prevent running this function more than once
+    operation = Operation.query.with_for_update().get(operation_id)
+
+    if first_step_timestamp is None:
+        first_step_timestamp = get_first_step_timestamp(msgs)
+    if first_step_timestamp is not None and operation.first_step_at is None:
+        operation.first_step_at = datetime.fromtimestamp(first_step_timestamp)
+
+    changed_op_details = {}
+    for msg in msgs:
+        if 'hostnames' in msg:
+            op_details = process_host_related_data(msg, completed_at)
+            changed_op_details.update((x.id, x) for x in op_details)
+
+            if 'step' in msg and op_details:
+                apply_wave_step(operation, msg['step'])
+
+        if 'status' in msg:
+            process_operation_data(msg, completed_at)
+
+    # step messages don't change data shown on the project level
+    bump_operation_change_version(
+        operation,
+        with_projects=any('status' in x or 'host_status' in x for x in msgs)
+    )
+
+    events = [get_operation_details_event(x) for x in changed_op_details.values()]
+    events.append(get_operation_event(operation))
+
+    return events
+
+
 def process_msg(envelope):
     """Process pub/sub msg.
 
@@ -119,18 +239,159 @@ def process_msg(envelope):
        "subscription": "projects/myproject/subscriptions/mysubscription"
     }
     """
-    raw_msg = base64.b64decode(envelope['message']['data'])
-    msg = json.loads(raw_msg)
+    msg = decode_msg(envelope)
 
-    completed_at = datetime.now()
+    if 'control_node' in msg:
+        heartbeat_control_node(msg['control_node'], msg['timestamp'])
+        db.session.commit()
+        return
 
-    # lock in order to prevent running this function more than once
-    Operation.query.with_for_update().get(msg['operation_id'])
+    events = apply_operation_msgs(msg['operation_id'], [msg])
+
+    db.session.commit()
 
-    if 'hostnames' in msg:
-        process_host_related_data(msg, completed_at)
+    publish_operation_events(msg['operation_id'], events)
 
-    if 'status' in msg:
-        process_operation_data(msg, completed_at)
 
-    db.session.commit()
+def get_batch_envelopes(payload):
+    """Return list of envelopes from the batch payload.
+
+    Supported formats:
+    - list of push envelopes: [{"message": {...}}, ...]
+    - pub/sub pull response: {"receivedMessages": [{"ackId": .., "message": {...}}]}
+    - single push envelope: {"message": {...}}
+    """
+    if isinstance(payload, list):
+        return payload
+
+    if 'receivedMessages' in payload:
+        return payload['receivedMessages']
+
+    return [payload]
+
+
+def coalesce_msgs(msgs):
+    """Drop step updates that are replaced by a newer step of the same host.
+
+    Only the latest step (by timestamp) of every host is kept.
+    Host/operation statuses are kept in the original order
+    and applied after the steps.
+    """
+    latest_steps = {}  # hostname -> (timestamp, step)
+    status_msgs = []
+
+    for msg in msgs:
+        if 'step' in msg and 'hostnames' in msg:
+            for hostname in msg['hostnames']:
+                curr = latest_steps.get(hostname)
+                if curr is None or msg['timestamp'] >= curr[0]:
+                    latest_steps[hostname] = (msg['timestamp'], msg['step'])
+
+        if 'host_status' in msg or 'status' in msg:
+            status_msg = {k: v for k, v in msg.items() if k != 'step'}
+            if 'host_status' not in msg:
+                status_msg.pop('hostnames', None)
+            status_msgs.append(status_msg)
+
+    # group hosts having the same step/timestamp to update them at once
+    step_hosts = defaultdict(list)
+    for hostname, (timestamp, step) in latest_steps.items():
+        step_hosts[(timestamp, step)].append(hostname)
+
+    step_msgs = [
+        {'hostnames': hostnames, 'step': step, 'timestamp': timestamp}
+        for (timestamp, step), hostnames in step_hosts.items()
+    ]
+
+    return step_msgs + status_msgs
+
+
+def get_ack_id(envelope):
+    """Return ackId of pulled message or messageId of pushed one."""
+    if not isinstance(envelope, dict):
+        return None
+
+    message = envelope.get('message')
+    message_id = message.get('messageId') if isinstance(message, dict) else None
+
+    return envelope.get('ackId', message_id)
+
+
+def process_msgs_batch(payload):
+    """Process batch of pub/sub messages.
+
+    Messages are grouped by operation_id, superseded step updates
+    are dropped and every group is applied in its own transaction.
+    A failed group or an envelope which can't be decoded is reported
+    as failed without affecting the others.
+    Ack ids of applied and failed messages are returned,
+    so the caller acks only the applied ones. 'applied' counts
+    the applied envelopes, 'coalesced' the step updates left
+    of them after dropping the superseded ones.
+    """
+    envelopes = get_batch_envelopes(payload)
+
+    result = {
+        'received': len(envelopes),
+        'applied': 0,
+        'coalesced': 0,
+        'failed_operations': [],
+        'applied_ack_ids': [],
+        'failed_ack_ids': [],
+    }
+
+    groups = defaultdict(list)
+    group_ack_ids = defaultdict(list)
+    heartbeats = {}  # control node name -> latest timestamp
+    heartbeat_ack_ids = []
+    for envelope in envelopes:
+        ack_id = get_ack_id(envelope)
+
+        try:
+            msg = decode_msg(envelope)
+            if 'control_node' in msg:
+                heartbeats[msg['control_node']] = max(
+                    msg['timestamp'], heartbeats.get(msg['control_node'], 0)
+                )
+                heartbeat_ack_ids.append(ack_id)
+            else:
+                groups[msg['operation_id']].append(msg)
+                group_ack_ids[msg['operation_id']].append(ack_id)
+        except Exception:
+            logger.exception('error decoding msg %s', ack_id)
+            result['failed_ack_ids'].append(ack_id)
+
+    try:
+        for name, timestamp in heartbeats.items():
+            heartbeat_control_node(name, timestamp)
+        db.session.commit()
+    except Exception:
+        logger.exception('error processing control node heartbeats')
+        db.session.rollback()
+        result['failed_ack_ids'].extend(heartbeat_ack_ids)
+    else:
+        result['applied'] += len(heartbeat_ack_ids)
+        result['applied_ack_ids'].extend(heartbeat_ack_ids)
+
+    for operation_id, msgs in groups.items():
+        coalesced_msgs = coalesce_msgs(msgs)
+
+        try:
+            events = apply_operation_msgs(
+                operation_id,
+                [dict(msg, operation_id=operation_id) for msg in coalesced_msgs],
+                first_step_timestamp=get_first_step_timestamp(msgs)
+            )
+            db.session.commit()
+        except Exception:
+            logger.exception('error processing operation %s msgs', operation_id)
+            db.session.rollback()
+            result['failed_operations'].append(operation_id)
+            result['failed_ack_ids'].extend(group_ack_ids[operation_id])
+        else:
+            result['applied'] += len(group_ack_ids[operation_id])
+            result['coalesced'] += len(coalesced_msgs)
+            result['applied_ack_ids'].extend(group_ack_ids[operation_id])
+            publish_operation_events(operation_id, events)
+
+    return result
@@ -17,7 +17,8 @@ import logging
 from flask import request
 
 from bms_app.webhook import bp
-from bms_app.webhook.services.pubsub import process_msg
+from bms_app.webhook.services.control_nodes import maintain_control_node_pools
+from bms_app.webhook.services.pubsub import process_msg, process_msgs_batch
 
 
 logger = logging.getLogger(__name__)
@@ -31,3 +32,27 @@ def status():
     process_msg(envelope)
 
     return {}, 201
+
+
+@bp.route('/status/batch', methods=['POST'])
+def status_batch():
+    """Update Operation and OperationDetails statuses/steps in batch.
+
+    Accept pub/sub pull response or list of push envelopes.
+    """
+    envelopes = request.get_json(force=True)
+    result = process_msgs_batch(envelopes)
+
+    return result, 201
+
+
+@bp.route('/control-nodes/maintain', methods=['POST'])
+def control_nodes_maintain():
+    """Start, check and scale down warm pool control nodes.
+
+    Called periodically by Cloud Scheduler
+    (control-nodes-maintain job in deploy/gcp-foundation).
+    """
+    result = maintain_control_node_pools()
+
+    return result, 201
@@ -0,0 +1,41 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""add control_node_started_at, first_step_at to Operation
+
+Revision ID: a6c81e3f59d2
+Revises: f3b9d2c6a417
+Create Date: 2026-10-18 16:35:51.902446
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6c81e3f59d2'
+down_revision = 'f3b9d2c6a417'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('operations', sa.Column('control_node_started_at', sa.DateTime(), nullable=True))
+    op.add_column('operations', sa.Column('first_step_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('operations', 'first_step_at')
+    op.drop_column('operations', 'control_node_started_at')
@@ -0,0 +1,57 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""add updated_at, active idempotency_key unique index to ImportJob
+
+Revision ID: a7d2e5f91c34
+Revises: e3a9c4d17b52
+Create Date: 2026-10-18 21:37:05.127760
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7d2e5f91c34'
+down_revision = 'e3a9c4d17b52'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('import_jobs', sa.Column('updated_at', sa.DateTime(), nullable=True))
+    op.execute(
+        "UPDATE import_jobs "
+        "SET updated_at = COALESCE(completed_at, started_at, created_at)"
+    )
+    # jobs run by threads of the previous app instances are lost
+    op.execute(
+        "UPDATE import_jobs "
+        "SET status = 'FAILED', error = 'job was interrupted' "
+        "WHERE status IN ('PENDING', 'IN_PROGRESS')"
+    )
+    op.create_index(
+        'ix_import_jobs_active_idempotency_key',
+        'import_jobs',
+        ['idempotency_key'],
+        unique=True,
+        postgresql_where=sa.text("status IN ('PENDING', 'IN_PROGRESS')")
+    )
+
+
+def downgrade():
+    op.drop_index('ix_import_jobs_active_idempotency_key', table_name='import_jobs')
+    op.drop_column('import_jobs', 'updated_at')
@@ -0,0 +1,57 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""add control_nodes
+
+Revision ID: b2d47a9c1e86
+Revises: a6c81e3f59d2
+Create Date: 2026-10-18 17:48:26.571920
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlalchemy_utils
+
+from bms_app.models import ControlNodeStatus
+
+
+# revision identifiers, used by Alembic.
+revision = 'b2d47a9c1e86'
+down_revision = 'a6c81e3f59d2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('control_nodes',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    sa.Column('subnet', sa.String(), nullable=False),
+    sa.Column('zone', sa.String(), nullable=False),
+    sa.Column('status', sqlalchemy_utils.types.choice.ChoiceType(ControlNodeStatus, impl=sa.String(20)), nullable=False),
+    sa.Column('operation_id', sa.Integer(), nullable=True),
+    sa.Column('lease_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('leased_at', sa.DateTime(), nullable=True),
+    sa.Column('idle_since', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['operation_id'], ['operations.id'], ),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+
+
+def downgrade():
+    op.drop_table('control_nodes')
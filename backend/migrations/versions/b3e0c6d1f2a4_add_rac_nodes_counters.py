@@ -0,0 +1,51 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""add RacNodesCounter
+
+Revision ID: b3e0c6d1f2a4
+Revises: 91ab03eea364
+Create Date: 2026-10-18 10:12:41.503127
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3e0c6d1f2a4'
+down_revision = '91ab03eea364'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('rac_nodes_counters',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('operation_id', sa.Integer(), nullable=False),
+    sa.Column('db_id', sa.Integer(), nullable=False),
+    sa.Column('total_nodes', sa.Integer(), nullable=False),
+    sa.Column('finished_nodes', sa.Integer(), nullable=False),
+    sa.Column('complete_nodes', sa.Integer(), nullable=False),
+    sa.Column('failed_nodes', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['db_id'], ['source_dbs.id'], ),
+    sa.ForeignKeyConstraint(['operation_id'], ['operations.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('operation_id', 'db_id')
+    )
+
+
+def downgrade():
+    op.drop_table('rac_nodes_counters')
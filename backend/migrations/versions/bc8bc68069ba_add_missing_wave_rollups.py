@@ -0,0 +1,69 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""add missing WaveRollup
+
+Revision ID: bc8bc68069ba
+Revises: c5e93b7d2f18
+Create Date: 2026-10-18 20:41:37.212934
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+
+# revision identifiers, used by Alembic.
+revision = 'bc8bc68069ba'
+down_revision = 'c5e93b7d2f18'
+branch_labels = None
+depends_on = None
+
+
+UNDEPLOYED_STATUSES = ('EMPTY', 'ROLLBACKED')
+DEPLOYED_STATUSES = (
+    'DEPLOYED', 'PRE_RESTORE', 'PRE_RESTORE_COMPLETE', 'PRE_RESTORE_FAILED',
+    'DT', 'DT_COMPLETE', 'DT_FAILED', 'DT_PARTIALLY', 'DT_ROLLBACK',
+    'FAILOVER', 'FAILOVER_COMPLETE', 'FAILOVER_FAILED'
+)
+
+
+def upgrade():
+    # steps of running waves are set by the next step message
+    op.execute(sa.text(
+        """
+        INSERT INTO wave_rollups (
+            wave_id, undeployed_dbs, deployed_dbs, failed_dbs,
+            curr_step, total_steps, updated_at
+        )
+        SELECT
+            waves.id,
+            COUNT(CASE WHEN source_dbs.status IN :undeployed THEN 1 END),
+            COUNT(CASE WHEN source_dbs.status IN :deployed THEN 1 END),
+            COUNT(CASE WHEN source_dbs.status = 'FAILED' THEN 1 END),
+            0, 0, now()
+        FROM waves
+        LEFT JOIN source_dbs ON source_dbs.wave_id = waves.id
+        LEFT JOIN wave_rollups ON wave_rollups.wave_id = waves.id
+        WHERE wave_rollups.wave_id IS NULL
+        GROUP BY waves.id
+        """
+    ).bindparams(
+        sa.bindparam('undeployed', UNDEPLOYED_STATUSES, expanding=True),
+        sa.bindparam('deployed', DEPLOYED_STATUSES, expanding=True)
+    ))
+
+
+def downgrade():
+    pass
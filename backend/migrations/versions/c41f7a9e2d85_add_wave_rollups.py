@@ -0,0 +1,49 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""add WaveRollup
+
+Revision ID: c41f7a9e2d85
+Revises: b3e0c6d1f2a4
+Create Date: 2026-10-18 11:03:27.816402
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41f7a9e2d85'
+down_revision = 'b3e0c6d1f2a4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('wave_rollups',
+    sa.Column('wave_id', sa.Integer(), nullable=False),
+    sa.Column('undeployed_dbs', sa.Integer(), nullable=False),
+    sa.Column('deployed_dbs', sa.Integer(), nullable=False),
+    sa.Column('failed_dbs', sa.Integer(), nullable=False),
+    sa.Column('curr_step', sa.Integer(), nullable=False),
+    sa.Column('total_steps', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['wave_id'], ['waves.id'], ),
+    sa.PrimaryKeyConstraint('wave_id')
+    )
+
+
+def downgrade():
+    op.drop_table('wave_rollups')
@@ -0,0 +1,41 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""add shards, finished_shards to Operation
+
+Revision ID: c5e93b7d2f18
+Revises: b2d47a9c1e86
+Create Date: 2026-10-18 19:02:13.640581
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5e93b7d2f18'
+down_revision = 'b2d47a9c1e86'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('operations', sa.Column('shards', sa.Integer(), server_default='1', nullable=False))
+    op.add_column('operations', sa.Column('finished_shards', sa.JSON(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('operations', 'finished_shards')
+    op.drop_column('operations', 'shards')
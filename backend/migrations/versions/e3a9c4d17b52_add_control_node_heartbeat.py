@@ -0,0 +1,41 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""add heartbeat_at to ControlNode
+
+Revision ID: e3a9c4d17b52
+Revises: bc8bc68069ba
+Create Date: 2026-10-18 21:10:52.418337
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3a9c4d17b52'
+down_revision = 'bc8bc68069ba'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('control_nodes', sa.Column('heartbeat_at', sa.DateTime(), nullable=True))
+    op.alter_column('control_nodes', 'zone', existing_type=sa.String(), nullable=True)
+
+
+def downgrade():
+    op.alter_column('control_nodes', 'zone', existing_type=sa.String(), nullable=False)
+    op.drop_column('control_nodes', 'heartbeat_at')
@@ -0,0 +1,59 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""add import_jobs
+
+Revision ID: e8c4f1a27b63
+Revises: d7a2e5b81c90
+Create Date: 2026-10-18 13:05:41.128305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlalchemy_utils
+
+from bms_app.models import ImportJobStatus, ImportJobType
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8c4f1a27b63'
+down_revision = 'd7a2e5b81c90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('import_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('job_type', sqlalchemy_utils.types.choice.ChoiceType(ImportJobType, impl=sa.String(20)), nullable=False),
+    sa.Column('status', sqlalchemy_utils.types.choice.ChoiceType(ImportJobStatus, impl=sa.String(20)), nullable=True),
+    sa.Column('idempotency_key', sa.String(length=64), nullable=False),
+    sa.Column('project_id', sa.Integer(), nullable=True),
+    sa.Column('overwrite', sa.Boolean(), nullable=True),
+    sa.Column('total', sa.Integer(), nullable=True),
+    sa.Column('processed', sa.Integer(), nullable=True),
+    sa.Column('result', sa.JSON(), nullable=True),
+    sa.Column('error', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('completed_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_import_jobs_idempotency_key'), 'import_jobs', ['idempotency_key'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_import_jobs_idempotency_key'), table_name='import_jobs')
+    op.drop_table('import_jobs')
@@ -0,0 +1,39 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""add details to OperationDetailsError
+
+Revision ID: f3b9d2c6a417
+Revises: e8c4f1a27b63
+Create Date: 2026-10-18 15:42:17.208113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3b9d2c6a417'
+down_revision = 'e8c4f1a27b63'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('operation_details_errors', sa.Column('details', sa.Text(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('operation_details_errors', 'details')
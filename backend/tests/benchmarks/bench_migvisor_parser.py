@@ -0,0 +1,171 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Compare streaming MigvisorParser with the previous pandas based one.
+
+Synthetic workbooks have the same layout as tests/files/MigVisor_example.xlsx.
+
+Usage (environment variables required by bms_app.settings must be set):
+    python -m tests.benchmarks.bench_migvisor_parser --dbs 100 500 2000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import openpyxl
+import pandas as pd
+
+from bms_app.source_db.parsers import MigvisorParser
+
+
+DB_HEADERS = [
+    'Server', 'Database Type', 'Version', 'Architecture', 'Cores', 'RAM',
+    'Allocated memory', 'Database Name', 'Tags', 'Database Size (Gb)',
+    'Sessions', 'Active Sessions', 'Allowed Sessions', 'Detected IOPS',
+    'Detected MBPS', 'Edition',
+]
+
+
+def build_workbook(path, dbs_count, filler_rows):
+    """Write synthetic migvisor workbook.
+
+    Every #sheet has filler_rows of features that are not used by the parser.
+    Strings are saved to the shared table like in real migvisor files.
+    """
+    wb = openpyxl.Workbook()
+    wb.remove(wb.active)
+
+    ws = wb.create_sheet(MigvisorParser.DATABASE_SERVERS_SHEET)
+    for _ in range(5):
+        ws.append([])
+    ws.append(['Database Overview Report'])
+    ws.append([])
+    ws.append(DB_HEADERS)
+    for ind in range(dbs_count):
+        ws.append([
+            f'lxoradbprod{ind}', 'Oracle', '19.3.0.0.0', 'Linux x86 64-bit',
+            2, 8, 3, f'DB{ind}', None, '1.304', 24, 103, 0, 0, 0, None
+        ])
+
+    for ind in range(dbs_count):
+        ws = wb.create_sheet(f'#{ind}lxoradbprod{ind}')
+        ws.append(['Feature', 'Property', 'Value'])
+
+        for row_ind in range(filler_rows):
+            ws.append(['BTree Indexes', f'SCHEMA{row_ind}', str(row_ind)])
+
+        ws.append(['DB Full Version', '', '12.2.0.1.0'])
+        ws.append(['PSU Installed', '', 'RDBMS_12.2.0.1.0_LINUX.X64_170125'])
+        if ind % 2:
+            ws.append(['Real Application Clusters', 'node1', 'lxoradbprod'])
+            ws.append(['Real Application Clusters', 'node2', 'lxoradbprod'])
+            for dg_name in ('DATA', 'RECO'):
+                ws.append([
+                    'ASM Diskgroups', dg_name,
+                    f'DG_NAME:{dg_name} ALLOC_SIZE:1048576 REDUNDANCY:EXTERN '
+                    'COMPAT:12.2.0.1.0 DB_COMPAT:12.2.0.1.0'
+                ])
+
+    wb.save(path)
+
+
+class PandasMigvisorParser(MigvisorParser):
+    """Previous implementation: every sheet is loaded to DataFrame."""
+
+    def parse(self):
+        wb = pd.ExcelFile(self.file_path)
+        df = wb.parse(self.DATABASE_SERVERS_SHEET, header=None)
+
+        for index, row in df.iterrows():
+            values = [x.lower() for x in row.values if isinstance(x, str)]
+            if all((x in values for x in ('server', 'database name'))):
+                break
+
+        df.columns = df.iloc[index]
+        df = df[index + 1:].dropna(how='all')
+        df = df.rename(columns={
+            x: self.COLUMNS_MAP.get(x.lower(), x.lower()) for x in df.columns
+        })
+        df = df.replace({np.nan: None})[self.COLUMNS_TO_PARSE]
+        df['oracle_version'] = df['oracle_version'].apply(str)
+        df['db_engine'] = df['db_engine'].apply(str.upper)
+        db_data = df.to_dict(orient='records')
+
+        self._validate_data(db_data)
+
+        wb_sheet_names = [n for n in wb.sheet_names if n.startswith('#')]
+        for ind, sheet_name in enumerate(wb_sheet_names):
+            df = wb.parse(sheet_name)
+
+            def values(feature):
+                return list(df[df['Feature'] == feature].Value)
+
+            full_version = values(self.DB_FULL_VERSION)
+            psu = values(self.PSU_INSTALLED)
+
+            db_data[ind].update({
+                'rac_nodes': len(values(self.RAC_FEATURE)),
+                'oracle_version': self._full_db_version(
+                    full_version[0] if full_version else None,
+                    db_data[ind]
+                ),
+                'oracle_release': self._oracle_release(psu[0] if psu else None),
+            })
+            db_data[ind].update(
+                self._parse_asm_diskgroup_data(values(self.ASM_DISKGROUPS))
+            )
+
+        return db_data
+
+
+def measure(parser_cls, path):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = parser_cls(path).parse()
+    duration = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, duration, peak / 1024 / 1024
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--dbs', type=int, nargs='+', default=[100, 500])
+    arg_parser.add_argument('--filler-rows', type=int, default=200)
+    args = arg_parser.parse_args()
+
+    print(f'{"dbs":>6} {"size MB":>8} {"parser":>10} {"sec":>8} {"peak MB":>8}')
+
+    for dbs_count in args.dbs:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'migvisor.xlsx')
+            build_workbook(path, dbs_count, args.filler_rows)
+            size = os.path.getsize(path) / 1024 / 1024
+
+            results = []
+            for name, parser_cls in (('pandas', PandasMigvisorParser),
+                                     ('streaming', MigvisorParser)):
+                result, duration, peak = measure(parser_cls, path)
+                results.append(result)
+                print(f'{dbs_count:>6} {size:>8.1f} {name:>10} {duration:>8.2f} {peak:>8.1f}')
+
+            assert results[0] == results[1], 'parsers results differ'
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Measure PlacementSolver on synthetic inventories.
+
+Targets have machine types of BMS_PARAMS and random luns,
+a part of dbs are RAC with 2-4 nodes.
+
+Usage (environment variables required by bms_app.settings must be set):
+    python -m tests.benchmarks.bench_placement --dbs 1000 5000 10000
+"""
+
+import argparse
+import random
+import time
+
+from bms_app.inventory_manager.schema import BMS_PARAMS
+from bms_app.services.placement import (
+    PlacementDb, PlacementSolver, PlacementTarget, parse_ram
+)
+
+
+LOCATIONS = ['us-east4', 'us-west2', 'europe-west3', 'asia-southeast1']
+
+
+def build_inventory(dbs_count, targets_ratio, rac_share, seed):
+    """Return (dbs, targets) with targets_ratio targets per db node."""
+    rnd = random.Random(seed)
+    machines = [(int(cpu), parse_ram(ram)) for cpu, _, ram in BMS_PARAMS.values()]
+
+    dbs = []
+    for ind in range(dbs_count):
+        dbs.append(PlacementDb(
+            id=ind,
+            cores=rnd.choice([2, 4, 8, 16, 32, 64]),
+            ram=rnd.choice([16, 32, 64, 128, 256, 512]),
+            db_size=rnd.randint(10, 20000),
+            nodes=rnd.randint(2, 4) if rnd.random() < rac_share else 1
+        ))
+
+    targets_count = int(sum(x.nodes for x in dbs) * targets_ratio)
+    targets = []
+    for ind in range(targets_count):
+        cpu, ram = rnd.choice(machines)
+        targets.append(PlacementTarget(
+            id=ind,
+            cpu=cpu,
+            ram=ram,
+            disk=sum(rnd.choice([500, 1000, 2000, 4000]) for _ in range(rnd.randint(1, 8))),
+            location=rnd.choice(LOCATIONS)
+        ))
+
+    return dbs, targets
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--dbs', type=int, nargs='+', default=[1000, 5000])
+    arg_parser.add_argument('--targets-ratio', type=float, default=1.2)
+    arg_parser.add_argument('--rac-share', type=float, default=0.2)
+    arg_parser.add_argument('--seed', type=int, default=1)
+    args = arg_parser.parse_args()
+
+    print(f'{"dbs":>7} {"targets":>8} {"placed":>7} {"unplaced":>9} {"sec":>8}')
+
+    for dbs_count in args.dbs:
+        dbs, targets = build_inventory(
+            dbs_count, args.targets_ratio, args.rac_share, args.seed
+        )
+
+        start = time.perf_counter()
+        placement = PlacementSolver(dbs, targets).solve()
+        duration = time.perf_counter() - start
+
+        used_targets = [y for x in placement.mappings for y in x['bms_id']]
+        assert len(used_targets) == len(set(used_targets)), 'target is reused'
+
+        print(
+            f'{dbs_count:>7} {len(targets):>8} {len(placement.mappings):>7} '
+            f'{len(placement.unplaced):>9} {duration:>8.2f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
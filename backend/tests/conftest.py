@@ -30,6 +30,7 @@ os.environ['GCP_RESTORE_CONFIGS_PREFIX'] = 'restore_configs'
 os.environ['GCP_CLOUD_RUN_SERVICE_NAME'] = ''
 os.environ['GCP_OAUTH_CLIENT_ID'] = '12345'
 os.environ['GCP_LB_URL'] = 'https://abc.com'
+os.environ['OPERATION_EVENTS_BACKEND'] = 'local'
 
 
 from bms_app import create_app
@@ -18,9 +18,10 @@ import factory
 from factory.alchemy import SQLAlchemyModelFactory
 
 from bms_app.models import (
-    BMSServer, Config, Label, Mapping, Operation, OperationDetails,
-    OperationDetailsError, Project, RestoreConfig, ScheduledTask, SourceDB,
-    SourceDBStatus, SourceDBType, Wave, db
+    BMSServer, Config, ControlNode, ControlNodeStatus, Label, Mapping,
+    Operation, OperationDetails, OperationDetailsError, Project,
+    RacNodesCounter, RestoreConfig, ScheduledTask, SourceDB, SourceDBStatus,
+    SourceDBType, Wave, db
 )
 
 
@@ -169,6 +170,18 @@ class OperationDetailsErrorFactory(SQLAlchemyModelFactory):
     message = factory.Faker('word')
 
 
+class RacNodesCounterFactory(SQLAlchemyModelFactory):
+    class Meta:
+        model = RacNodesCounter
+        sqlalchemy_session = db.session
+        sqlalchemy_session_persistence = 'commit'
+
+    total_nodes = 2
+    finished_nodes = 0
+    complete_nodes = 0
+    failed_nodes = 0
+
+
 class RestoreConfigFactory(SQLAlchemyModelFactory):
     class Meta:
         model = RestoreConfig
@@ -207,3 +220,18 @@ class LabelFactory(SQLAlchemyModelFactory):
 
     name = factory.Sequence(lambda n: f'label_{n}')
     project = factory.SubFactory(ProjectFactory)
+
+
+class ControlNodeFactory(SQLAlchemyModelFactory):
+    class Meta:
+        model = ControlNode
+        sqlalchemy_session = db.session
+        sqlalchemy_session_persistence = 'commit'
+
+    name = factory.Sequence(lambda n: f'control-node-{n}')
+    project = factory.SubFactory(ProjectFactory)
+    subnet = factory.LazyAttribute(lambda obj: obj.project.subnet)
+    zone = 'zone1'
+    status = ControlNodeStatus.IDLE
+    lease_count = 0
+    heartbeat_at = factory.LazyFunction(datetime.now)
@@ -0,0 +1,106 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from sqlalchemy import event
+
+from bms_app.models import Mapping, SourceDB, db
+
+from tests.factories import (
+    BMSServerFactory, MappingFactory, ProjectFactory, SourceDBFactory,
+    WaveFactory
+)
+
+
+def test_bulk_add_mappings(client):
+    pr = ProjectFactory()
+    wave = WaveFactory(project=pr)
+    db_1 = SourceDBFactory(project=pr)
+    db_2 = SourceDBFactory(project=pr, db_type='RAC')
+    bms_1, bms_2, bms_3 = BMSServerFactory(), BMSServerFactory(), BMSServerFactory()
+
+    req = client.post('/api/mappings/bulk', json={'mappings': [
+        {'db_id': db_1.id, 'bms_id': [bms_1.id], 'wave_id': wave.id},
+        {'db_id': db_2.id, 'bms_id': [bms_2.id, bms_3.id], 'fe_rac_nodes': 2},
+    ]})
+
+    assert req.status_code == 201
+    assert [x['db_id'] for x in req.json['data']] == [db_1.id, db_2.id]
+
+    assert SourceDB.query.get(db_1.id).wave_id == wave.id
+    assert SourceDB.query.get(db_2.id).fe_rac_nodes == 2
+
+    rac_mappings = Mapping.query \
+        .filter(Mapping.db_id == db_2.id) \
+        .order_by(Mapping.rac_node) \
+        .all()
+    assert [(x.bms_id, x.rac_node) for x in rac_mappings] == [
+        (bms_2.id, 1), (bms_3.id, 2)
+    ]
+    assert Mapping.query.filter(Mapping.db_id == db_1.id).one().rac_node is None
+
+
+def test_bulk_add_mappings_errors(client):
+    pr = ProjectFactory()
+    db_1 = SourceDBFactory(project=pr)
+    db_2 = SourceDBFactory(project=pr)
+    db_3 = SourceDBFactory(project=pr)
+    bms_1, bms_2, bms_3 = BMSServerFactory(), BMSServerFactory(), BMSServerFactory()
+    MappingFactory(source_db=db_3, bms=bms_3)
+
+    req = client.post('/api/mappings/bulk', json={'mappings': [
+        {'db_id': db_1.id, 'bms_id': [bms_1.id]},
+        {'db_id': db_2.id, 'bms_id': [bms_1.id, bms_2.id]},
+        {'db_id': db_3.id, 'bms_id': [bms_3.id]},
+        {'db_id': 1000, 'bms_id': [1000], 'wave_id': 1000},
+    ]})
+
+    assert req.status_code == 400
+    errors = req.json['errors']['mappings']
+    assert set(errors) == {'0', '1', '2', '3'}
+    assert errors['0'] == {
+        'bms_id': [f'server is mapped to several databases: {bms_1.id}']
+    }
+    assert 'only RAC database can be mapped to multiple bms targets' in errors['1']['bms_id']
+    assert errors['2'] == {
+        'db_id': ['database already has mapping'],
+        'bms_id': [f'server already has mapping: {bms_3.id}'],
+    }
+    assert set(errors['3']) == {'db_id', 'bms_id', 'wave_id'}
+
+    # nothing is saved
+    assert Mapping.query.count() == 1
+
+
+def test_bulk_add_mappings_queries_count(client):
+    pr = ProjectFactory()
+    items = [
+        {'db_id': SourceDBFactory(project=pr).id, 'bms_id': [BMSServerFactory().id]}
+        for _ in range(30)
+    ]
+
+    statements = []
+
+    def count_statement(*args):
+        statements.append(args)
+
+    event.listen(db.engine, 'before_cursor_execute', count_statement)
+    try:
+        req = client.post('/api/mappings/bulk', json={'mappings': items})
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count_statement)
+
+    assert req.status_code == 201
+    assert len(req.json['data']) == 30
+    # does not depend on the number of mappings
+    assert len(statements) < 20
@@ -13,6 +13,9 @@
 # limitations under the License.
 
 import factory
+from sqlalchemy import event
+
+from bms_app.models import db
 
 from tests.factories import (
     BMSServerFactory, ConfigFactory, LabelFactory, MappingFactory,
@@ -225,3 +228,69 @@ def test_get_operations_details_for_mapping(client):
         'completed_at': op_detail_2.completed_at.strftime('%a, %d %b %Y %H:%M:%S GMT'),
         'status': op_detail_2.status.value
     } in response['data']
+
+
+def test_filter_mappings_by_labels(client):
+    pr = ProjectFactory()
+    db_1 = SourceDBFactory(project=pr)
+    db_2 = SourceDBFactory(project=pr)
+    db_3 = SourceDBFactory(project=pr)
+    for source_db in (db_1, db_2, db_3):
+        MappingFactory(source_db=source_db, bms=BMSServerFactory())
+    label_1 = LabelFactory(project=pr, source_dbs=[db_1])
+    label_2 = LabelFactory(project=pr, source_dbs=[db_1, db_3])
+
+    req = client.get(f'/api/mappings?label_id={label_1.id}&label_id={label_2.id}')
+
+    assert req.status_code == 200
+    assert [x['db_id'] for x in req.json['data']] == [db_1.id, db_3.id]
+
+
+def test_paginate_mappings(client):
+    pr = ProjectFactory()
+    dbs = [SourceDBFactory(project=pr) for _ in range(3)]
+    # rac db is not split between pages
+    MappingFactory(source_db=dbs[0], bms=BMSServerFactory(), rac_node=1)
+    MappingFactory(source_db=dbs[0], bms=BMSServerFactory(), rac_node=2)
+    MappingFactory(source_db=dbs[1], bms=BMSServerFactory())
+    MappingFactory(source_db=dbs[2], bms=BMSServerFactory())
+
+    req = client.get(f'/api/mappings?project_id={pr.id}&limit=2')
+
+    assert req.status_code == 200
+    assert [x['db_id'] for x in req.json['data']] == [dbs[0].id, dbs[1].id]
+    assert len(req.json['data'][0]['bms']) == 2
+    assert req.json['next_cursor'] == dbs[1].id
+
+    req = client.get(f'/api/mappings?project_id={pr.id}&limit=2&after={dbs[1].id}')
+
+    assert [x['db_id'] for x in req.json['data']] == [dbs[2].id]
+    assert req.json['next_cursor'] is None
+
+
+def test_get_mappings_queries_count(client):
+    pr = ProjectFactory()
+    for _ in range(20):
+        source_db = SourceDBFactory(project=pr)
+        ConfigFactory(source_db=source_db)
+        mapping = MappingFactory(source_db=source_db, bms=BMSServerFactory())
+        LabelFactory(project=pr, source_dbs=[source_db])
+        OperationDetailsFactory(mapping=mapping)
+
+    url = f'/api/mappings?project_id={pr.id}'
+    statements = []
+
+    def count_statement(*args):
+        statements.append(args)
+
+    event.listen(db.engine, 'before_cursor_execute', count_statement)
+    try:
+        req = client.get(url)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count_statement)
+
+    assert len(req.json['data']) == 20
+    assert all(len(x['labels']) == 1 for x in req.json['data'])
+    assert not any(x['editable'] for x in req.json['data'])
+    # does not depend on the number of dbs
+    assert len(statements) == 3
@@ -45,3 +45,19 @@ def test_pre_restore_errors(parser_mock, client):
             'details': parser_mock.return_value,
         },
     ]
+
+
+@patch('bms_app.operation.views.RmanLogFileParser.get_cmd_output')
+def test_pre_restore_errors_saved_details(parser_mock, client):
+    op_d = OperationDetailsFactory()
+    err = OperationDetailsErrorFactory(
+        operation_details=op_d,
+        message='rman error',
+        details='saved output'
+    )
+
+    req = client.get(f'api/operations/{op_d.operation_id}/errors')
+
+    assert req.status_code == 200
+    assert req.json == [{'name': err.message, 'details': 'saved output'}]
+    assert not parser_mock.called
@@ -0,0 +1,184 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import base64
+import json
+from datetime import datetime
+
+from bms_app.models import OperationStatus, SourceDBStatus
+from bms_app.webhook.services.pubsub import coalesce_msgs
+
+from tests.factories import (
+    BMSServerFactory, MappingFactory, OperationDetailsFactory,
+    OperationFactory, ProjectFactory, SourceDBFactory, WaveFactory
+)
+
+
+def make_envelope(data, message_id='2070443601311540'):
+    """Return pub/sub push envelope."""
+    return {
+        'message': {
+            'data': base64.urlsafe_b64encode(json.dumps(data).encode()).decode(),
+            'messageId': message_id,
+        },
+        'subscription': 'projects/myproject/subscriptions/mysubscription'
+    }
+
+
+def test_coalesce_keeps_latest_step_per_host():
+    msgs = [
+        {'hostnames': ['h1', 'h2'], 'step': 'STEP1', 'timestamp': 1},
+        {'hostnames': ['h1'], 'step': 'STEP2', 'timestamp': 2},
+        {'hostnames': ['h2'], 'step': 'STEP0', 'timestamp': 0},
+        {'hostnames': ['h2'], 'host_status': 'COMPLETE', 'timestamp': 3},
+    ]
+
+    coalesced = coalesce_msgs(msgs)
+
+    assert coalesced == [
+        {'hostnames': ['h1'], 'step': 'STEP2', 'timestamp': 2},
+        {'hostnames': ['h2'], 'step': 'STEP1', 'timestamp': 1},
+        {'hostnames': ['h2'], 'host_status': 'COMPLETE', 'timestamp': 3},
+    ]
+
+
+def test_batch_of_envelopes(client):
+    pr = ProjectFactory()
+    wave = WaveFactory(project=pr)
+    db_1 = SourceDBFactory(project=pr, wave=wave)
+    bms_1 = BMSServerFactory()
+    bms_2 = BMSServerFactory()
+    map_1 = MappingFactory(source_db=db_1, bms=bms_1)
+    map_2 = MappingFactory(bms=bms_2)
+    op_1 = OperationFactory(wave=wave)
+    op_2 = OperationFactory(wave=wave)
+    opd_1 = OperationDetailsFactory(wave=wave, mapping=map_1, operation=op_1)
+    opd_2 = OperationDetailsFactory(wave=wave, mapping=map_2, operation=op_2)
+
+    envelopes = [
+        make_envelope({'operation_id': op_1.id, 'hostnames': [bms_1.name],
+                       'step': 'HOST_PREPARATION', 'timestamp': 10}),
+        make_envelope({'operation_id': op_2.id, 'hostnames': [bms_2.name],
+                       'step': 'SW_INSTALL', 'timestamp': 10}),
+        make_envelope({'operation_id': op_1.id, 'hostnames': [bms_1.name],
+                       'step': 'CHECK_INSTANCE', 'timestamp': 5}),
+        make_envelope({'operation_id': op_1.id, 'hostnames': [bms_1.name],
+                       'host_status': 'COMPLETE', 'timestamp': 11}),
+    ]
+
+    req = client.post('/webhooks/status/batch', json=envelopes)
+
+    assert req.status_code == 201
+    assert req.json == {
+        'received': 4,
+        'applied': 4,
+        'coalesced': 3,
+        'failed_operations': [],
+        'applied_ack_ids': ['2070443601311540'] * 4,
+        'failed_ack_ids': [],
+    }
+
+    assert opd_1.step == 'HOST_PREPARATION'
+    assert opd_1.status == OperationStatus.COMPLETE
+    assert db_1.status == SourceDBStatus.DEPLOYED
+    assert opd_2.step == 'SW_INSTALL'
+
+
+def test_pull_response_batch(client):
+    bms_1 = BMSServerFactory()
+    map_1 = MappingFactory(bms=bms_1)
+    op_1 = OperationFactory()
+    opd_1 = OperationDetailsFactory(mapping=map_1, operation=op_1)
+
+    payload = {
+        'receivedMessages': [
+            dict(make_envelope({'operation_id': op_1.id,
+                                'hostnames': [bms_1.name],
+                                'step': 'SW_INSTALL', 'timestamp': 10}),
+                 ackId='1'),
+        ]
+    }
+
+    req = client.post('/webhooks/status/batch', json=payload)
+
+    assert req.status_code == 201
+    assert req.json['applied_ack_ids'] == ['1']
+    assert opd_1.step == 'SW_INSTALL'
+
+
+def test_failed_operation_does_not_affect_others(client):
+    bms_1 = BMSServerFactory()
+    map_1 = MappingFactory(bms=bms_1)
+    op_1 = OperationFactory()
+    opd_1 = OperationDetailsFactory(mapping=map_1, operation=op_1)
+
+    envelopes = [
+        # unknown operation status handler
+        make_envelope({'operation_id': 999, 'status': 'FINISHED'}, '1'),
+        make_envelope({'operation_id': op_1.id, 'hostnames': [bms_1.name],
+                       'step': 'SW_INSTALL', 'timestamp': 10}, '2'),
+    ]
+
+    req = client.post('/webhooks/status/batch', json=envelopes)
+
+    assert req.status_code == 201
+    assert req.json['failed_operations'] == [999]
+    assert req.json['failed_ack_ids'] == ['1']
+    assert req.json['applied_ack_ids'] == ['2']
+    assert req.json['applied'] == 1
+    assert opd_1.step == 'SW_INSTALL'
+
+
+def test_bad_envelope_does_not_affect_others(client):
+    bms_1 = BMSServerFactory()
+    map_1 = MappingFactory(bms=bms_1)
+    op_1 = OperationFactory()
+    opd_1 = OperationDetailsFactory(mapping=map_1, operation=op_1)
+
+    payload = {
+        'receivedMessages': [
+            {'ackId': '1', 'message': {'data': 'not base64 json'}},
+            {'ackId': '2', 'message': {}},
+            dict(make_envelope({'operation_id': op_1.id,
+                                'hostnames': [bms_1.name],
+                                'step': 'SW_INSTALL', 'timestamp': 10}),
+                 ackId='3'),
+        ]
+    }
+
+    req = client.post('/webhooks/status/batch', json=payload)
+
+    assert req.status_code == 201
+    assert req.json['received'] == 3
+    assert req.json['failed_ack_ids'] == ['1', '2']
+    assert req.json['applied_ack_ids'] == ['3']
+    assert opd_1.step == 'SW_INSTALL'
+
+
+def test_batch_first_step_at_is_earliest_step(client):
+    bms_1 = BMSServerFactory()
+    map_1 = MappingFactory(bms=bms_1)
+    op_1 = OperationFactory()
+    OperationDetailsFactory(mapping=map_1, operation=op_1)
+
+    envelopes = [
+        make_envelope({'operation_id': op_1.id, 'hostnames': [bms_1.name],
+                       'step': 'PRE_DEPLOYMENT', 'timestamp': 10}),
+        make_envelope({'operation_id': op_1.id, 'hostnames': [bms_1.name],
+                       'step': 'SW_INSTALL', 'timestamp': 20}),
+    ]
+
+    client.post('/webhooks/status/batch', json=envelopes)
+
+    assert op_1.first_step_at == datetime.fromtimestamp(10)
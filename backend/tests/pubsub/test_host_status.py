@@ -15,11 +15,14 @@
 import base64
 import json
 
-from bms_app.models import OperationStatus, SourceDBStatus, SourceDBType
+from bms_app.models import (
+    OperationStatus, RacNodesCounter, SourceDBStatus, SourceDBType
+)
 
 from tests.factories import (
     BMSServerFactory, MappingFactory, OperationDetailsFactory,
-    OperationFactory, ProjectFactory, SourceDBFactory, WaveFactory
+    OperationFactory, ProjectFactory, RacNodesCounterFactory, SourceDBFactory,
+    WaveFactory
 )
 
 
@@ -403,3 +406,76 @@ def test_in_progress_host_status(client):
     assert data['status'] == SourceDBStatus.EMPTY.value
 
     assert opd_1.status == OperationStatus.IN_PROGRESS
+
+
+def test_rac_counter_is_updated(client):
+    """Test RAC nodes counter is updated on every node status change."""
+    pr = ProjectFactory()
+    wave = WaveFactory(project=pr)
+    db_1 = SourceDBFactory(project=pr, wave=wave, status=SourceDBStatus.EMPTY, db_type=SourceDBType.RAC)
+    bms_1 = BMSServerFactory(name='oracle-bms-vm1')
+    bms_2 = BMSServerFactory(name='oracle-bms-vm2')
+    map_1 = MappingFactory(source_db=db_1, bms=bms_1, rac_node=0)
+    map_2 = MappingFactory(source_db=db_1, bms=bms_2, rac_node=1)
+    op_1 = OperationFactory(wave=wave, operation_type='DEPLOYMENT')
+    OperationDetailsFactory(wave=wave, mapping=map_1, operation=op_1)
+    OperationDetailsFactory(wave=wave, mapping=map_2, operation=op_1)
+    counter = RacNodesCounterFactory(operation_id=op_1.id, db_id=db_1.id)
+
+    msg_data = {
+        'wave_id': wave.id,
+        'operation_id': op_1.id,
+        'hostnames': [bms_1.name],
+        'host_status': 'COMPLETE'
+    }
+    message['message']['data'] = encode(msg_data)
+    client.post(f'/webhooks/status', json=message)
+
+    assert (counter.finished_nodes, counter.complete_nodes) == (1, 1)
+    assert db_1.status == SourceDBStatus.EMPTY
+
+    # repeated msg must not be counted twice
+    client.post(f'/webhooks/status', json=message)
+
+    assert (counter.finished_nodes, counter.complete_nodes) == (1, 1)
+    assert db_1.status == SourceDBStatus.EMPTY
+
+    msg_data['hostnames'] = [bms_2.name]
+    message['message']['data'] = encode(msg_data)
+    client.post(f'/webhooks/status', json=message)
+
+    assert (counter.finished_nodes, counter.complete_nodes) == (2, 2)
+    assert db_1.status == SourceDBStatus.DEPLOYED
+
+
+def test_rac_counter_is_created_for_running_operation(client):
+    """Test RAC nodes counter is created from current nodes statuses."""
+    pr = ProjectFactory()
+    wave = WaveFactory(project=pr)
+    db_1 = SourceDBFactory(project=pr, wave=wave, status=SourceDBStatus.EMPTY, db_type=SourceDBType.RAC)
+    bms_1 = BMSServerFactory(name='oracle-bms-vm1')
+    bms_2 = BMSServerFactory(name='oracle-bms-vm2')
+    bms_3 = BMSServerFactory(name='oracle-bms-vm3')
+    map_1 = MappingFactory(source_db=db_1, bms=bms_1, rac_node=0)
+    map_2 = MappingFactory(source_db=db_1, bms=bms_2, rac_node=1)
+    map_3 = MappingFactory(source_db=db_1, bms=bms_3, rac_node=2)
+    op_1 = OperationFactory(wave=wave, operation_type='DEPLOYMENT')
+    OperationDetailsFactory(wave=wave, mapping=map_1, operation=op_1, status=OperationStatus.FAILED)
+    OperationDetailsFactory(wave=wave, mapping=map_2, operation=op_1, status=OperationStatus.IN_PROGRESS)
+    OperationDetailsFactory(wave=wave, mapping=map_3, operation=op_1, status=OperationStatus.IN_PROGRESS)
+
+    msg_data = {
+        'wave_id': wave.id,
+        'operation_id': op_1.id,
+        'hostnames': [bms_2.name, bms_3.name],
+        'host_status': 'COMPLETE'
+    }
+    message['message']['data'] = encode(msg_data)
+    client.post(f'/webhooks/status', json=message)
+
+    counter = RacNodesCounter.query.filter_by(operation_id=op_1.id, db_id=db_1.id).one()
+    assert counter.total_nodes == 3
+    assert counter.finished_nodes == 3
+    assert counter.complete_nodes == 2
+    assert counter.failed_nodes == 1
+    assert db_1.status == SourceDBStatus.FAILED
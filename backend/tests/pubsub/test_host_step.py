@@ -14,6 +14,7 @@
 
 import base64
 import json
+from datetime import datetime, timedelta
 
 from tests.factories import (
     BMSServerFactory, MappingFactory, OperationDetailsFactory,
@@ -105,3 +106,49 @@ def test_correct_host_update(client):
     assert not op_details_1.step_upd_at
     assert op_details_2.step_upd_at
     assert op_details_3.step_upd_at
+
+
+def test_unknown_host_is_skipped(client):
+    pr = ProjectFactory()
+    wave = WaveFactory(project=pr)
+    bms_1 = BMSServerFactory()
+    map_1 = MappingFactory(bms=bms_1)
+    op_1 = OperationFactory(wave=wave)
+    op_details_1 = OperationDetailsFactory(
+        wave=wave,
+        mapping=map_1,
+        operation=op_1
+    )
+
+    msg_data = {'wave_id': wave.id,
+                'operation_id': op_1.id,
+                'hostnames': [bms_1.name, 'unknown-host'],
+                'step': 'STEP1'}
+    message['message']['data'] = encode(msg_data)
+
+    req = client.post(f'/webhooks/status', json=message)
+
+    assert req.status_code == 201
+    assert op_details_1.step == 'STEP1'
+    assert op_details_1.step_upd_at
+
+
+def test_first_step_time_is_saved(client):
+    bms_1 = BMSServerFactory(name='oracle-bms-vm1')
+    map_1 = MappingFactory(bms=bms_1)
+    op_1 = OperationFactory(
+        control_node_started_at=datetime.fromtimestamp(123456789) - timedelta(seconds=90)
+    )
+    OperationDetailsFactory(mapping=map_1, operation=op_1)
+
+    for step in ('PRE_DEPLOYMENT', 'DEPLOYMENT'):
+        msg_data = {
+            'operation_id': op_1.id,
+            'hostnames': ['oracle-bms-vm1'],
+            'step': step,
+        }
+        message['message']['data'] = encode(msg_data)
+        client.post('/webhooks/status', json=message)
+
+        assert op_1.first_step_at == datetime.fromtimestamp(123456789)
+        assert op_1.boot_duration == 90
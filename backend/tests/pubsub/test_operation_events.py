@@ -0,0 +1,229 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import base64
+import json
+from datetime import datetime
+from unittest.mock import patch
+
+from bms_app import settings
+from bms_app.models import OperationStatus
+from bms_app.services.operation_events import (
+    STREAM_END, LocalEventBroker, PostgresEventBroker
+)
+
+from tests.factories import (
+    BMSServerFactory, MappingFactory, OperationDetailsFactory,
+    OperationFactory, ProjectFactory, SourceDBFactory, WaveFactory
+)
+
+
+def encode(data):
+    data['timestamp'] = 123456789
+    return base64.urlsafe_b64encode(json.dumps(data).encode()).decode()
+
+
+def post_msg(client, data):
+    return client.post('/webhooks/status', json={'message': {'data': encode(data)}})
+
+
+def parse_sse(body):
+    return [
+        json.loads(chunk.split('data: ', 1)[1])
+        for chunk in body.split('\n\n')
+        if chunk.startswith('event: ')
+    ]
+
+
+def test_local_broker():
+    broker = LocalEventBroker()
+    queue_1 = broker.subscribe(1)
+    queue_2 = broker.subscribe(2)
+
+    broker.publish(1, [{'type': 'operation'}])
+
+    assert queue_1.get_nowait() == {'type': 'operation'}
+    assert queue_2.empty()
+
+    broker.unsubscribe(1, queue_1)
+    broker.publish(1, [{'type': 'operation'}])
+
+    assert queue_1.empty()
+
+
+class StopListener(BaseException):
+    pass
+
+
+def test_listener_reconnects_with_backoff(client):
+    broker = PostgresEventBroker(client.application)
+    with patch.object(broker, '_start_listener'):
+        events_queue = broker.subscribe(1)
+
+    with patch.object(broker, '_listen_channel', side_effect=[Exception, Exception, StopListener]) as listen_mock, \
+            patch('bms_app.services.operation_events.time.sleep') as sleep_mock:
+        try:
+            broker._listen()
+        except StopListener:
+            pass
+
+    assert listen_mock.call_count == 3
+    assert [x.args[0] for x in sleep_mock.call_args_list] == [1, 2]
+    # subscribers might have missed events
+    assert events_queue.get_nowait() is STREAM_END
+
+
+def test_stream_is_ended_by_broker(client):
+    op_1 = OperationFactory(status=OperationStatus.IN_PROGRESS)
+    op_id = op_1.id
+
+    req = client.get(f'/api/operations/{op_id}/events', buffered=False)
+    chunks = iter(req.response)
+    next(chunks)  # retry
+    next(chunks)  # operation
+
+    client.application.extensions['operation_events'].end_streams()
+
+    assert b''.join(chunks) == b''
+
+
+def test_status_msg_is_published_after_commit(client):
+    pr = ProjectFactory()
+    wave = WaveFactory(project=pr)
+    db_1 = SourceDBFactory(project=pr, wave=wave)
+    bms_1 = BMSServerFactory()
+    map_1 = MappingFactory(source_db=db_1, bms=bms_1)
+    op_1 = OperationFactory(wave=wave, status=OperationStatus.IN_PROGRESS)
+    op_detail = OperationDetailsFactory(
+        wave=wave,
+        mapping=map_1,
+        operation=op_1,
+        status=OperationStatus.IN_PROGRESS
+    )
+
+    broker = client.application.extensions['operation_events']
+    events_queue = broker.subscribe(op_1.id)
+
+    post_msg(client, {
+        'operation_id': op_1.id,
+        'hostnames': [bms_1.name],
+        'step': 'PRE_INSTALL',
+    })
+
+    assert events_queue.get_nowait() == {
+        'type': 'operation_details',
+        'id': op_detail.id,
+        'mapping_id': map_1.id,
+        'step': 'PRE_INSTALL',
+        'status': 'IN_PROGRESS',
+    }
+    assert events_queue.get_nowait()['type'] == 'operation'
+    assert events_queue.empty()
+
+
+def test_events_stream(client):
+    pr = ProjectFactory()
+    wave = WaveFactory(project=pr)
+    db_1 = SourceDBFactory(project=pr, wave=wave)
+    bms_1 = BMSServerFactory()
+    map_1 = MappingFactory(source_db=db_1, bms=bms_1)
+    op_1 = OperationFactory(wave=wave, status=OperationStatus.IN_PROGRESS)
+    OperationDetailsFactory(
+        wave=wave,
+        mapping=map_1,
+        operation=op_1,
+        status=OperationStatus.IN_PROGRESS
+    )
+    op_id = op_1.id
+
+    req = client.get(f'/api/operations/{op_id}/events', buffered=False)
+    chunks = iter(req.response)
+
+    assert req.mimetype == 'text/event-stream'
+    assert next(chunks).decode() == 'retry: 3000\n\n'
+    assert parse_sse(next(chunks).decode())[0]['type'] == 'operation_details'
+    assert parse_sse(next(chunks).decode())[0] == {
+        'type': 'operation',
+        'id': op_id,
+        'status': 'IN_PROGRESS',
+        'is_finished': False,
+    }
+
+    broker = client.application.extensions['operation_events']
+    broker.publish(op_id, [
+        {'type': 'operation_details', 'id': 1, 'step': 'PRE_INSTALL'},
+        {'type': 'operation', 'id': op_id, 'status': 'COMPLETE', 'is_finished': True},
+    ])
+
+    events = parse_sse(b''.join(chunks).decode())
+
+    assert [x['type'] for x in events] == ['operation_details', 'operation']
+    assert events[1]['status'] == 'COMPLETE'
+
+
+def test_finished_operation_stream_is_closed(client):
+    op_1 = OperationFactory(
+        status=OperationStatus.COMPLETE,
+        completed_at=datetime.now()
+    )
+
+    req = client.get(f'/api/operations/{op_1.id}/events')
+
+    assert req.status_code == 200
+    assert parse_sse(req.data.decode()) == [{
+        'type': 'operation',
+        'id': op_1.id,
+        'status': 'COMPLETE',
+        'is_finished': True,
+    }]
+
+
+def test_events_stream_not_found(client):
+    req = client.get('/api/operations/123/events')
+
+    assert req.status_code == 404
+
+
+def test_stream_is_closed_after_max_lifetime(client):
+    op_1 = OperationFactory(status=OperationStatus.IN_PROGRESS)
+
+    with patch.object(settings, 'OPERATION_EVENTS_MAX_LIFETIME', 0):
+        req = client.get(f'/api/operations/{op_1.id}/events')
+
+    assert req.status_code == 200
+    assert [x['type'] for x in parse_sse(req.data.decode())] == ['operation']
+
+
+def test_number_of_open_streams_is_limited(client):
+    op_1 = OperationFactory(status=OperationStatus.IN_PROGRESS)
+    limiter = client.application.extensions['operation_events_streams']
+
+    acquired = 0
+    while limiter.acquire():
+        acquired += 1
+
+    try:
+        req = client.get(f'/api/operations/{op_1.id}/events')
+        assert req.status_code == 503
+        assert req.headers['Retry-After'] == '3'
+    finally:
+        for _ in range(acquired):
+            limiter.release()
+
+    # stream is released once the response is closed
+    with patch.object(settings, 'OPERATION_EVENTS_MAX_LIFETIME', 0):
+        for _ in range(acquired + 1):
+            req = client.get(f'/api/operations/{op_1.id}/events')
+            assert req.status_code == 200
+            req.close()
@@ -0,0 +1,94 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import io
+import os
+
+import openpyxl
+import pytest
+
+from bms_app.source_db.parsers import MigvisorFileDataError, MigvisorParser
+
+from tests.benchmarks.bench_migvisor_parser import (
+    PandasMigvisorParser, build_workbook
+)
+
+
+def test_parse_example_file(files_dir):
+    data = MigvisorParser(os.path.join(files_dir, 'MigVisor_example.xlsx')).parse()
+
+    assert len(data) == 5
+    assert data[2] == {
+        'server': 'lxoradbprod3',
+        'oracle_version': '12.2.0.1.0',
+        'arch': 'Linux x86 64-bit',
+        'cores': 2,
+        'ram': 8,
+        'allocated_memory': 3,
+        'db_name': 'RAC_DB',
+        'db_size': '1.304',
+        'db_engine': 'ORACLE',
+        'rac_nodes': 2,
+        'oracle_release': '12.2.0.1.170125',
+        'asm': [
+            {'au_size': '1M', 'diskgroup': 'DATA', 'redundancy': 'EXTERNAL'},
+            {'au_size': '1M', 'diskgroup': 'RECO', 'redundancy': 'EXTERNAL'},
+        ],
+        'compatible_asm': '12.2.0.1.0',
+        'compatible_rdbms': '12.2.0.1.0',
+    }
+
+
+def test_same_result_as_pandas_parser(tmp_path):
+    path = tmp_path / 'migvisor.xlsx'
+    build_workbook(path, dbs_count=4, filler_rows=10)
+
+    data = MigvisorParser(path).parse()
+
+    assert data == PandasMigvisorParser(path).parse()
+    assert [x['rac_nodes'] for x in data] == [0, 2, 0, 2]
+    assert data[1]['asm'][1]['diskgroup'] == 'RECO'
+
+
+def test_numeric_version_and_empty_rows():
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = 'Database Servers'
+    ws.append(['Server', 'Version', 'Database Name', 'Database Type'])
+    ws.append(['srv1', 19, 'DB1', 'oracle'])
+    ws.append([None, None, None, None])
+    ws.append(['srv2', 12.2, 'DB2', 'oracle'])
+
+    fp = io.BytesIO()
+    wb.save(fp)
+
+    data = MigvisorParser(fp).parse()
+
+    assert [(x['server'], x['oracle_version']) for x in data] == [
+        ('srv1', '19'), ('srv2', '12.2'),
+    ]
+    assert data[0]['db_engine'] == 'ORACLE'
+    assert data[0]['cores'] is None
+
+
+def test_headers_row_not_found():
+    wb = openpyxl.Workbook()
+    wb.active.title = 'Database Servers'
+    wb.active.append(['Server', 'Version'])
+
+    fp = io.BytesIO()
+    wb.save(fp)
+
+    with pytest.raises(MigvisorFileDataError, match='Headers row not found'):
+        MigvisorParser(fp).parse()
@@ -15,11 +15,14 @@
 import os
 from decimal import Decimal
 
-from bms_app.models import SourceDB, SourceDBType, db
+from sqlalchemy import event
+
+from bms_app.models import Config, SourceDB, SourceDBType, db
+from bms_app.source_db.services import save_source_dbs
 
 from tests.factories import (
-    MappingFactory, OperationDetailsFactory, OperationFactory, ProjectFactory,
-    SourceDBFactory, WaveFactory
+    ConfigFactory, MappingFactory, OperationDetailsFactory, OperationFactory,
+    ProjectFactory, SourceDBFactory, WaveFactory
 )
 
 
@@ -338,3 +341,71 @@ def test_update_si_to_rac(client, files_dir):
 
     assert rac_db.rac_nodes == 2
     assert rac_db.db_type == SourceDBType.RAC
+
+
+def test_overwrite_existing_config(client, files_dir):
+    pr = ProjectFactory()
+    test_1 = SourceDBFactory(project=pr, server='lxoradbprod5', db_name='test_1')
+    ConfigFactory(
+        source_db=test_1,
+        asm_config_values=[],
+        misc_config_values={},
+        is_configured=True
+    )
+
+    with open(os.path.join(files_dir, 'MigVisor_example.xlsx'), 'rb') as fp:
+        req = client.post(
+            '/api/source-dbs/migvisor',
+            data={
+                'project_id': pr.id,
+                'file': (fp, 'MigVisor_example.xlsx'),
+                'overwrite': True,
+            },
+            content_type='multipart/form-data',
+        )
+
+    assert req.json == {'added': 4, 'skipped': 0, 'updated': 1}
+
+    config = db.session.query(Config).filter(Config.db_id == test_1.id).one()
+
+    assert config.is_configured
+    assert config.asm_config_values[0]['diskgroup'] == 'DATA'
+    assert config.misc_config_values['compatible_rdbms'] == '12.2.0.1.1'
+    assert db.session.query(Config).count() == 5
+
+
+def test_save_source_dbs_in_batches(client):
+    pr = ProjectFactory()
+    SourceDBFactory(project=pr, server='srv0', db_name='DB0')
+    parsed_dbs_data = [
+        {
+            'server': f'srv{ind}',
+            'db_name': f'DB{ind}',
+            'oracle_version': '19.3.0.0.0',
+            'db_engine': 'ORACLE',
+            'rac_nodes': 0,
+        }
+        for ind in range(1200)
+    ]
+    # duplicate in the same file
+    parsed_dbs_data.append(dict(parsed_dbs_data[1], rac_nodes=2))
+
+    statements = []
+
+    def count_statement(*args):
+        statements.append(args)
+
+    event.listen(db.engine, 'before_cursor_execute', count_statement)
+    try:
+        result = save_source_dbs(parsed_dbs_data, overwrite=True, project_id=pr.id)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count_statement)
+
+    assert result == {'added': 1199, 'skipped': 0, 'updated': 2}
+    # does not depend on the number of dbs
+    assert len(statements) < 20
+    assert db.session.query(SourceDB).filter(SourceDB.project_id == pr.id).count() == 1200
+    assert db.session.query(Config).count() == 1200
+
+    db_1 = db.session.query(SourceDB).filter(SourceDB.db_name == 'DB1').one()
+    assert db_1.db_type == SourceDBType.RAC
@@ -14,9 +14,13 @@
 
 from unittest.mock import patch
 
-from bms_app.models import BMSServer, db
+from bms_app.inventory_manager.bms_api import fetch_bms_instances
+from bms_app.inventory_manager.services import insert_discovered_servers
+from bms_app.models import BMSServer, SourceDBStatus, db
 
-from .factories import BMSServerFactory
+from .factories import (
+    BMSServerFactory, ConfigFactory, MappingFactory, SourceDBFactory
+)
 
 
 bms_api_data = [{'id': 'at-207685681-svr001',
@@ -161,3 +165,106 @@ def test_bms_discovery_not_overwrite(mock, client):
     assert not bms.luns
     assert not bms.networks
     assert bms.machine_type == 'abc'
+
+
+@patch('bms_app.inventory_manager.views.fetch_bms_instances', return_value=bms_api_data)
+def test_bms_discovery_overwrite_mapped(mock, client):
+    deployable_bms = BMSServerFactory(name='at-207685681-svr001', machine_type='abc')
+    deployable_db = SourceDBFactory(status=SourceDBStatus.EMPTY)
+    config = ConfigFactory(source_db=deployable_db)
+    MappingFactory(source_db=deployable_db, bms=deployable_bms)
+
+    deployed_bms = BMSServerFactory(name='at-207685681-svr002', machine_type='abc')
+    deployed_db = SourceDBFactory(status=SourceDBStatus.DEPLOYED)
+    deployed_config = ConfigFactory(source_db=deployed_db)
+    MappingFactory(source_db=deployed_db, bms=deployed_bms)
+
+    req = client.post('/api/targets/discovery', data={'overwrite': 'True'})
+    assert req.status_code == 201
+
+    assert deployable_bms.machine_type == 'o2-standard-32-metal'
+    assert not config.is_configured
+    assert config.asm_config_values is None
+    assert config.misc_config_values['oracle_root'] is None
+
+    assert deployed_bms.machine_type == 'abc'
+    assert deployed_config.asm_config_values
+
+
+def test_bms_discovery_duplicated_instances(client):
+    instance = dict(bms_api_data[0])
+    duplicated = dict(instance, machineType='o2-standard-16-metal')
+
+    with patch('bms_app.inventory_manager.views.fetch_bms_instances',
+               return_value=[instance, duplicated]):
+        req = client.post('/api/targets/discovery', data={'overwrite': 'True'})
+
+    assert req.status_code == 201
+    servers = db.session.query(BMSServer).all()
+    assert len(servers) == 1
+    assert servers[0].machine_type == 'o2-standard-16-metal'
+
+
+def test_bms_discovery_duplicated_instances_result(client):
+    instance = dict(bms_api_data[0])
+    duplicated = dict(instance, machineType='o2-standard-16-metal')
+
+    result = insert_discovered_servers([instance, duplicated], overwrite=False)
+
+    assert result == {'added': 1, 'updated': 0, 'skipped': 1}
+
+    result = insert_discovered_servers([instance, duplicated], overwrite=True)
+
+    assert result == {'added': 0, 'updated': 2, 'skipped': 0}
+
+
+class FakeRequest:
+    def __init__(self, response):
+        self.response = response
+
+    def execute(self):
+        return self.response
+
+
+class FakeInstancesResource:
+    """Return instances by pages of 2 items."""
+
+    def __init__(self, names):
+        self.names = names
+
+    def _page(self, start):
+        resp = {'instances': [{'name': x} for x in self.names[start:start + 2]]}
+        if start + 2 < len(self.names):
+            resp['nextPageToken'] = str(start + 2)
+        return FakeRequest(resp)
+
+    def list(self, parent, pageSize):
+        return self._page(0)
+
+    def list_next(self, req, resp):
+        if 'nextPageToken' in resp:
+            return self._page(int(resp['nextPageToken']))
+        return None
+
+    def get(self, name):
+        return FakeRequest({'name': name, 'state': 'RUNNING'})
+
+
+def test_fetch_bms_instances_follows_pages():
+    names = [f'instance-{x}' for x in range(5)]
+    resource = FakeInstancesResource(names)
+
+    with patch('bms_app.inventory_manager.bms_api._get_instances_resource',
+               return_value=resource):
+        instances = list(fetch_bms_instances('project', max_workers=3))
+
+    assert [x['name'] for x in instances] == names
+    assert all(x['state'] == 'RUNNING' for x in instances)
+
+
+def test_fetch_bms_instances_empty():
+    resource = FakeInstancesResource([])
+
+    with patch('bms_app.inventory_manager.bms_api._get_instances_resource',
+               return_value=resource):
+        assert list(fetch_bms_instances('project')) == []
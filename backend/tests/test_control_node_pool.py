@@ -0,0 +1,227 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import base64
+import json
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+from bms_app import settings
+from bms_app.models import (
+    ControlNode, ControlNodeStatus, OperationStatus, OperationType, db
+)
+from bms_app.services.control_node import RollbackRestoreControlNodeService
+from bms_app.services.status_handlers.operation import (
+    RollbackRestoreOperationStatusHandler
+)
+
+from tests.factories import (
+    ControlNodeFactory, OperationDetailsFactory, OperationFactory,
+    ProjectFactory
+)
+
+
+@pytest.fixture
+def gcloud_mocks():
+    with patch.object(settings, 'CONTROL_NODE_POOL_SIZE', 1), \
+            patch('bms_app.services.control_node.create_instance') as cn_create_mock, \
+            patch('bms_app.services.control_node.get_zone', return_value='zone1'), \
+            patch('bms_app.services.control_node_pool.create_instance') as pool_create_mock, \
+            patch('bms_app.services.control_node_pool.get_zone', return_value='zone1'), \
+            patch('bms_app.services.control_node_pool.upload_blob_from_string') as upload_mock, \
+            patch('bms_app.services.control_node_pool.delete_instance') as delete_mock, \
+            patch('bms_app.services.control_node_pool.delete_blob'):
+        yield {
+            'cn_create': cn_create_mock,
+            'pool_create': pool_create_mock,
+            'upload': upload_mock,
+            'delete': delete_mock,
+        }
+
+
+def run_operation(project):
+    operation = OperationFactory(
+        operation_type=OperationType.ROLLBACK_RESTORE,
+        wave=None
+    )
+    RollbackRestoreControlNodeService.run(
+        project=project,
+        operation=operation,
+        gcs_config_dir='config/dir',
+        total_targets=1
+    )
+    return operation
+
+
+def test_operation_is_assigned_to_idle_node(client, gcloud_mocks):
+    node = ControlNodeFactory()
+
+    operation = run_operation(node.project)
+
+    assert node.status == ControlNodeStatus.LEASED
+    assert node.operation_id == operation.id
+    assert not gcloud_mocks['cn_create'].called
+
+    bucket, key, script = gcloud_mocks['upload'].call_args.args
+    assert key == f'control_node_pool/{node.name}/assignment.sh'
+    assert f'OPERATION_ID={operation.id}' in script
+    assert 'gcloud compute instances delete' not in script
+
+    # node is reserved to replenish the pool, instance is created later
+    assert not gcloud_mocks['pool_create'].called
+    assert db.session.query(ControlNode) \
+        .filter(ControlNode.status == ControlNodeStatus.PENDING) \
+        .count() == 1
+
+
+def test_new_node_is_started_without_idle_nodes(client, gcloud_mocks):
+    project = ProjectFactory()
+
+    run_operation(project)
+
+    assert gcloud_mocks['cn_create'].called
+    script = gcloud_mocks['cn_create'].call_args.kwargs['startup_script']
+    assert 'gcloud compute instances delete' in script
+
+    assert not gcloud_mocks['pool_create'].called
+
+
+def test_node_is_unleased_if_assignment_fails(client, gcloud_mocks):
+    node = ControlNodeFactory()
+    gcloud_mocks['upload'].side_effect = Exception('gcs error')
+
+    run_operation(node.project)
+
+    assert node.status == ControlNodeStatus.IDLE
+    assert node.operation_id is None
+    assert node.lease_count == 0
+    # operation is run on the new instance
+    assert gcloud_mocks['cn_create'].called
+
+
+def test_node_is_released_when_operation_is_finished(client, gcloud_mocks):
+    node = ControlNodeFactory()
+    # another idle node is above the pool size and is deleted
+    extra_node = ControlNodeFactory(project=node.project)
+    extra_node_name = extra_node.name
+    operation = run_operation(node.project)
+    assert node.operation_id == operation.id
+
+    RollbackRestoreOperationStatusHandler(operation, completed_at=None).finish()
+    db.session.commit()
+
+    assert node.status == ControlNodeStatus.IDLE
+    assert node.operation_id is None
+    assert gcloud_mocks['delete'].call_args.args[2] == extra_node_name
+    assert db.session.query(ControlNode).count() == 1
+
+
+def test_node_is_recycled_after_max_leases(client, gcloud_mocks):
+    node = ControlNodeFactory(lease_count=settings.CONTROL_NODE_POOL_MAX_LEASES - 1)
+    node_name = node.name
+    operation = run_operation(node.project)
+
+    RollbackRestoreOperationStatusHandler(operation, completed_at=None).finish()
+    db.session.commit()
+
+    assert gcloud_mocks['delete'].call_args_list[0].args[2] == node_name
+    assert not db.session.query(ControlNode) \
+        .filter(ControlNode.name == node_name) \
+        .count()
+
+
+def post_heartbeat(client, node_name):
+    data = {'control_node': node_name, 'timestamp': int(datetime.now().timestamp())}
+    encoded = base64.urlsafe_b64encode(json.dumps(data).encode()).decode()
+    return client.post('/webhooks/status', json={'message': {'data': encoded}})
+
+
+def test_reserved_node_is_leased_after_heartbeat(client, gcloud_mocks):
+    project = ProjectFactory()
+    run_operation(project)
+
+    req = client.post('/webhooks/control-nodes/maintain')
+
+    assert req.status_code == 201
+    assert req.json['started'] == 1
+    node = db.session.query(ControlNode).one()
+    assert node.status == ControlNodeStatus.BOOTING
+    assert node.zone == 'zone1'
+    script = gcloud_mocks['pool_create'].call_args.kwargs['startup_script']
+    assert 'assignment.sh' in script
+    assert f'control_node\\": \\"${{NODE_NAME}}' in script
+
+    # booting node is not leased
+    run_operation(project)
+    assert node.status == ControlNodeStatus.BOOTING
+
+    post_heartbeat(client, node.name)
+
+    assert node.status == ControlNodeStatus.IDLE
+    assert node.heartbeat_at
+
+    operation = run_operation(project)
+    assert node.status == ControlNodeStatus.LEASED
+    assert node.operation_id == operation.id
+
+
+def test_dead_leased_node_fails_operation(client, gcloud_mocks):
+    node = ControlNodeFactory()
+    node_name = node.name
+    operation = run_operation(node.project)
+    OperationDetailsFactory(operation=operation, wave=None)
+    node.heartbeat_at = datetime.now() - timedelta(
+        seconds=settings.CONTROL_NODE_POOL_HEARTBEAT_TIMEOUT + 1
+    )
+    db.session.commit()
+
+    req = client.post('/webhooks/control-nodes/maintain')
+
+    assert req.json['deleted'] == 1
+    assert req.json['failed_operations'] == [operation.id]
+    assert operation.status == OperationStatus.FAILED
+    assert gcloud_mocks['delete'].call_args.args[2] == node_name
+    assert not db.session.query(ControlNode) \
+        .filter(ControlNode.name == node_name) \
+        .count()
+
+
+def test_idle_ttl_is_applied_periodically(client, gcloud_mocks):
+    node = ControlNodeFactory(
+        idle_since=datetime.now() - timedelta(
+            seconds=settings.CONTROL_NODE_POOL_IDLE_TTL + 1
+        )
+    )
+    node_name = node.name
+
+    client.post('/webhooks/control-nodes/maintain')
+
+    assert gcloud_mocks['delete'].call_args.args[2] == node_name
+    assert not db.session.query(ControlNode).count()
+
+
+def test_not_booted_node_is_deleted(client, gcloud_mocks):
+    ControlNodeFactory(
+        status=ControlNodeStatus.BOOTING,
+        heartbeat_at=None,
+        created_at=datetime.now() - timedelta(
+            seconds=settings.CONTROL_NODE_POOL_BOOT_TIMEOUT + 1
+        )
+    )
+
+    req = client.post('/webhooks/control-nodes/maintain')
+
+    assert req.json['deleted'] == 1
+    assert not db.session.query(ControlNode).count()
@@ -0,0 +1,82 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from bms_app.services import gce
+
+
+@pytest.fixture
+def compute():
+    service = MagicMock()
+    service.zones().list().execute.return_value = {
+        'items': [
+            {'name': 'us-east1-b', 'region': 'regions/us-east1'},
+            {'name': 'europe-west1-b', 'region': 'regions/europe-west1'},
+        ]
+    }
+    service.zones().list_next.return_value = None
+    service.images().getFromFamily().execute.return_value = {
+        'selfLink': 'images/centos-7-v1'
+    }
+    service.reset_mock()
+
+    gce.invalidate_gce_cache()
+    with patch('bms_app.services.gce.get_discovery_service', return_value=service):
+        yield service
+    gce.invalidate_gce_cache()
+
+
+def test_get_zone_is_cached(compute):
+    subnet = 'regions/europe-west1/subnetworks/subnet'
+
+    assert gce.get_zone('project', subnet) == 'europe-west1-b'
+    assert gce.get_zone('project', subnet) == 'europe-west1-b'
+    assert compute.zones().list.call_count == 1
+
+    gce.invalidate_gce_cache()
+    assert gce.get_zone('project', subnet) == 'europe-west1-b'
+    assert compute.zones().list.call_count == 2
+
+
+def test_get_zone_cache_expires(compute):
+    subnet = 'regions/us-east1/subnetworks/subnet'
+
+    with patch('bms_app.services.gce.time.monotonic', return_value=0):
+        gce.get_zone('project', subnet)
+    with patch('bms_app.services.gce.time.monotonic',
+               return_value=gce.zones_cache.ttl + 1):
+        gce.get_zone('project', subnet)
+
+    assert compute.zones().list.call_count == 2
+
+
+def test_get_zone_not_found_is_not_cached(compute):
+    subnet = 'regions/asia-east1/subnetworks/subnet'
+
+    assert gce.get_zone('project', subnet) is None
+    assert gce.get_zone('project', subnet) is None
+    assert compute.zones().list.call_count == 2
+
+
+def test_create_instance_caches_image(compute):
+    for name in ('cn-1', 'cn-2'):
+        gce.create_instance(
+            'project', 'zone', name, 'vpc', 'subnet', 'sa', 'e2-medium'
+        )
+
+    assert compute.images().getFromFamily.call_count == 1
+    body = compute.instances().insert.call_args.kwargs['body']
+    assert body['disks'][0]['initializeParams']['sourceImage'] == 'images/centos-7-v1'
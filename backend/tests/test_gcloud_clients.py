@@ -0,0 +1,68 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+from bms_app.services import gcs
+from bms_app.services.gcloud_clients import (
+    ClientRegistry, get_clients_constructions, registry
+)
+
+
+def test_client_is_created_once():
+    clients_registry = ClientRegistry()
+    factory = MagicMock(side_effect=lambda: object())
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        clients = list(pool.map(
+            lambda _: clients_registry.get('storage', factory),
+            range(50)
+        ))
+
+    assert factory.call_count == 1
+    assert len({id(x) for x in clients}) == 1
+    assert clients_registry.constructions['storage'] == 1
+
+
+def test_per_thread_client():
+    clients_registry = ClientRegistry()
+    factory = MagicMock(side_effect=lambda: object())
+
+    client_1 = clients_registry.get('compute_v1', factory, per_thread=True)
+    client_2 = clients_registry.get('compute_v1', factory, per_thread=True)
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        client_3 = pool.submit(
+            clients_registry.get, 'compute_v1', factory, per_thread=True
+        ).result()
+
+    assert client_1 is client_2
+    assert client_3 is not client_1
+    assert clients_registry.constructions['compute_v1'] == 2
+
+
+@patch('bms_app.services.gcloud_clients._create_storage_client')
+def test_gcs_helpers_share_storage_client(create_mock):
+    registry.reset()
+
+    try:
+        gcs.upload_blob_from_string('bucket', 'a.txt', 'a')
+        gcs.upload_blob_from_string('bucket', 'b.txt', 'b')
+        gcs.delete_blob('bucket', 'a.txt')
+
+        assert create_mock.call_count == 1
+        assert get_clients_constructions() == {'storage': 1}
+    finally:
+        registry.reset()
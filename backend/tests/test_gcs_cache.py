@@ -0,0 +1,119 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from unittest.mock import patch
+
+import pytest
+from google.api_core.exceptions import NotFound
+
+from bms_app.services.gcs import GCSFileCache, get_file_content
+
+
+class FakeBlob:
+    def __init__(self, storage, key):
+        self.storage = storage
+        self.key = key
+        self.generation = storage.files[key][0]
+
+    def download_as_bytes(self, if_generation_match=None):
+        self.storage.downloads += 1
+        return self.storage.files[self.key][1]
+
+
+class FakeStorage:
+    """Storage client serving files of one bucket from a dict."""
+
+    def __init__(self):
+        self.files = {}  # key: (generation, content)
+        self.downloads = 0
+
+    def bucket(self, bucket_name):
+        return self
+
+    def get_blob(self, key):
+        if key in self.files:
+            return FakeBlob(self, key)
+        return None
+
+
+@pytest.fixture
+def storage():
+    fake_storage = FakeStorage()
+    with patch('bms_app.services.gcs.get_storage_client', return_value=fake_storage):
+        yield fake_storage
+
+
+def test_file_cache_downloads_only_new_generation(storage):
+    cache = GCSFileCache(max_size=1024)
+    storage.files['pfile.ora'] = (1, b'v1')
+
+    assert cache.get('bucket', 'pfile.ora') == b'v1'
+    assert cache.get('bucket', 'pfile.ora') == b'v1'
+    assert storage.downloads == 1
+
+    storage.files['pfile.ora'] = (2, b'v2')
+    assert cache.get('bucket', 'pfile.ora') == b'v2'
+    assert storage.downloads == 2
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_file_cache_evicts_least_recently_used(storage):
+    cache = GCSFileCache(max_size=10)
+    storage.files['a'] = (1, b'aaaa')
+    storage.files['b'] = (1, b'bbbb')
+    storage.files['c'] = (1, b'cccc')
+
+    cache.get('bucket', 'a')
+    cache.get('bucket', 'b')
+    cache.get('bucket', 'a')
+    cache.get('bucket', 'c')  # evicts 'b'
+    assert storage.downloads == 3
+
+    cache.get('bucket', 'a')
+    assert storage.downloads == 3
+    cache.get('bucket', 'b')
+    assert storage.downloads == 4
+
+
+def test_file_cache_on_disk(storage, tmp_path):
+    storage.files['rman.log'] = (5, b'log')
+
+    GCSFileCache(max_size=1024, disk_dir=str(tmp_path)).get('bucket', 'rman.log')
+    # new process, memory is empty
+    cache = GCSFileCache(max_size=1024, disk_dir=str(tmp_path))
+    assert cache.get('bucket', 'rman.log') == b'log'
+    assert storage.downloads == 1
+
+    storage.files['rman.log'] = (6, b'log2')
+    assert cache.get('bucket', 'rman.log') == b'log2'
+    assert len(list(tmp_path.iterdir())) == 1
+
+
+def test_file_cache_missing_file(storage):
+    with pytest.raises(NotFound):
+        GCSFileCache(max_size=1024).get('bucket', 'missing')
+
+    with pytest.raises(NotFound):
+        get_file_content('bucket', 'missing')
+
+
+def test_file_cache_disk_write_error(storage, tmp_path):
+    storage.files['pfile.ora'] = (1, b'v1')
+    cache = GCSFileCache(max_size=1024, disk_dir=str(tmp_path))
+
+    with patch('bms_app.services.gcs.os.replace', side_effect=OSError('disk is full')):
+        assert cache.get('bucket', 'pfile.ora') == b'v1'
+
+    assert list(tmp_path.iterdir()) == []
+    assert cache.get('bucket', 'pfile.ora') == b'v1'
+    assert storage.downloads == 1
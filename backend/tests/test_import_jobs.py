@@ -0,0 +1,191 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import io
+import json
+import os
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from bms_app import settings
+from bms_app.models import BMSServer, ImportJob, ImportJobStatus, SourceDB, db
+
+from .factories import ProjectFactory
+
+
+targets_data = json.dumps([
+    {
+        'name': 'bms-t',
+        'state': 'RUNNING',
+        'machineType': 'o2-standard-16-metal',
+        'luns': [
+            {'name': 'disk-1', 'size_gb': '10', 'storage_type': 'PERSISTENT', 'storage_volume': '/dev/sdc'},
+        ],
+        'networks': [
+            {'ipAddress': '172.25.9.2', 'name': 'nic0', 'type': 'CLIENT'},
+        ],
+        'cpu': '4',
+        'socket': '2',
+        'ram': '32',
+        'location': 'europe-west-3',
+    }
+]).encode()
+
+
+def post_migvisor_file(client, files_dir, project_id, overwrite=False):
+    with open(os.path.join(files_dir, 'MigVisor_example.xlsx'), 'rb') as fp:
+        return client.post(
+            '/api/import-jobs/migvisor',
+            data={
+                'project_id': project_id,
+                'file': (fp, 'MigVisor_example.xlsx'),
+                'overwrite': overwrite,
+            },
+            content_type='multipart/form-data',
+        )
+
+
+def test_migvisor_import_job(client, files_dir):
+    pr = ProjectFactory()
+
+    req = post_migvisor_file(client, files_dir, pr.id)
+
+    assert req.status_code == 202
+
+    req = client.get(f'/api/import-jobs/{req.json["id"]}')
+
+    assert req.status_code == 200
+    assert req.json['status'] == 'COMPLETE'
+    assert req.json['is_finished']
+    assert req.json['total'] == 5
+    assert req.json['processed'] == 5
+    assert req.json['result'] == {'added': 5, 'updated': 0, 'skipped': 0}
+    assert db.session.query(SourceDB).filter(SourceDB.project_id == pr.id).count() == 5
+
+
+def test_same_file_returns_existing_job(client, files_dir):
+    pr = ProjectFactory()
+
+    job_id = post_migvisor_file(client, files_dir, pr.id).json['id']
+
+    with patch('bms_app.services.import_jobs.run_import_job') as mock:
+        req = post_migvisor_file(client, files_dir, pr.id)
+
+    assert req.status_code == 200
+    assert req.json['id'] == job_id
+    assert not mock.called
+
+    # another parameters mean another job
+    req = post_migvisor_file(client, files_dir, pr.id, overwrite=True)
+
+    assert req.status_code == 202
+    assert req.json['id'] != job_id
+    assert req.json['result'] == {'added': 0, 'updated': 5, 'skipped': 0}
+
+
+def test_failed_job_is_restarted(client):
+    data = {'file': (io.BytesIO(b'[wrong json'), 'targets.json')}
+
+    req = client.post('/api/import-jobs/targets', data=data, content_type='multipart/form-data')
+
+    assert req.status_code == 202
+    assert req.json['status'] == 'FAILED'
+    assert req.json['error'] == 'incorrect json format'
+
+    data = {'file': (io.BytesIO(b'[wrong json'), 'targets.json')}
+    req_2 = client.post('/api/import-jobs/targets', data=data, content_type='multipart/form-data')
+
+    assert req_2.status_code == 202
+    assert req_2.json['id'] != req.json['id']
+    assert db.session.query(ImportJob).count() == 2
+
+
+def test_targets_validation_error(client):
+    data = {'file': (io.BytesIO(b'[{"name": "bms-t"}]'), 'targets.json')}
+
+    req = client.post('/api/import-jobs/targets', data=data, content_type='multipart/form-data')
+
+    assert req.json['status'] == 'FAILED'
+    assert 'location' in req.json['error']
+
+
+def test_targets_import_job(client):
+    data = {'file': (io.BytesIO(targets_data), 'targets.json')}
+
+    req = client.post('/api/import-jobs/targets', data=data, content_type='multipart/form-data')
+
+    assert req.status_code == 202
+    assert req.json['status'] == 'COMPLETE'
+    assert req.json['result'] == {'processed': 1}
+    assert db.session.query(BMSServer).filter(BMSServer.name == 'bms-t').count() == 1
+
+
+def test_stale_job_is_failed_and_restarted(client):
+    data = {'file': (io.BytesIO(targets_data), 'targets.json')}
+
+    with patch('bms_app.services.import_jobs.run_import_job'):
+        req = client.post('/api/import-jobs/targets', data=data, content_type='multipart/form-data')
+
+    assert req.json['status'] == 'PENDING'
+
+    # job is lost, e.g. the app is restarted
+    job = db.session.query(ImportJob).get(req.json['id'])
+    job.updated_at = datetime.now() - timedelta(seconds=settings.IMPORT_JOBS_STALE_TIMEOUT + 1)
+    db.session.commit()
+
+    data = {'file': (io.BytesIO(targets_data), 'targets.json')}
+    req_2 = client.post('/api/import-jobs/targets', data=data, content_type='multipart/form-data')
+
+    assert req_2.status_code == 202
+    assert req_2.json['id'] != req.json['id']
+    assert req_2.json['status'] == 'COMPLETE'
+    db.session.refresh(job)
+    assert job.status == ImportJobStatus.FAILED
+    assert job.error == 'job was interrupted'
+
+
+def test_job_failed_as_stale_is_not_completed(client):
+    def fail_job(*args, **kwargs):
+        # another request has failed the job as stale meanwhile
+        db.session.query(ImportJob).update({'status': ImportJobStatus.FAILED})
+        db.session.commit()
+
+    data = {'file': (io.BytesIO(targets_data), 'targets.json')}
+    with patch('bms_app.services.import_jobs.insert_uploaded_servers',
+               side_effect=fail_job):
+        req = client.post('/api/import-jobs/targets', data=data, content_type='multipart/form-data')
+
+    job = db.session.query(ImportJob).get(req.json['id'])
+    assert job.status == ImportJobStatus.FAILED
+    assert job.processed == 0
+    assert job.completed_at is None
+
+
+def test_concurrent_job_is_returned(client):
+    data = {'file': (io.BytesIO(targets_data), 'targets.json')}
+
+    with patch('bms_app.services.import_jobs.run_import_job'):
+        job_id = client.post(
+            '/api/import-jobs/targets', data=data, content_type='multipart/form-data'
+        ).json['id']
+
+        # another request has not found the job yet
+        with patch('bms_app.services.import_jobs.get_existing_job',
+                   side_effect=[None, ImportJob.query.get(job_id)]):
+            data = {'file': (io.BytesIO(targets_data), 'targets.json')}
+            req = client.post('/api/import-jobs/targets', data=data, content_type='multipart/form-data')
+
+    assert req.status_code == 200
+    assert req.json['id'] == job_id
+    assert db.session.query(ImportJob).count() == 1
@@ -0,0 +1,115 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from bms_app.services.placement import (
+    NO_RAC_TARGETS, NO_TARGET, PlacementDb, PlacementSolver, PlacementTarget,
+    parse_ram
+)
+
+from tests.factories import (
+    BMSServerFactory, MappingFactory, ProjectFactory, SourceDBFactory
+)
+
+
+def target(id, cpu=8, ram=192, disk=100, location='us-east4'):
+    return PlacementTarget(id=id, cpu=cpu, ram=ram, disk=disk, location=location)
+
+
+def test_parse_ram():
+    assert parse_ram('192GB') == 192
+    assert parse_ram('1.5TB') == 1536
+    assert parse_ram('') == 0
+
+
+def test_db_is_placed_to_smallest_suitable_target():
+    targets = [
+        target(1, cpu=56, ram=1536),
+        target(2, cpu=8, ram=192, disk=50),
+        target(3, cpu=8, ram=192, disk=500),
+        target(4, cpu=8, ram=192, disk=200),
+    ]
+    dbs = [PlacementDb(id=1, cores=4, ram=64, db_size=100)]
+
+    placement = PlacementSolver(dbs, targets).solve()
+
+    assert placement.mappings == [{'db_id': 1, 'bms_id': [4]}]
+    assert placement.unplaced == []
+
+
+def test_biggest_dbs_are_placed_first():
+    targets = [target(1, cpu=8), target(2, cpu=16)]
+    dbs = [
+        PlacementDb(id=1, cores=2),
+        PlacementDb(id=2, cores=12),
+    ]
+
+    placement = PlacementSolver(dbs, targets).solve()
+
+    assert placement.mappings == [
+        {'db_id': 1, 'bms_id': [1]},
+        {'db_id': 2, 'bms_id': [2]},
+    ]
+
+
+def test_rac_nodes_are_placed_to_one_location():
+    targets = [
+        target(1, location='us-east4'),
+        target(2, location='us-west1'),
+        target(3, location='us-west1'),
+        target(4, location='us-west1', disk=10),
+    ]
+    dbs = [
+        PlacementDb(id=1, nodes=2, db_size=50),
+        PlacementDb(id=2, nodes=2, db_size=50),
+    ]
+
+    placement = PlacementSolver(dbs, targets).solve()
+
+    assert placement.mappings == [{'db_id': 1, 'bms_id': [2, 3]}]
+    assert placement.unplaced == [{'db_id': 2, 'reason': NO_RAC_TARGETS}]
+
+
+def test_db_exceeding_luns_capacity_is_not_placed():
+    placement = PlacementSolver(
+        [PlacementDb(id=1, db_size=1000)],
+        [target(1, disk=500)]
+    ).solve()
+
+    assert placement.mappings == []
+    assert placement.unplaced == [{'db_id': 1, 'reason': NO_TARGET}]
+
+
+def test_placement_api(client):
+    pr = ProjectFactory()
+    db_1 = SourceDBFactory(project=pr, cores=4, ram=64, db_size=100)
+    db_2 = SourceDBFactory(project=pr, db_type='RAC', fe_rac_nodes=2, cores=4, ram=64, db_size=100)
+    mapped_db = SourceDBFactory(project=pr)
+    luns = [{'name': 'lun', 'size_gb': '200', 'storage_type': 'SSD',
+             'storage_volume': '/dev/mapper/3a'}]
+    bms = [
+        BMSServerFactory(cpu='8', ram='192GB', luns=luns, location='us-east4')
+        for _ in range(2)
+    ]
+    MappingFactory(source_db=mapped_db, bms=BMSServerFactory(cpu='8', ram='192GB', luns=luns))
+    BMSServerFactory(cpu='8', ram='192GB', luns=luns, deleted=True)
+
+    req = client.get(f'/api/mappings/placement?project_id={pr.id}')
+
+    assert req.status_code == 200
+    data = req.json['data']
+    # rac db is placed first and takes both free targets
+    assert data['unplaced'] == [{'db_id': db_1.id, 'reason': NO_TARGET}]
+    assert data['mappings'] == [
+        {'db_id': db_2.id, 'bms_id': [bms[0].id, bms[1].id]}
+    ]
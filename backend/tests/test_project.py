@@ -12,18 +12,25 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from unittest.mock import patch
+
+import pytest
 from faker import Faker
 
 from bms_app.models import (
-    Config, Label, Mapping, Operation, OperationDetails, OperationDetailsError,
-    Project, RestoreConfig, ScheduledTask, SourceDB, Wave, db
+    Config, ImportJob, ImportJobType, Label, Mapping, Operation,
+    OperationDetails, OperationDetailsError, OperationType, Project,
+    RacNodesCounter, RestoreConfig, ScheduledTask, SourceDB, Wave, WaveRollup,
+    db, source_db_to_label
 )
+from bms_app.project.services import DeleteProjectService
+from bms_app.services.wave_rollup import refresh_wave_rollup
 
 from .factories import (
     BMSServerFactory, ConfigFactory, LabelFactory, MappingFactory,
     OperationDetailsErrorFactory, OperationDetailsFactory, OperationFactory,
-    ProjectFactory, RestoreConfigFactory, ScheduledTaskFactory,
-    SourceDBFactory, WaveFactory
+    ProjectFactory, RacNodesCounterFactory, RestoreConfigFactory,
+    ScheduledTaskFactory, SourceDBFactory, WaveFactory
 )
 
 
@@ -263,3 +270,102 @@ def test_delete_testing_project(client):
     assert Label.query.count() == 0
 
     # assert not db.session.query(Mapping).join(SourceDB).filter(SourceDB.project_id == pr.id).all()
+
+
+@pytest.mark.parametrize('chunk_size', [0, 1])
+def test_delete_project_counts(client, chunk_size):
+    """All related rows are deleted and counted by table."""
+    pr = ProjectFactory()
+    wave = WaveFactory(project=pr)
+    sdb_1 = SourceDBFactory(project=pr, wave=wave)
+    sdb_2 = SourceDBFactory(project=pr)
+    map_1 = MappingFactory(source_db=sdb_1)
+    map_2 = MappingFactory(source_db=sdb_2)
+    op_1 = OperationFactory(wave=wave)
+    # restore operation is not bound to the wave
+    op_2 = OperationFactory(wave=None, operation_type=OperationType.BACKUP_RESTORE)
+    op_det_1 = OperationDetailsFactory(mapping=map_1, wave=wave, operation=op_1)
+    OperationDetailsFactory(mapping=map_2, wave=None, operation=op_2)
+    OperationDetailsErrorFactory(operation_details=op_det_1)
+    OperationDetailsErrorFactory(operation_details=op_det_1)
+    RacNodesCounterFactory(operation_id=op_1.id, db_id=sdb_1.id)
+    LabelFactory(project=pr, source_dbs=[sdb_1, sdb_2])
+    refresh_wave_rollup(wave.id)
+    db.session.add(ImportJob(
+        job_type=ImportJobType.MIGVISOR,
+        idempotency_key='key',
+        project_id=pr.id
+    ))
+    db.session.commit()
+
+    # records that should not be deleted
+    other_db = SourceDBFactory()
+    OperationDetailsFactory(mapping=MappingFactory(source_db=other_db))
+
+    counts = DeleteProjectService(pr.id, force=True, chunk_size=chunk_size).delete()
+
+    assert counts == {
+        'control_nodes': 0,
+        'operation_details_errors': 2,
+        'operation_details': 2,
+        'rac_nodes_counters': 1,
+        'operations': 2,
+        'wave_rollups': 1,
+        'mappings': 2,
+        'configs': 0,
+        'restore_configs': 0,
+        'scheduled_tasks': 0,
+        'source_db_labels': 2,
+        'source_dbs': 2,
+        'waves': 1,
+        'labels': 1,
+        'import_jobs': 1,
+        'projects': 1,
+    }
+    assert RacNodesCounter.query.count() == 0
+    assert WaveRollup.query.count() == 0
+    assert ImportJob.query.count() == 0
+    assert db.session.query(source_db_to_label).count() == 0
+    assert SourceDB.query.count() == 1
+    assert OperationDetails.query.count() == 1
+    assert Operation.query.count() == 1
+
+
+def test_interrupted_delete_project_is_repeated(client):
+    """Restore operations are not orphaned by the interrupted delete."""
+    pr = ProjectFactory()
+    wave = WaveFactory(project=pr)
+    sdb_1 = SourceDBFactory(project=pr, wave=wave)
+    sdb_2 = SourceDBFactory(project=pr)
+    map_1 = MappingFactory(source_db=sdb_1)
+    map_2 = MappingFactory(source_db=sdb_2)
+    op_1 = OperationFactory(wave=wave)
+    op_2 = OperationFactory(wave=None, operation_type=OperationType.BACKUP_RESTORE)
+    op_3 = OperationFactory(wave=None, operation_type=OperationType.BACKUP_RESTORE)
+    OperationDetailsFactory(mapping=map_2, wave=None, operation=op_2)
+    OperationDetailsFactory(mapping=map_2, wave=None, operation=op_3)
+    OperationDetailsFactory(mapping=map_1, wave=wave, operation=op_1)
+
+    commit = db.session.commit
+    commits = []
+
+    def interrupt_commit():
+        commits.append(1)
+        if len(commits) == 2:
+            raise RuntimeError('interrupted')
+        commit()
+
+    with patch.object(db.session, 'commit', side_effect=interrupt_commit):
+        with pytest.raises(RuntimeError):
+            DeleteProjectService(pr.id, force=True, chunk_size=1).delete()
+    db.session.rollback()
+
+    assert Operation.query.count() == 2
+    assert OperationDetails.query.count() == 2
+
+    counts = DeleteProjectService(pr.id, force=True, chunk_size=1).delete()
+
+    assert counts['operations'] == 2
+    assert Operation.query.count() == 0
+    assert OperationDetails.query.count() == 0
+    assert Project.query.count() == 0
@@ -79,3 +79,17 @@ def test_rman_parser_specific_command(client, files_dir):
                 'File Type of Backup Required Name\n'
                 '---- ----------------------- -----------------------------------'
             )
+
+
+def test_rman_parser_failed_commands_outputs(client, files_dir):
+    with open(os.path.join(files_dir, 'pre_restore_rman_with_errors.log')) as fp:
+        with patch('bms_app.services.rman.get_file_content',
+                   return_value=fp.read()) as gcs_mock:
+            parser = RmanLogFileParser(1)
+
+            outputs = parser.get_failed_commands()
+            for error, output in outputs.items():
+                assert parser.get_cmd_output(error) == output
+
+            assert outputs['RMAN> report need backup'].startswith('report need backup;')
+            assert gcs_mock.call_count == 1
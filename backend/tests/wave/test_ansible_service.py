@@ -12,15 +12,20 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import io
 import os
+import tarfile
 from unittest.mock import patch
 
+from bms_app import settings
 from bms_app.models import SourceDBType
 from bms_app.services.ansible import AnsibleConfigService
+from bms_app.services.control_node import DeployControlNodeService
 from bms_app.services.operations.objects import DbMapping
 
 from tests.factories import (
-    BMSServerFactory, ConfigFactory, MappingFactory, SourceDBFactory
+    BMSServerFactory, ConfigFactory, MappingFactory, OperationFactory,
+    SourceDBFactory, WaveFactory
 )
 
 
@@ -396,3 +401,84 @@ def test_ansible_rac_config_generator(up_mock, client):
         os.path.normpath('conf_dir/data_mounts_config/data_mounts_config_rac_target_2.json'),
         expected_rac_data_mounts_config_2
     )
+
+
+def _create_si_db_mappings_objects(count):
+    db_mappings_objects = []
+    for ind in range(count):
+        db = SourceDBFactory(oracle_edition='EE', oracle_version='19')
+        ConfigFactory(source_db=db)
+        bms = BMSServerFactory(
+            name=f'target_{ind}',
+            secret_name=f'sm_token_{ind}',
+            networks=[{'ipAddress': f'172.25.9.{ind}', 'name': 'nic0', 'type': 'CLIENT'}]
+        )
+        mapping = MappingFactory(source_db=db, bms=bms)
+        db_mappings_objects.append(DbMapping(db=db, mappings=[mapping]))
+
+    return db_mappings_objects
+
+
+@patch('bms_app.services.ansible.mixins.upload_blob_from_string')
+def test_ansible_config_parallel_upload(up_mock, client):
+    client.application.config['ANSIBLE_CONFIG_UPLOAD_WORKERS'] = 4
+
+    srv = AnsibleConfigService(
+        db_mappings_objects=_create_si_db_mappings_objects(5),
+        gcs_config_dir='conf_dir'
+    )
+    srv.run()
+
+    uploaded_keys = sorted(x.args[1] for x in up_mock.call_args_list)
+    expected_keys = sorted(
+        ['conf_dir/inventory', 'conf_dir/inventory_temp']
+        + [f'conf_dir/asm_config/asm_disk_config_target_{x}.json' for x in range(5)]
+        + [f'conf_dir/data_mounts_config/data_mounts_config_target_{x}.json' for x in range(5)]
+    )
+    assert uploaded_keys == [os.path.normpath(x) for x in expected_keys]
+    assert srv.config_archive is None
+
+
+@patch('bms_app.services.ansible.mixins.upload_blob_from_string')
+def test_ansible_config_archive_upload(up_mock, client):
+    with patch.object(settings, 'ANSIBLE_CONFIG_UPLOAD_MODE', 'archive'):
+        srv = AnsibleConfigService(
+            db_mappings_objects=_create_si_db_mappings_objects(2),
+            gcs_config_dir='conf_dir'
+        )
+        srv.run()
+
+    assert up_mock.call_count == 1
+    bucket, gcs_key, content = up_mock.call_args.args
+    assert bucket == 'test-bucket'
+    assert gcs_key == 'conf_dir/configs.tar.gz'
+    assert srv.config_archive == 'configs.tar.gz'
+
+    with tarfile.open(fileobj=io.BytesIO(content), mode='r:gz') as archive:
+        assert sorted(archive.getnames()) == [
+            'asm_config/asm_disk_config_target_0.json',
+            'asm_config/asm_disk_config_target_1.json',
+            'data_mounts_config/data_mounts_config_target_0.json',
+            'data_mounts_config/data_mounts_config_target_1.json',
+            'inventory',
+            'inventory_temp',
+        ]
+        inventory = archive.extractfile('inventory').read().decode()
+
+    assert 'target_0' in inventory
+
+
+def test_control_node_syncs_unpacked_archive(client):
+    wave = WaveFactory()
+    operation = OperationFactory(wave=wave)
+
+    script = DeployControlNodeService._generate_startup_script(
+        operation,
+        'conf_dir',
+        {'wave': wave, 'config_archive': 'configs.tar.gz'}
+    )
+
+    assert '${CONFIG_FILES_PATH}/configs.tar.gz - | tar -xz' in script
+    assert 'gsutil -m -q cp -r ${CONFIG_ARCHIVE_DIR}/* gs://${BUCKET_NAME}/${CONFIG_FILES_PATH}/' in script
+    # stock toolkit reads configs from GCS only
+    assert '--configs-dir' not in script
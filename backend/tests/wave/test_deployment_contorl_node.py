@@ -14,6 +14,7 @@
 
 from unittest.mock import patch
 
+from bms_app import settings
 from bms_app.models import OperationType
 from bms_app.services.operations.wave import DeployControlNodeService
 
@@ -78,3 +79,23 @@ def test_e2_standard_16_type(zmock, cr_inst_mock, client):
 
     assert cr_inst_mock.call_args.kwargs['zone'] == 'zone1'
     assert cr_inst_mock.call_args.kwargs['machine_type'] == 'e2-standard-16'
+
+
+@patch('bms_app.services.control_node.create_instance')
+@patch('bms_app.services.control_node.get_zone', return_value='zone1')
+def test_toolkit_artifact_startup_script(zmock, cr_inst_mock, client):
+    operation = OperationFactory(operation_type=OperationType.DEPLOYMENT)
+
+    with patch.object(settings, 'BMS_TOOLKIT_ARTIFACT', 'toolkit/bms-toolkit-1.2.tar.gz'):
+        DeployControlNodeService.run(
+            project=operation.wave.project,
+            operation=operation,
+            gcs_config_dir='config/dir',
+            wave=operation.wave,
+            total_targets=10
+        )
+
+    startup_script = cr_inst_mock.call_args.kwargs['startup_script']
+    assert 'gs://${BUCKET_NAME}/toolkit/bms-toolkit-1.2.tar.gz' in startup_script
+    assert 'git clone' not in startup_script
+    assert operation.control_node_started_at
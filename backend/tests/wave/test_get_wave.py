@@ -12,6 +12,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from bms_app.models import db
+from bms_app.services.wave_rollup import refresh_wave_rollup
+
 from tests.factories import (
     OperationDetailsFactory, OperationFactory, ProjectFactory, WaveFactory
 )
@@ -103,6 +106,9 @@ def test_step_data_if_running_wave(client):
     wave = WaveFactory.create(is_running=True)
     op = OperationFactory(wave=wave)
     OperationDetailsFactory(wave=wave, operation=op)
+    # rollup is calculated when the operation is started
+    refresh_wave_rollup(wave.id)
+    db.session.commit()
 
     req = client.get('/api/waves')
 
@@ -14,6 +14,10 @@
 
 from unittest.mock import patch
 
+from sqlalchemy import event
+
+from bms_app.models import db
+from bms_app.services.wave_rollup import refresh_wave_rollup
 from bms_app.wave.services.waves import GetWaveService
 
 from tests.factories import (
@@ -53,3 +57,40 @@ def test_get_wave_api_service(mock, client):
             'failed': 0
         }
     }
+
+
+@patch('bms_app.wave.services.waves.generate_target_gcp_logs_link')
+def test_get_wave_details_statements(mock, client):
+    pr_1 = ProjectFactory()
+    wave_1 = WaveFactory(project=pr_1, is_running=True)
+    op_1 = OperationFactory(wave=wave_1)
+    for _ in range(3):
+        db_1 = SourceDBFactory(project=pr_1, wave=wave_1)
+        OperationDetailsFactory(
+            mapping=MappingFactory(source_db=db_1),
+            wave=wave_1,
+            operation=op_1,
+        )
+    refresh_wave_rollup(wave_1.id)
+    db.session.commit()
+    wave_id, op_id = wave_1.id, op_1.id
+    db.session.expire_all()
+
+    statements = []
+
+    def count_statement(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', count_statement)
+    try:
+        data = GetWaveService.run(wave_id, return_details=True)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count_statement)
+
+    # wave with rollup/operation/count, mappings
+    assert len(statements) == 2
+    assert data['curr_operation']['id'] == op_id
+    assert data['step'] == {'curr_step': 1, 'total_steps': 5}
+    assert data['status_rate']['undeployed'] == 3
+    assert data['mappings_count'] == 3
+    assert len(data['mappings']) == 3
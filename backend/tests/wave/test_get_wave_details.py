@@ -308,3 +308,57 @@ def test_not_running_wave_details(mock, client):
         'is_configured': config_2.is_configured,
         'has_secret_name': False
     }] == wave_details['mappings']
+
+
+def test_wave_details_pagination(client):
+    pr_1 = ProjectFactory()
+    wave_1 = WaveFactory(project=pr_1)
+    dbs = [SourceDBFactory(project=pr_1, wave=wave_1) for _ in range(3)]
+    for source_db in dbs:
+        MappingFactory(source_db=source_db)
+
+    req = client.get(f'/api/waves/{wave_1.id}?details=1&limit=2')
+    data = req.json
+
+    assert req.status_code == 200
+    assert [x['db_id'] for x in data['mappings']] == [dbs[0].id, dbs[1].id]
+    assert data['next_cursor'] == dbs[1].id
+    assert data['mappings_count'] == 3
+
+    req = client.get(
+        f'/api/waves/{wave_1.id}?details=1&limit=2&after={data["next_cursor"]}'
+    )
+    data = req.json
+
+    assert [x['db_id'] for x in data['mappings']] == [dbs[2].id]
+    assert data['next_cursor'] is None
+
+
+def test_wave_details_filter_by_status_and_step(client):
+    pr_1 = ProjectFactory()
+    wave_1 = WaveFactory(project=pr_1)
+    db_1 = SourceDBFactory(project=pr_1, wave=wave_1)
+    db_2 = SourceDBFactory(project=pr_1, wave=wave_1, db_type='RAC')
+    map_1 = MappingFactory(source_db=db_1)
+    map_2 = MappingFactory(source_db=db_2, rac_node=1)
+    map_3 = MappingFactory(source_db=db_2, rac_node=2)
+    op_1 = OperationFactory(wave=wave_1)
+    OperationDetailsFactory(mapping=map_1, wave=wave_1, operation=op_1, status='COMPLETE')
+    OperationDetailsFactory(mapping=map_2, wave=wave_1, operation=op_1, status='COMPLETE')
+    OperationDetailsFactory(mapping=map_3, wave=wave_1, operation=op_1, status='FAILED', step='CHECK_INSTANCE')
+
+    req = client.get(f'/api/waves/{wave_1.id}?details=1&status=FAILED')
+    data = req.json
+
+    # all targets of the matching db are returned
+    assert [x['db_id'] for x in data['mappings']] == [db_2.id]
+    assert len(data['mappings'][0]['bms']) == 2
+
+    req = client.get(f'/api/waves/{wave_1.id}?details=1&step=PRE_DEPLOYMENT')
+    data = req.json
+
+    assert [x['db_id'] for x in data['mappings']] == [db_1.id, db_2.id]
+
+    req = client.get(f'/api/waves/{wave_1.id}?details=1&status=WRONG')
+
+    assert req.status_code == 400
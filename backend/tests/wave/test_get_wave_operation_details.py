@@ -141,3 +141,13 @@ def test_get_operation_details_rac(mock, client):
                     },
                 ]
             }]}
+
+
+def test_get_operation_details_of_another_wave(client):
+    wave_1 = WaveFactory()
+    wave_2 = WaveFactory(project=wave_1.project)
+    op = OperationFactory(wave=wave_2)
+
+    req = client.get(f'/api/waves/{wave_1.id}/operations/{op.id}/details')
+
+    assert req.status_code == 404
@@ -0,0 +1,141 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import base64
+import json
+from unittest.mock import patch
+
+from tests.factories import (
+    BMSServerFactory, MappingFactory, OperationDetailsFactory,
+    OperationFactory, ProjectFactory, SourceDBFactory, WaveFactory
+)
+
+
+def post_msg(client, data):
+    data['timestamp'] = 123456789
+    encoded = base64.urlsafe_b64encode(json.dumps(data).encode()).decode()
+    return client.post('/webhooks/status', json={'message': {'data': encoded}})
+
+
+def test_wave_not_modified(client):
+    pr = ProjectFactory()
+    wave = WaveFactory(project=pr, is_running=True)
+    db_1 = SourceDBFactory(project=pr, wave=wave)
+    bms_1 = BMSServerFactory()
+    map_1 = MappingFactory(source_db=db_1, bms=bms_1)
+    op_1 = OperationFactory(wave=wave)
+    OperationDetailsFactory(wave=wave, mapping=map_1, operation=op_1)
+
+    req = client.get(f'/api/waves/{wave.id}?details=1')
+    etag = req.headers['ETag']
+
+    assert req.status_code == 200
+    assert etag
+
+    with patch('bms_app.wave.views.GetWaveService.run') as mock:
+        req = client.get(
+            f'/api/waves/{wave.id}?details=1',
+            headers={'If-None-Match': etag}
+        )
+
+    assert req.status_code == 304
+    assert not mock.called
+
+    post_msg(client, {
+        'operation_id': op_1.id,
+        'hostnames': [bms_1.name],
+        'step': 'SETUP_SSH_CONNECTION',
+    })
+
+    req = client.get(
+        f'/api/waves/{wave.id}?details=1',
+        headers={'If-None-Match': etag}
+    )
+
+    assert req.status_code == 200
+    assert req.headers['ETag'] != etag
+    assert req.json['mappings'][0]['bms'][0]['operation_step'] == 'SETUP_SSH_CONNECTION'
+
+
+def test_wave_etag_changes_on_edit(client):
+    pr = ProjectFactory()
+    wave = WaveFactory(project=pr)
+
+    etag = client.get(f'/api/waves/{wave.id}').headers['ETag']
+
+    client.put(f'/api/waves/{wave.id}', json={'name': 'new name', 'project_id': pr.id})
+
+    req = client.get(f'/api/waves/{wave.id}', headers={'If-None-Match': etag})
+
+    assert req.status_code == 200
+    assert req.json['name'] == 'new name'
+
+
+def test_wave_etag_unknown_wave(client):
+    req = client.get('/api/waves/12345')
+
+    assert req.status_code == 404
+
+
+def test_restore_source_dbs_not_modified(client):
+    pr = ProjectFactory()
+
+    req = client.get(f'/api/restore/source-dbs?project_id={pr.id}')
+    etag = req.headers['ETag']
+
+    assert req.status_code == 200
+
+    req = client.get(
+        f'/api/restore/source-dbs?project_id={pr.id}',
+        headers={'If-None-Match': etag}
+    )
+
+    assert req.status_code == 304
+
+
+def test_project_etag_unknown_project(client):
+    req = client.get('/api/restore/source-dbs?project_id=12345')
+
+    assert req.status_code == 404
+
+
+def test_project_etag_changes_on_status_only(client):
+    pr = ProjectFactory()
+    wave = WaveFactory(project=pr, is_running=True)
+    db_1 = SourceDBFactory(project=pr, wave=wave)
+    bms_1 = BMSServerFactory()
+    map_1 = MappingFactory(source_db=db_1, bms=bms_1)
+    op_1 = OperationFactory(wave=wave)
+    OperationDetailsFactory(wave=wave, mapping=map_1, operation=op_1)
+
+    project_url = f'/api/restore/source-dbs?project_id={pr.id}'
+    project_etag = client.get(project_url).headers['ETag']
+    wave_etag = client.get(f'/api/waves/{wave.id}').headers['ETag']
+
+    post_msg(client, {
+        'operation_id': op_1.id,
+        'hostnames': [bms_1.name],
+        'step': 'SETUP_SSH_CONNECTION',
+    })
+
+    assert client.get(project_url).headers['ETag'] == project_etag
+    assert client.get(f'/api/waves/{wave.id}').headers['ETag'] != wave_etag
+
+    post_msg(client, {
+        'operation_id': op_1.id,
+        'hostnames': [bms_1.name],
+        'host_status': 'COMPLETE',
+    })
+
+    assert client.get(project_url).headers['ETag'] != project_etag
@@ -0,0 +1,135 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from bms_app.models import SourceDB, Wave, db
+from bms_app.wave.services.planner import PlanGroup, split_into_waves
+
+from tests.factories import (
+    BMSServerFactory, LabelFactory, MappingFactory, OperationDetailsFactory,
+    ProjectFactory, SourceDBFactory, WaveFactory
+)
+
+
+def mapped_db(project, targets=1, **kwargs):
+    source_db = SourceDBFactory(project=project, **kwargs)
+    for rac_node in range(targets):
+        MappingFactory(source_db=source_db, bms=BMSServerFactory(), rac_node=rac_node)
+    return source_db
+
+
+def test_long_dbs_share_waves():
+    groups = [
+        PlanGroup(db_ids=[1], targets=1, duration=10),
+        PlanGroup(db_ids=[2], targets=1, duration=100),
+        PlanGroup(db_ids=[3], targets=1, duration=20),
+        PlanGroup(db_ids=[4], targets=1, duration=90),
+    ]
+
+    waves = split_into_waves(groups, max_targets=2)
+
+    assert [x.db_ids for x in waves] == [[2, 4], [3, 1]]
+    assert [x.duration for x in waves] == [100, 20]
+
+
+def test_plan_waves(client):
+    pr = ProjectFactory()
+    rac_db = mapped_db(pr, targets=2, db_type='RAC')
+    db_1 = mapped_db(pr)
+    db_2 = mapped_db(pr)
+    db_3 = mapped_db(pr)
+    # not planned: deployed, not mapped, in running wave
+    mapped_db(pr, status='DEPLOYED')
+    SourceDBFactory(project=pr)
+    mapped_db(pr, wave=WaveFactory(project=pr, is_running=True))
+
+    # db_3 is deployed for a long time in the past
+    started_at = datetime(2022, 1, 1)
+    OperationDetailsFactory(
+        mapping=db_3.mappings[0],
+        status='COMPLETE',
+        started_at=started_at,
+        completed_at=started_at + timedelta(hours=10)
+    )
+    LabelFactory(project=pr, source_dbs=[db_1, db_2])
+
+    req = client.post('/api/waves/plan', json={
+        'project_id': pr.id,
+        'max_targets': 3,
+        'together_label_ids': [x.id for x in db_1.labels],
+    })
+
+    assert req.status_code == 200
+    data = req.json['data']
+    assert [x['db_ids'] for x in data] == [[rac_db.id, db_3.id], [db_1.id, db_2.id]]
+    assert [x['targets'] for x in data] == [3, 2]
+    assert data[0]['estimated_duration'] == 36000
+    assert req.json['estimated_makespan'] == 72000
+
+    # nothing is saved
+    assert SourceDB.query.get(db_1.id).wave_id is None
+
+
+def test_too_many_targets_of_labeled_dbs(client):
+    pr = ProjectFactory()
+    db_1 = mapped_db(pr, targets=2)
+    db_2 = mapped_db(pr, targets=2)
+    label = LabelFactory(project=pr, source_dbs=[db_1, db_2])
+
+    req = client.post('/api/waves/plan', json={
+        'project_id': pr.id,
+        'max_targets': 3,
+        'together_label_ids': [label.id],
+    })
+
+    assert req.status_code == 400
+    assert 'together_label_ids' in req.json['errors']
+
+
+def test_apply_wave_plan(client):
+    pr = ProjectFactory()
+    WaveFactory(project=pr, name='wave-1')
+    dbs = [mapped_db(pr) for _ in range(5)]
+    project_id = pr.id
+
+    statements = []
+
+    def count_statement(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', count_statement)
+    try:
+        req = client.post('/api/waves/plan', json={
+            'project_id': project_id,
+            'max_targets': 2,
+            'apply': True,
+        })
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count_statement)
+
+    assert req.status_code == 201
+    data = req.json['data']
+    assert [x['name'] for x in data] == ['wave-2', 'wave-3', 'wave-4']
+
+    for wave_data in data:
+        wave = Wave.query.get(wave_data['id'])
+        assert wave.project_id == project_id
+        assert {x.id for x in wave.source_db} == set(wave_data['db_ids'])
+
+    assert sorted(y for x in data for y in x['db_ids']) == [x.id for x in dbs]
+    # dbs are assigned by one update
+    assert len([x for x in statements if x.startswith('UPDATE source_dbs')]) == 1
@@ -0,0 +1,174 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import base64
+import json
+from unittest.mock import patch
+
+from bms_app.models import SourceDBStatus, WaveRollup, db
+from bms_app.services.wave_rollup import (
+    refresh_wave_rollup, refresh_waves_rollup
+)
+
+from tests.factories import (
+    BMSServerFactory, MappingFactory, OperationDetailsFactory,
+    OperationFactory, ProjectFactory, SourceDBFactory, WaveFactory
+)
+
+
+def encode(data):
+    data['timestamp'] = 123456789
+    return base64.urlsafe_b64encode(json.dumps(data).encode()).decode()
+
+
+def post_msg(client, data):
+    return client.post('/webhooks/status', json={'message': {'data': encode(data)}})
+
+
+def test_list_waves_does_not_create_missing_rollup(client):
+    pr = ProjectFactory()
+    wave = WaveFactory(project=pr)
+    SourceDBFactory(project=pr, wave=wave, status=SourceDBStatus.EMPTY)
+
+    req = client.get(f'/api/waves?project_id={pr.id}')
+
+    assert req.status_code == 200
+    assert req.json['data'][0]['status_rate'] == {
+        'undeployed': 0,
+        'deployed': 0,
+        'failed': 0,
+    }
+    assert not WaveRollup.query.get(wave.id)
+
+
+def test_list_waves_uses_rollup(client):
+    pr = ProjectFactory()
+    wave = WaveFactory(project=pr)
+    SourceDBFactory(project=pr, wave=wave, status=SourceDBStatus.EMPTY)
+    SourceDBFactory(project=pr, wave=wave, status=SourceDBStatus.DEPLOYED)
+    refresh_wave_rollup(wave.id)
+    db.session.commit()
+
+    with patch('bms_app.services.wave_rollup.wave_rate_info') as mock:
+        req = client.get(f'/api/waves?project_id={pr.id}')
+
+    assert not mock.called
+    assert req.json['data'][0]['status_rate'] == {
+        'undeployed': 1,
+        'deployed': 1,
+        'failed': 0,
+    }
+
+
+def test_add_wave_creates_rollup(client):
+    pr = ProjectFactory()
+
+    req = client.post('/api/waves', json={'name': 'w1', 'project_id': pr.id})
+
+    assert req.status_code == 201
+    rollup = WaveRollup.query.one()
+    assert rollup.status_rate == {'undeployed': 0, 'deployed': 0, 'failed': 0}
+
+
+def test_rollup_is_updated_by_status_msgs(client):
+    pr = ProjectFactory()
+    wave = WaveFactory(project=pr, is_running=True)
+    db_1 = SourceDBFactory(project=pr, wave=wave, status=SourceDBStatus.EMPTY)
+    bms_1 = BMSServerFactory()
+    map_1 = MappingFactory(source_db=db_1, bms=bms_1)
+    op_1 = OperationFactory(wave=wave)
+    OperationDetailsFactory(wave=wave, mapping=map_1, operation=op_1)
+
+    refresh_wave_rollup(wave.id)
+    db.session.commit()
+
+    # rollup is updated by deltas, not recalculated
+    with patch('bms_app.services.wave_rollup.wave_rate_info') as rate_mock, \
+            patch('bms_app.services.wave_rollup.get_step_data') as step_mock:
+        post_msg(client, {
+            'operation_id': op_1.id,
+            'hostnames': [bms_1.name],
+            'step': 'SETUP_SSH_CONNECTION',
+        })
+
+        data = client.get(f'/api/waves?project_id={pr.id}').json['data']
+        assert data[0]['step'] == {'curr_step': 2, 'total_steps': 5}
+        assert data[0]['status_rate']['undeployed'] == 1
+
+        # earlier step doesn't move the step back
+        post_msg(client, {
+            'operation_id': op_1.id,
+            'hostnames': [bms_1.name],
+            'step': 'PRE_DEPLOYMENT',
+        })
+
+        data = client.get(f'/api/waves?project_id={pr.id}').json['data']
+        assert data[0]['step'] == {'curr_step': 2, 'total_steps': 5}
+
+        post_msg(client, {
+            'operation_id': op_1.id,
+            'hostnames': [bms_1.name],
+            'host_status': 'COMPLETE',
+        })
+
+        data = client.get(f'/api/waves?project_id={pr.id}').json['data']
+        assert data[0]['status_rate'] == {
+            'undeployed': 0,
+            'deployed': 1,
+            'failed': 0,
+        }
+
+    assert not rate_mock.called
+    assert not step_mock.called
+
+
+def test_rollup_ignores_steps_of_previous_operation(client):
+    pr = ProjectFactory()
+    wave = WaveFactory(project=pr, is_running=True)
+    db_1 = SourceDBFactory(project=pr, wave=wave, status=SourceDBStatus.EMPTY)
+    bms_1 = BMSServerFactory()
+    map_1 = MappingFactory(source_db=db_1, bms=bms_1)
+    op_1 = OperationFactory(wave=wave)
+    OperationDetailsFactory(wave=wave, mapping=map_1, operation=op_1)
+    OperationFactory(wave=wave)
+    refresh_wave_rollup(wave.id)
+    db.session.commit()
+
+    post_msg(client, {
+        'operation_id': op_1.id,
+        'hostnames': [bms_1.name],
+        'step': 'SETUP_SSH_CONNECTION',
+    })
+
+    assert WaveRollup.query.get(wave.id).curr_step == 0
+
+
+def test_rollup_is_updated_on_wave_assignment(client):
+    pr = ProjectFactory()
+    wave_1 = WaveFactory(project=pr)
+    wave_2 = WaveFactory(project=pr)
+    db_1 = SourceDBFactory(project=pr, wave=wave_1)
+    MappingFactory(source_db=db_1)
+
+    refresh_waves_rollup([wave_1.id, wave_2.id])
+    db.session.commit()
+
+    client.post('/api/waves', json={
+        'name': wave_2.name,
+        'project_id': pr.id,
+        'db_ids': [db_1.id],
+    })
+
+    assert WaveRollup.query.get(wave_1.id).undeployed_dbs == 0
+    assert WaveRollup.query.get(wave_2.id).undeployed_dbs == 1
@@ -0,0 +1,194 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import base64
+import json
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from bms_app import settings
+from bms_app.models import Operation, OperationStatus
+from bms_app.services.operations.utils import split_into_shards
+from bms_app.services.operations.wave import DeploymentService
+
+from tests.factories import (
+    BMSServerFactory, MappingFactory, OperationDetailsFactory,
+    OperationFactory, ProjectFactory, SourceDBFactory, WaveFactory
+)
+
+
+def db_mappings(db_id, targets):
+    return SimpleNamespace(
+        db=SimpleNamespace(id=db_id),
+        mappings=[object()] * targets
+    )
+
+
+def encode(data):
+    return base64.urlsafe_b64encode(json.dumps(data).encode()).decode()
+
+
+def send_status(client, wave, operation, status, **kwargs):
+    msg_data = {
+        'wave_id': wave.id,
+        'operation_id': operation.id,
+        'status': status,
+        **kwargs
+    }
+    client.post('/webhooks/status', json={
+        'message': {'data': encode(msg_data), 'messageId': '1'},
+        'subscription': 'projects/myproject/subscriptions/mysubscription'
+    })
+
+
+def test_split_into_shards_keeps_rac_nodes_together():
+    rac = db_mappings(1, 3)
+    single = [db_mappings(x, 1) for x in range(2, 6)]
+
+    shards = split_into_shards([*single, rac], 2)
+
+    # rac db exceeds the limit but is not split
+    assert shards[0] == [rac]
+    assert sorted(len(x) for x in shards[1:]) == [2, 2]
+    assert sum(len(x) for x in shards) == 5
+
+
+@patch('bms_app.services.operations.wave.AnsibleConfigService.__init__', return_value=None)
+@patch('bms_app.services.operations.wave.AnsibleConfigService.run')
+@patch('bms_app.services.operations.wave.DeployControlNodeService.run')
+def test_wave_is_deployed_by_shards(cn_mock, ans_run_mock, ans_init_mock, client):
+    pr = ProjectFactory()
+    wave = WaveFactory(project=pr)
+    for _ in range(3):
+        MappingFactory(
+            source_db=SourceDBFactory(project=pr, wave=wave),
+            bms=BMSServerFactory()
+        )
+
+    with patch.object(settings, 'WAVE_SHARD_MAX_TARGETS', 2):
+        DeploymentService().run(wave.id)
+
+    operation = Operation.query.filter(Operation.wave_id == wave.id).first()
+
+    assert operation.shards == 2
+    assert cn_mock.call_count == 2
+    assert [x.kwargs['shard'] for x in cn_mock.call_args_list] == [0, 1]
+    assert sorted(x.kwargs['total_targets'] for x in cn_mock.call_args_list) == [1, 2]
+    assert cn_mock.call_args_list[1].kwargs['gcs_config_dir'].endswith('/shard_1')
+
+
+@patch('bms_app.services.operations.wave.AnsibleConfigService.__init__', return_value=None)
+@patch('bms_app.services.operations.wave.AnsibleConfigService.run')
+@patch('bms_app.services.operations.wave.DeployControlNodeService.run')
+def test_wave_is_not_sharded_by_default(cn_mock, ans_run_mock, ans_init_mock, client):
+    pr = ProjectFactory()
+    wave = WaveFactory(project=pr)
+    for _ in range(3):
+        MappingFactory(source_db=SourceDBFactory(project=pr, wave=wave))
+
+    DeploymentService().run(wave.id)
+
+    operation = Operation.query.filter(Operation.wave_id == wave.id).first()
+
+    assert operation.shards == 1
+    assert cn_mock.call_count == 1
+    assert cn_mock.call_args.kwargs['shard'] is None
+
+
+def test_sharded_operation_is_finished_by_all_shards(client):
+    pr = ProjectFactory()
+    wave = WaveFactory(project=pr, is_running=True)
+    operation = OperationFactory(
+        wave=wave,
+        status=OperationStatus.IN_PROGRESS,
+        shards=2
+    )
+    oph_1 = OperationDetailsFactory(
+        wave=wave,
+        operation=operation,
+        status=OperationStatus.COMPLETE
+    )
+    oph_2 = OperationDetailsFactory(
+        wave=wave,
+        operation=operation,
+        status=OperationStatus.IN_PROGRESS
+    )
+
+    send_status(client, wave, operation, 'FINISHED')
+    send_status(client, wave, operation, 'TERMINATED', shard=0)
+
+    assert operation.status == OperationStatus.IN_PROGRESS
+    assert operation.finished_shards == [0]
+    assert oph_2.status == OperationStatus.IN_PROGRESS
+
+    send_status(client, wave, operation, 'TERMINATED', shard=1)
+
+    assert operation.finished_shards == [0, 1]
+    assert operation.status == OperationStatus.FAILED
+    assert operation.completed_at
+    assert oph_1.status == OperationStatus.COMPLETE
+    assert oph_2.status == OperationStatus.FAILED
+
+
+@patch('bms_app.services.operations.wave.AnsibleConfigService.__init__', return_value=None)
+@patch('bms_app.services.operations.wave.AnsibleConfigService.run')
+@patch('bms_app.services.operations.wave.DeployControlNodeService.run')
+def test_no_control_node_is_started_if_config_fails(cn_mock, ans_run_mock, ans_init_mock, client):
+    pr = ProjectFactory()
+    wave = WaveFactory(project=pr)
+    for _ in range(3):
+        MappingFactory(
+            source_db=SourceDBFactory(project=pr, wave=wave),
+            bms=BMSServerFactory()
+        )
+    ans_run_mock.side_effect = [None, Exception('config error')]
+
+    with patch.object(settings, 'WAVE_SHARD_MAX_TARGETS', 2):
+        DeploymentService().run(wave.id)
+
+    operation = Operation.query.filter(Operation.wave_id == wave.id).first()
+
+    assert not cn_mock.called
+    assert operation.status == OperationStatus.FAILED
+
+
+@patch('bms_app.services.operations.wave.AnsibleConfigService.__init__', return_value=None)
+@patch('bms_app.services.operations.wave.AnsibleConfigService.run')
+@patch('bms_app.services.operations.wave.DeployControlNodeService.run')
+@patch('bms_app.services.control_node.get_zone', return_value='zone1')
+@patch('bms_app.services.control_node.delete_instance')
+def test_started_control_nodes_are_deleted_on_failure(delete_mock, zone_mock, cn_mock,
+                                                      ans_run_mock, ans_init_mock, client):
+    pr = ProjectFactory()
+    wave = WaveFactory(project=pr)
+    for _ in range(3):
+        MappingFactory(
+            source_db=SourceDBFactory(project=pr, wave=wave),
+            bms=BMSServerFactory()
+        )
+    cn_mock.side_effect = [None, Exception('quota exceeded')]
+
+    with patch.object(settings, 'WAVE_SHARD_MAX_TARGETS', 2):
+        DeploymentService().run(wave.id)
+
+    operation = Operation.query.filter(Operation.wave_id == wave.id).first()
+
+    assert cn_mock.call_count == 2
+    delete_mock.assert_called_once_with(
+        'test-gcp-project',
+        'zone1',
+        f'bms-app-control-node-{wave.id}-{operation.id}-0'
+    )
+    assert operation.status == OperationStatus.FAILED
+    assert not wave.is_running
@@ -332,3 +332,31 @@ resource "google_pubsub_subscription" "migsc-push-subs" {
     }
   }
 }
+
+
+//--------------------------------------------------
+//
+//
+//  Terraform code to create cloud scheduler job
+//  that starts, checks and scales down warm pool control nodes
+//
+//
+//--------------------------------------------------
+
+resource "google_cloud_scheduler_job" "control-nodes-maintain" {
+  name     = var.control_nodes_maintain_job_name
+  project  = var.project_id
+  region   = var.region
+  schedule = var.control_nodes_maintain_schedule
+
+  http_target {
+    http_method = "POST"
+    uri         = "https://${google_app_engine_application.app.default_hostname}/webhooks/control-nodes/maintain"
+    oidc_token {
+      service_account_email = "${google_service_account.waverunner.email}"
+      audience              = "${google_iap_client.project_client.client_id}"
+    }
+  }
+
+  depends_on = [google_project_service.gcp_services]
+}
@@ -256,6 +256,18 @@ variable "x-goog-version" {
   default     = "v1"
 }
 
+variable "control_nodes_maintain_job_name" {
+  type        = string
+  description = "Cloud Scheduler job maintaining warm pool control nodes"
+  default     = "waverunner-control-nodes-maintain"
+}
+
+variable "control_nodes_maintain_schedule" {
+  type        = string
+  description = "Schedule (cron) of the warm pool control nodes maintenance"
+  default     = "*/5 * * * *"
+}
+
 
 //
 // GCS
@@ -346,6 +358,7 @@ variable "gcp_service_list" {
     "cloudresourcemanager.googleapis.com",
     "domains.googleapis.com",
     "cloudtasks.googleapis.com",
+    "cloudscheduler.googleapis.com",
     "appengineflex.googleapis.com"
     // "vpcaccess.googleapis.com"
   ]
@@ -0,0 +1,31 @@
+/**
+ * Copyright 2022 Google LLC
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *      http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+export interface ImportJob {
+  id: number;
+  job_type: string;
+  status: string;
+  project_id?: number;
+  overwrite: boolean;
+  total?: number;
+  processed: number;
+  result?: any;
+  error?: string;
+  is_finished: boolean;
+  created_at?: string;
+  started_at?: string;
+  completed_at?: string;
+}
@@ -15,9 +15,12 @@
  */
 
 import { Injectable } from '@angular/core';
-import { throwError } from 'rxjs';
+import { Observable, of, throwError, timer } from 'rxjs';
+import { catchError, filter, retry, switchMap, take } from 'rxjs/operators';
 import { HttpClient, HttpErrorResponse, HttpHeaders } from "@angular/common/http";
 
+import { ImportJob } from "@app-interfaces/import-job";
+
 import { environment } from "../../../environments/environment";
 
 @Injectable({
@@ -43,6 +46,26 @@ export class HttpService {
     }),
   }
 
+  // ms between import job status requests
+  importJobPollInterval = 2000;
+
+  // Upload the file to the import job endpoint and emit the job once it is finished,
+  // the file is processed in background so the upload request doesn't time out
+  protected runImportJob(url: string, formData: FormData): Observable<ImportJob> {
+    return this.http.post<ImportJob>(url, formData, this.httpOptionsFD)
+      .pipe(
+        retry(1),
+        catchError(this.handleError),
+        switchMap((job: ImportJob) => timer(0, this.importJobPollInterval).pipe(
+          switchMap(() => this.http.get<ImportJob>(this.apiURL + '/import-jobs/' + job.id, this.httpOptions)),
+          filter((job: ImportJob) => job.is_finished),
+          take(1),
+          catchError(this.handleError)
+        )),
+        switchMap((job: ImportJob) => job.status === 'FAILED' ? throwError(job.error) : of(job))
+      )
+  }
+
   handleError(error: HttpErrorResponse) {
     let errorMessage;
     if(error.error instanceof ErrorEvent) {
@@ -16,7 +16,7 @@
 
 import { Injectable } from '@angular/core';
 import { Observable } from "rxjs";
-import { catchError, retry } from "rxjs/operators";
+import { catchError, map, retry } from "rxjs/operators";
 
 import { SourceDb } from "@app-interfaces/sourceDb";
 
@@ -44,9 +44,9 @@ export class SourceDbService extends HttpService {
   }
 
   uploadSourceDbFile(formData: FormData) {
-    return this.http.post<any>(this.apiURL + '/source-dbs/migvisor', formData, this.httpOptionsFD)
+    return this.runImportJob(this.apiURL + '/import-jobs/migvisor', formData)
       .pipe(
-        catchError(this.handleError)
+        map(job => job.result)
       )
   }
 }
@@ -17,7 +17,7 @@
 import { Injectable } from '@angular/core';
 import { HttpErrorResponse, HttpParams } from "@angular/common/http";
 import { Observable, throwError } from "rxjs";
-import { catchError, retry } from "rxjs/operators";
+import { catchError, map, retry } from "rxjs/operators";
 
 import { Target } from "@app-interfaces/targets";
 
@@ -91,10 +91,9 @@ export class TargetsService extends HttpService {
   }
 
   uploadTargetFile(formData: FormData) {
-    return this.http.post<any>(this.apiURL + '/targets/upload', formData, this.httpOptionsFD)
+    return this.runImportJob(this.apiURL + '/import-jobs/targets', formData)
       .pipe(
-        retry(1),
-        catchError(this.handleError)
+        map(job => job.result)
       )
   }
 